@@ -0,0 +1,110 @@
+"""Compares parsing an activity feed page in one pass (what iter_activity_feed does) against parsing RawActivity and then each payload separately (what it used to do)
+
+Run with python -m benchmarks.activity_feed_parsing from the repo root"""
+
+import json
+import timeit
+from datetime import UTC, datetime, timedelta
+from functools import partial
+
+from pygeoguessr.apis.activities import (
+	Activity,
+	ActivityFeedPage,
+	ActivityType,
+	_iter_page_activities,
+	_ParsedActivityFeedPage,
+	activity_list_adapter,
+	payload_models,
+)
+
+_user = {
+	'id': '5b6ae3177135fa0e48b4df1f',
+	'nick': 'someone',
+	'isVerified': False,
+	'flair': 0,
+	'avatar': {'url': 'pin/abc.png', 'isDefault': False, 'anchor': 'center-center'},
+}
+_payloads = {
+	ActivityType.PlayedGame: {
+		'mapSlug': 'world',
+		'mapName': 'World',
+		'points': 21345,
+		'gameToken': 'AbCdEfGhIjKlMnOp',
+		'gameMode': 'Standard',
+	},
+	ActivityType.PlayedChallenge: {
+		'mapSlug': 'world',
+		'mapName': 'World',
+		'points': 18000,
+		'challengeToken': 'AbCdEfGhIjKlMnOp',
+		'gameMode': 'Standard',
+		'isDailyChallenge': True,
+	},
+	ActivityType.PlayedCompetitiveGame: {
+		'gameId': '0d6a8b2e-5cbb-4f43-a0a8-2b1d77e7c0b2',
+		'gameMode': 'Duels',
+		'competitiveGameMode': 'StandardDuels',
+	},
+	ActivityType.ObtainedBadge: {
+		'badgeId': 'abc',
+		'badgeName': 'Some Badge',
+		'badgeLevel': 1,
+		'imagePath': 'badge/abc.png',
+	},
+}
+
+
+def make_page(entries: int = 50) -> bytes:
+	"""A page of made up entries, every fourth one being a MultipleActivities with 5 things in it"""
+	time = datetime(2024, 1, 1, tzinfo=UTC)
+	types = list(_payloads)
+	page_entries = []
+	for i in range(entries):
+		time -= timedelta(minutes=5)
+		if i % 4 == 3:
+			subentries = [
+				{'type': types[j % len(types)], 'time': time.isoformat(), 'payload': _payloads[types[j % len(types)]]}
+				for j in range(5)
+			]
+			page_entries.append(
+				{'type': ActivityType.MultipleActivities, 'time': time.isoformat(), 'user': _user, 'payload': json.dumps(subentries)}
+			)
+		else:
+			activity_type = types[i % len(types)]
+			page_entries.append(
+				{'type': activity_type, 'time': time.isoformat(), 'user': _user, 'payload': json.dumps(_payloads[activity_type])}
+			)
+	return json.dumps({'entries': page_entries, 'paginationToken': 'abc'}).encode()
+
+
+def parse_two_pass(data: bytes) -> list[Activity]:
+	activities = []
+	for entry in ActivityFeedPage.model_validate_json(data).entries:
+		if entry.type == ActivityType.MultipleActivities:
+			for subentry in activity_list_adapter.validate_json(entry.payload):
+				payload = payload_models[subentry.type].model_validate(subentry.payload)
+				activities.append(
+					Activity(type=subentry.type, time=subentry.time, payload=payload, user=entry.user)
+				)
+		else:
+			payload = payload_models[entry.type].model_validate_json(entry.payload)
+			activities.append(Activity(type=entry.type, time=entry.time, payload=payload, user=entry.user))
+	return activities
+
+
+def parse_single_pass(data: bytes) -> list[Activity]:
+	return list(_iter_page_activities(_ParsedActivityFeedPage.model_validate_json(data)))
+
+
+def main():
+	data = make_page()
+	if parse_two_pass(data) != parse_single_pass(data):
+		raise AssertionError('Both ways should give the same activities')
+	number = 200
+	for name, func in (('two pass', parse_two_pass), ('single pass', parse_single_pass)):
+		best = min(timeit.repeat(partial(func, data), number=number, repeat=5)) / number
+		print(f'{name}: {best * 1e6:.0f} µs per page')
+
+
+if __name__ == '__main__':
+	main()
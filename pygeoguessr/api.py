@@ -3,6 +3,7 @@ import contextlib
 import logging
 import os
 import warnings
+from collections import Counter
 from collections.abc import Mapping
 from functools import cache
 from pathlib import Path
@@ -20,7 +21,10 @@ from requests.cookies import RequestsCookieJar
 
 from pygeoguessr import settings
 
+from .async_cache_io import OffloadedFileBackend
+from .endpoints import endpoint_template
 from .filesystem_cache_with_dirs import FileCacheWithDirectories
+from .sqlite_cache_with_index import SQLiteBackendWithIndex
 
 user_agent = 'py-geoguessr'
 
@@ -62,10 +66,10 @@ def get_default_session(*, cached: bool = True) -> requests.Session:
 def _get_async_cache(*, use_sqlite: bool = True):
 	if use_sqlite:
 		cache_path = Path('~/.cache/geoguessr-async.sqlite')
-		return aiohttp_client_cache.SQLiteBackend(str(cache_path), allowed_methods={'GET', 'POST'})
+		return SQLiteBackendWithIndex(str(cache_path), allowed_methods={'GET', 'POST'})
 	cache_path = Path('~/.cache/geoguessr-async')
 	# We need POST for e.g. the geocoding API, anything that actually changes things should just use DO_NOT_CACHE
-	return aiohttp_client_cache.FileBackend(cache_path, allowed_methods={'GET', 'POST'})
+	return OffloadedFileBackend(cache_path, allowed_methods={'GET', 'POST'})
 
 
 async def clear_expired_cache_async():
@@ -89,6 +93,20 @@ def get_default_async_session(
 	return session
 
 
+cache_hits: Counter[str] = Counter()
+"""Number of responses that came from the cache, by endpoint template"""
+cache_misses: Counter[str] = Counter()
+"""Number of responses that could have come from the cache but didn't, by endpoint template"""
+
+
+def _record_cache_lookup(url: str, response: Any):
+	template = endpoint_template(url)
+	if getattr(response, 'from_cache', False):
+		cache_hits[template] += 1
+	else:
+		cache_misses[template] += 1
+
+
 class NotFoundError(requests.HTTPError, ClientResponseError):
 	"""Easier to catch only 404 this way"""
 
@@ -158,6 +176,8 @@ def call_api(
 	response = sesh.request(
 		method, url, params=params, timeout=settings.default_timeout, json=json_body, **kwargs
 	)
+	if isinstance(sesh, requests_cache.CachedSession) and not do_not_cache:
+		_record_cache_lookup(url, response)
 	text = response.text
 	if not response.ok:
 		args = _parse_error_message(text, response.reason)
@@ -236,6 +256,8 @@ async def call_api_async(
 			method, url, params=params, json=json_body, cookies=cookies, **kwargs
 		) as response,
 	):
+		if isinstance(session, CachedAsyncSession) and not do_not_cache:
+			_record_cache_lookup(url, response)
 		text = await response.text()
 		if not response.ok:
 			args = _parse_error_message(text, response.reason)
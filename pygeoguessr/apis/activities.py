@@ -1,11 +1,15 @@
-from collections.abc import AsyncIterator, Iterator
-from datetime import datetime
+from collections.abc import AsyncIterator, Collection, Iterator
+from datetime import UTC, datetime
 from enum import IntEnum
-from typing import TYPE_CHECKING, Any
+from functools import cache
+from typing import TYPE_CHECKING, Annotated, Any, Generic, Literal, TypeVar, Union
 
 import pydantic
+from pydantic_core import core_schema
 
 from pygeoguessr.api import call_api, call_api_async, get_default_async_session
+from pygeoguessr.identity_map import canonical, canonical_strings
+from pygeoguessr.pagination import iter_pages
 from pygeoguessr.settings import BaseModel
 
 # ruff: noqa: TC001
@@ -162,9 +166,141 @@ class ActivityFeedPage(BaseModel):
 	"""Token for the next page, unless this is the last one"""
 
 
+payload_models: dict[ActivityType, type[pydantic.BaseModel]] = {
+	ActivityType.PlayedGame: PlayedGameActivity,
+	ActivityType.PlayedQuickplayGame: PlayedGameActivity,
+	ActivityType.PlayedChallenge: PlayedChallengeActivity,
+	ActivityType.CreatedMap: CreatedMapActivity,
+	ActivityType.ObtainedBadge: ObtainedBadgeActivity,
+	ActivityType.LikedMap: LikedMapActivity,
+	ActivityType.PlayedCompetitiveGame: PlayedCompetitiveActivity,
+	ActivityType.PlayedCasualGame: PlayedCompetitiveActivity,
+	ActivityType.PlayedMultiplayer: PlayedMultiplayerActivity,
+	ActivityType.PlayedInfinityGame: InfinityGameActivity,
+	ActivityType.PlayedSinglePlayerQuiz: PlayedQuizActivity,
+}
+"""Which model the payload is for each type of activity (apart from MultipleActivities)"""
+
+TypeT = TypeVar('TypeT')
+PayloadT = TypeVar('PayloadT')
+
+
+class _FeedEntry(Activity, Generic[TypeT, PayloadT]):
+	"""Activity where type is a Literal of the types that have this payload, so it can be used in a discriminated union, and the payload is parsed out of the JSON string it comes as"""
+
+	type: TypeT  # type: ignore[assignment]
+	payload: pydantic.Json[PayloadT]  # type: ignore[assignment]
+
+
+class _SubActivity(Activity, Generic[TypeT, PayloadT]):
+	"""Item in the payload of a MultipleActivities entry, where the payload is already an object and not a JSON string, and user is filled in from the entry it is in"""
+
+	type: TypeT  # type: ignore[assignment]
+	payload: PayloadT  # type: ignore[assignment]
+	user: ActivityUser | None = None  # type: ignore[assignment]
+
+
+def _new_activity(fields: tuple[dict[str, Any], dict[str, Any] | None, set[str]]) -> Activity:
+	"""Creates an Activity from its validated fields in the same way pydantic would, without validating or copying anything again"""
+	values, extra, fields_set = fields
+	activity = Activity.__new__(Activity)
+	object.__setattr__(activity, '__dict__', values)
+	object.__setattr__(activity, '__pydantic_extra__', extra)
+	object.__setattr__(activity, '__pydantic_fields_set__', fields_set)
+	object.__setattr__(activity, '__pydantic_private__', None)
+	return activity
+
+
+class _AsActivity:
+	"""Annotated metadata for _FeedEntry or _SubActivity that validates its fields with its schema, but creates a plain Activity instead of an instance of the private model, so that parsing gives the same objects that the iterators yield without anything being copied afterwards"""
+
+	def __get_pydantic_core_schema__(
+		self, source: type[Activity], _handler: pydantic.GetCoreSchemaHandler
+	) -> core_schema.CoreSchema:
+		schema = source.__pydantic_core_schema__
+		if schema['type'] != 'model':
+			raise TypeError(f'Expected a model schema for {source}, got {schema["type"]}')
+		# Not just the model schema with Activity as the class, as pydantic would then use Activity's own validator for it
+		return core_schema.no_info_after_validator_function(_new_activity, schema['schema'])
+
+
+class _SkippedEntry(BaseModel, Generic[TypeT]):
+	"""Entry (or sub-activity) of a type that wasn't asked for, so the payload and user aren't parsed"""
+
+	type: TypeT
+	time: datetime
+	payload: Any = None
+	user: Any = None
+
+
+def _tagged_union(
+	entry_type: type[pydantic.BaseModel],
+	payload_types: dict[ActivityType, Any],
+	skipped_types: Collection[ActivityType] = (),
+) -> Any:
+	types_by_payload: dict[Any, list[ActivityType]] = {}
+	for activity_type, payload_type in payload_types.items():
+		types_by_payload.setdefault(payload_type, []).append(activity_type)
+	members = [
+		entry_type[Literal[tuple(types)], payload_type]  # type: ignore[index]
+		# MultipleActivities entries are never yielded themselves, only what's inside them
+		if ActivityType.MultipleActivities in types
+		else Annotated[entry_type[Literal[tuple(types)], payload_type], _AsActivity()]  # type: ignore[index]
+		for payload_type, types in types_by_payload.items()
+	]
+	if skipped_types:
+		members.append(_SkippedEntry[Literal[tuple(skipped_types)]])  # type: ignore[misc]
+	return Annotated[Union[tuple(members)], pydantic.Field(discriminator='type')]  # noqa: UP007 #Can't use | with a variable number of things
+
+
+class _ParsedActivityFeedPage(BaseModel):
+	"""ActivityFeedPage where every entry (including what's inside MultipleActivities) is parsed straight into an Activity all in one go, instead of parsing RawActivity and then going back and parsing each payload"""
+
+	entries: list[
+		_tagged_union(  # type: ignore[valid-type]
+			_FeedEntry,
+			{
+				**payload_models,
+				ActivityType.MultipleActivities: list[_tagged_union(_SubActivity, payload_models)],  # type: ignore[misc]
+			},
+		)
+	]
+	paginationToken: str | None
+
+
+@cache
+def _page_model(types: frozenset[ActivityType] | None) -> type[_ParsedActivityFeedPage]:
+	"""_ParsedActivityFeedPage that only parses the payloads of activities in types, and leaves the rest as _SkippedEntry"""
+	if types is None:
+		return _ParsedActivityFeedPage
+	unsupported = types - payload_models.keys() - {ActivityType.MultipleActivities}
+	if unsupported:
+		raise ValueError(f'Parsing these types of activities is not supported yet: {unsupported}')
+	wanted = {activity_type: model for activity_type, model in payload_models.items() if activity_type in types}
+	# MultipleActivities is always parsed, as it can have any of the wanted ones inside it
+	skipped = [
+		activity_type
+		for activity_type in ActivityType
+		if activity_type not in types and activity_type != ActivityType.MultipleActivities
+	]
+	subactivity_union = _tagged_union(_SubActivity, wanted, skipped)
+	entry_union = _tagged_union(
+		_FeedEntry, {**wanted, ActivityType.MultipleActivities: list[subactivity_union]}, skipped
+	)
+	return pydantic.create_model(
+		'_FilteredActivityFeedPage',
+		__base__=_ParsedActivityFeedPage,
+		entries=(list[entry_union], ...),
+	)
+
+
 def _get_activity_feed_page(
-	pagination_token: str | None = None, per_page: int = 50, *, friends: bool = False
-) -> ActivityFeedPage:
+	pagination_token: str | None = None,
+	per_page: int = 50,
+	*,
+	friends: bool = False,
+	types: frozenset[ActivityType] | None = None,
+) -> _ParsedActivityFeedPage:
 	feed_type = 'friends' if friends else 'private'
 	url = f'api/v4/feed/{feed_type}'
 	params: dict[str, str | int] = {'count': per_page}
@@ -172,7 +308,7 @@ def _get_activity_feed_page(
 		params['paginationToken'] = pagination_token
 	# Avoid caching the first page because that would be a bit silly
 	response = call_api(url, params, do_not_cache=pagination_token is None, needs_auth=True)
-	return ActivityFeedPage.model_validate_json(response)
+	return _page_model(types).model_validate_json(response)
 
 
 async def _get_activity_feed_page_async(
@@ -181,7 +317,8 @@ async def _get_activity_feed_page_async(
 	per_page: int = 50,
 	*,
 	friends: bool = False,
-) -> ActivityFeedPage:
+	types: frozenset[ActivityType] | None = None,
+) -> _ParsedActivityFeedPage:
 	feed_type = 'friends' if friends else 'private'
 	url = f'https://www.geoguessr.com/api/v4/feed/{feed_type}'
 	params: dict[str, str | int] = {'count': per_page}
@@ -189,81 +326,111 @@ async def _get_activity_feed_page_async(
 		params['paginationToken'] = pagination_token
 	# Avoid caching the first page because that would be a bit silly
 	response = await call_api_async(url, session, params, do_not_cache=pagination_token is None, needs_auth=True)
-	return ActivityFeedPage.model_validate_json(response)
-
-
-def _parse_activity(activity: ActivityWithoutUser, user: ActivityUser, *, from_json: bool = False):
-	model: type[pydantic.BaseModel]
-	if activity.type in {ActivityType.PlayedGame, ActivityType.PlayedQuickplayGame}:
-		model = PlayedGameActivity
-	elif activity.type == ActivityType.PlayedChallenge:
-		model = PlayedChallengeActivity
-	elif activity.type == ActivityType.CreatedMap:
-		model = CreatedMapActivity
-	elif activity.type == ActivityType.ObtainedBadge:
-		model = ObtainedBadgeActivity
-	elif activity.type == ActivityType.LikedMap:
-		model = LikedMapActivity
-	elif activity.type in {ActivityType.PlayedCompetitiveGame, ActivityType.PlayedCasualGame}:
-		model = PlayedCompetitiveActivity
-	elif activity.type == ActivityType.PlayedMultiplayer:
-		model = PlayedMultiplayerActivity
-	elif activity.type == ActivityType.PlayedInfinityGame:
-		model = InfinityGameActivity
-	elif activity.type == ActivityType.PlayedSinglePlayerQuiz:
-		model = PlayedQuizActivity
-	else:
-		raise ValueError('uh oh')
-	return Activity(
-		type=activity.type,
-		time=activity.time,
-		payload=model.model_validate_json(activity.payload)
-		if from_json
-		else model.model_validate(activity.payload),
-		user=user,
-	)
+	return _page_model(types).model_validate_json(response)
 
 
 activity_list_adapter = pydantic.TypeAdapter(list[ActivityWithoutUser])
 
 
-def iter_activity_feed(per_page: int = 50, *, friends: bool = False) -> Iterator[Activity]:
+def _iter_page_activities(
+	page: _ParsedActivityFeedPage, since: datetime | None = None, until: datetime | None = None
+) -> Iterator[Activity]:
+	for entry in page.entries:
+		if entry.type == ActivityType.MultipleActivities:
+			user = canonical(entry.user, entry.user.id)
+			for subentry in entry.payload:
+				if isinstance(subentry, Activity) and _in_window(subentry, since, until):
+					subentry.user = user
+					canonical_strings(subentry.payload)
+					yield subentry
+		elif isinstance(entry, Activity) and _in_window(entry, since, until):
+			entry.user = canonical(entry.user, entry.user.id)
+			canonical_strings(entry.payload)
+			yield entry
+
+
+def _in_window(activity: Activity, since: datetime | None, until: datetime | None) -> bool:
+	return (since is None or activity.time >= since) and (until is None or activity.time < until)
+
+
+def _as_aware(d: datetime | None) -> datetime | None:
+	# Activity times are always timezone aware, so it wouldn't be able to compare otherwise
+	return d.replace(tzinfo=UTC) if d and d.tzinfo is None else d
+
+
+def _next_token(page: _ParsedActivityFeedPage, since: datetime | None) -> str | None:
+	# Entries are newest first, so once they go past since, nothing after this page will be wanted
+	if since and any(entry.time < since for entry in page.entries):
+		return None
+	return page.paginationToken
+
+
+def iter_activity_feed(
+	per_page: int = 50,
+	*,
+	friends: bool = False,
+	types: Collection[ActivityType] | None = None,
+	since: datetime | None = None,
+	until: datetime | None = None,
+) -> Iterator[Activity]:
+	"""Yields every activity in the feed, newest first.
+
+	Arguments:
+		types: Only get these types of activity. The others are skipped without parsing their payloads
+		since: Only get activities at or after this time, and stop getting pages once it goes past this time. Naive datetimes are assumed to be UTC
+		until: Only get activities before this time"""
+	type_set = frozenset(types) if types is not None else None
+	since = _as_aware(since)
+	until = _as_aware(until)
 	pagination_token: str | None = None
 	while True:
-		page = _get_activity_feed_page(pagination_token, per_page, friends=friends)
-		for entry in page.entries:
-			if entry.type == ActivityType.MultipleActivities:
-				for subentry in activity_list_adapter.validate_json(entry.payload):
-					yield _parse_activity(subentry, entry.user)
-			else:
-				yield _parse_activity(entry, entry.user, from_json=True)
-		pagination_token = page.paginationToken
+		page = _get_activity_feed_page(pagination_token, per_page, friends=friends, types=type_set)
+		yield from _iter_page_activities(page, since, until)
+		pagination_token = _next_token(page, since)
 		if not pagination_token:
 			break
 
 
 async def iter_activity_feed_async(
-	per_page: int = 50, session: 'aiohttp.ClientSession | None' = None, *, friends: bool = False
+	per_page: int = 50,
+	session: 'aiohttp.ClientSession | None' = None,
+	*,
+	friends: bool = False,
+	lookahead: int = 1,
+	types: Collection[ActivityType] | None = None,
+	since: datetime | None = None,
+	until: datetime | None = None,
 ) -> AsyncIterator[Activity]:
-	pagination_token: str | None = None
+	"""Yields every activity in the feed, newest first.
+
+	Arguments:
+		lookahead: Number of pages to get in the background while the current one is being used, or 0 to only get each page once the previous one is finished with
+		types: Only get these types of activity. The others are skipped without parsing their payloads
+		since: Only get activities at or after this time, and stop getting pages once it goes past this time. Naive datetimes are assumed to be UTC
+		until: Only get activities before this time"""
 	if session is None:
 		async with get_default_async_session() as default_session:
 			async for activity in iter_activity_feed_async(
-				per_page, default_session, friends=friends
+				per_page,
+				default_session,
+				friends=friends,
+				lookahead=lookahead,
+				types=types,
+				since=since,
+				until=until,
 			):
 				yield activity
 		return
 
-	while True:
-		page = await _get_activity_feed_page_async(
-			session, pagination_token, per_page, friends=friends
+	type_set = frozenset(types) if types is not None else None
+	since = _as_aware(since)
+	until = _as_aware(until)
+
+	async def get_page(pagination_token: str | None) -> _ParsedActivityFeedPage:
+		return await _get_activity_feed_page_async(
+			session, pagination_token, per_page, friends=friends, types=type_set
 		)
-		for entry in page.entries:
-			if entry.type == ActivityType.MultipleActivities:
-				for subentry in activity_list_adapter.validate_json(entry.payload):
-					yield _parse_activity(subentry, entry.user)
-			else:
-				yield _parse_activity(entry, entry.user, from_json=True)
-		pagination_token = page.paginationToken
-		if not pagination_token:
-			break
+
+	async for page in iter_pages(get_page, lambda page: _next_token(page, since), lookahead):
+		for activity in _iter_page_activities(page, since, until):
+			yield activity
@@ -1,4 +1,4 @@
-from collections.abc import AsyncIterator, Sequence
+from collections.abc import AsyncIterator, Iterator, Sequence
 from datetime import datetime, timedelta
 from enum import IntEnum
 from typing import TYPE_CHECKING, Annotated, Literal
@@ -6,8 +6,13 @@ from typing import TYPE_CHECKING, Annotated, Literal
 import pydantic
 
 # ruff: noqa: TC001
+from pygeoguessr import settings
 from pygeoguessr.api import NotFoundError, call_api, call_api_async, get_default_async_session
+from pygeoguessr.entity_store import remember
+from pygeoguessr.identity_map import canonical, canonical_strings
+from pygeoguessr.lazy import Lazy, validate_lazy_json
 from pygeoguessr.models import User
+from pygeoguessr.pagination import iter_pages, iter_pages_in_thread
 from pygeoguessr.settings import BaseModel
 from pygeoguessr.types import (
 	ChallengeToken,
@@ -60,6 +65,14 @@ class ChallengeDetailsResponse(BaseModel):
 	map: Map
 	creator: User
 
+	@pydantic.model_validator(mode='after')
+	def _share_and_remember_map_and_creator(self) -> 'ChallengeDetailsResponse':
+		self.map = canonical(self.map, self.map.id)
+		self.creator = canonical(self.creator, self.creator.id)
+		remember(self.map, *{self.map.slug, self.map.id})
+		remember(self.creator, self.creator.id)
+		return self
+
 
 class DailyChallengeLeaderboardItem(BaseModel):
 	id: UserID
@@ -75,6 +88,11 @@ class DailyChallengeLeaderboardItem(BaseModel):
 	currentStreak: int
 	totalStepsCount: int
 
+	@pydantic.model_validator(mode='after')
+	def _share_strings(self) -> 'DailyChallengeLeaderboardItem':
+		canonical_strings(self)
+		return self
+
 
 class DailyChallengeInfo(BaseModel):
 	"""Return value of get_daily_challenge_for_today"""
@@ -100,7 +118,16 @@ class ChallengeHighscore(BaseModel):
 	isLeader: Literal[False]
 	pinUrl: str
 	"""pin/blah.png"""
-	game: Game
+	game: Annotated[Game | None, Lazy()]
+	"""None if the page was gotten with skip_lazy=True"""
+
+	@pydantic.model_validator(mode='after')
+	def _remember_game(self) -> 'ChallengeHighscore':
+		canonical_strings(self)
+		# Checked first, as accessing game would validate it
+		if settings.use_entity_store:
+			remember(self.game, self.gameToken)
+		return self
 
 
 class ChallengeHighscoresPage(BaseModel):
@@ -239,7 +266,10 @@ def get_challenge_highscore_page(
 	country_code: CountryCode | None = None,
 	*,
 	friends: bool = False,
-):
+	skip_lazy: bool = False,
+) -> ChallengeHighscoresPage:
+	"""Arguments:
+		skip_lazy: Leave out the game of each highscore, if you only need the scores etc"""
 	# limit can be up to 50, seems to be 25 by default but browser client uses 26?
 	params = {'friends': 'true' if friends else 'false', 'limit': limit}
 	if pagination_token:
@@ -250,13 +280,42 @@ def get_challenge_highscore_page(
 		if friends:
 			raise ValueError('Specifying country code is ineffective for friends=true')
 		params['countryCode'] = country_code.lower()
-	# TODO: synced paginate (whatever)
-
-	return ChallengeHighscoresPage.model_validate_json(
-		call_api(f'api/v3/results/highscores/{challenge_token}', params, needs_auth=True)
+	return validate_lazy_json(
+		ChallengeHighscoresPage,
+		call_api(f'api/v3/results/highscores/{challenge_token}', params, needs_auth=True),
+		skip_lazy=skip_lazy,
 	)
 
 
+def iter_challenge_highscores(
+	challenge_token: ChallengeToken,
+	min_rounds: int | None = 5,
+	country_code: CountryCode | None = None,
+	*,
+	friends: bool = True,
+	lookahead: int = 1,
+	skip_lazy: bool = False,
+) -> Iterator[ChallengeHighscore]:
+	"""Seems to raise 401 errors if you haven't played the challenge yet? Which is odd, but it also has done that at times if you spam the API too much… hrm
+
+	Arguments:
+		lookahead: Number of pages to get in a background thread while the current one is being used, or 0 to only get each page once the previous one is finished with
+		skip_lazy: Leave out the game of each highscore, if you only need the scores etc"""
+
+	def get_page(pagination_token: str | None) -> ChallengeHighscoresPage:
+		return get_challenge_highscore_page(
+			challenge_token,
+			pagination_token=pagination_token,
+			min_rounds=min_rounds,
+			country_code=country_code,
+			friends=friends,
+			skip_lazy=skip_lazy,
+		)
+
+	for page in iter_pages_in_thread(get_page, lambda page: page.paginationToken, lookahead):
+		yield from page.items
+
+
 async def _get_challenge_highscore_page_async(
 	session: 'aiohttp.ClientSession',
 	challenge_token: ChallengeToken,
@@ -266,6 +325,7 @@ async def _get_challenge_highscore_page_async(
 	country_code: CountryCode | None = None,
 	*,
 	friends: bool = False,
+	skip_lazy: bool = False,
 ) -> ChallengeHighscoresPage:
 	# The pagination won't work if you have different sessions, e.g. using the default async session every time
 	# limit can be up to 50, seems to be 25 by default but browser client uses 26?
@@ -279,10 +339,12 @@ async def _get_challenge_highscore_page_async(
 			raise ValueError('Specifying country code is ineffective for friends=true')
 		params['countryCode'] = country_code.lower()
 
-	return ChallengeHighscoresPage.model_validate_json(
+	return validate_lazy_json(
+		ChallengeHighscoresPage,
 		await call_api_async(
 			f'api/v3/results/highscores/{challenge_token}', session, params, needs_auth=True
-		)
+		),
+		skip_lazy=skip_lazy,
 	)
 
 
@@ -293,31 +355,42 @@ async def iter_challenge_highscores_async(
 	session: 'aiohttp.ClientSession | None' = None,
 	*,
 	friends: bool = True,
+	lookahead: int = 1,
+	skip_lazy: bool = False,
 ) -> AsyncIterator[ChallengeHighscore]:
-	"""Seems to raise 401 errors if you haven't played the challenge yet? Which is odd, but it also has done that at times if you spam the API too much… hrm"""
+	"""Seems to raise 401 errors if you haven't played the challenge yet? Which is odd, but it also has done that at times if you spam the API too much… hrm
+
+	Arguments:
+		lookahead: Number of pages to get in the background while the current one is being used, or 0 to only get each page once the previous one is finished with
+		skip_lazy: Leave out the game of each highscore, if you only need the scores etc"""
 	if session is None:
 		async with get_default_async_session() as default_session:
 			async for high_score in iter_challenge_highscores_async(
-				challenge_token, min_rounds, country_code, default_session, friends=friends
+				challenge_token,
+				min_rounds,
+				country_code,
+				default_session,
+				friends=friends,
+				lookahead=lookahead,
+				skip_lazy=skip_lazy,
 			):
 				yield high_score
 		return
 
-	pagination_token = None
-	while True:
-		page = await _get_challenge_highscore_page_async(
+	async def get_page(pagination_token: str | None) -> ChallengeHighscoresPage:
+		return await _get_challenge_highscore_page_async(
 			session,
 			challenge_token,
 			pagination_token=pagination_token,
 			min_rounds=min_rounds,
 			country_code=country_code,
 			friends=friends,
+			skip_lazy=skip_lazy,
 		)
+
+	async for page in iter_pages(get_page, lambda page: page.paginationToken, lookahead):
 		for high_score in page.items:
 			yield high_score
-		if not page.paginationToken:
-			break
-		pagination_token = page.paginationToken
 
 
 # TODO: api/v3/results/highscores/{token}/round can get you per-round scores if you want that
@@ -6,6 +6,7 @@ from typing import TYPE_CHECKING, Annotated, Literal
 import pydantic
 
 from pygeoguessr.api import call_api, call_api_async
+from pygeoguessr.entity_store import lookup
 from pygeoguessr.models import MapBounds, ProgressChange, UserPin
 from pygeoguessr.settings import BaseModel
 from pygeoguessr.types import (
@@ -153,10 +154,16 @@ class Game(BaseModel):
 
 
 def get_game_details(game: GameToken) -> Game:
+	game_details = lookup(Game, game)
+	if game_details:
+		return game_details
 	return Game.model_validate_json(call_api(f'api/v3/games/{game}'))
 
 
 async def get_game_details_async(
 	game: GameToken, session: 'aiohttp.ClientSession | None' = None
 ) -> Game:
+	game_details = lookup(Game, game)
+	if game_details:
+		return game_details
 	return Game.model_validate_json(await call_api_async(f'api/v3/games/{game}', session))
@@ -5,6 +5,7 @@ import pydantic
 
 # ruff: noqa: TC001
 from pygeoguessr.api import call_api, call_api_async
+from pygeoguessr.entity_store import lookup
 from pygeoguessr.models import Map, MapImages
 from pygeoguessr.settings import BaseModel
 from pygeoguessr.types import CountryCode, MapSlug
@@ -32,6 +33,9 @@ def get_map_details(map_slug: MapSlug) -> Map:
 	Returns:
 		Map
 	"""
+	map_details = lookup(Map, map_slug)
+	if map_details:
+		return map_details
 	return Map.model_validate_json(call_api(f'api/maps/{map_slug}'))
 
 
@@ -44,6 +48,9 @@ async def get_map_details_async(
 	Returns:
 		Map
 	"""
+	map_details = lookup(Map, map_slug)
+	if map_details:
+		return map_details
 	return Map.model_validate_json(await call_api_async(f'api/maps/{map_slug}', session))
 
 
@@ -6,6 +6,7 @@ from typing import TYPE_CHECKING, Annotated, Any, Literal
 import pydantic
 
 from pygeoguessr.api import call_api, call_api_async
+from pygeoguessr.lazy import Lazy, validate_lazy_json
 from pygeoguessr.models import LatLng, MapBounds, ProgressChange
 from pygeoguessr.settings import BaseModel
 from pygeoguessr.types import (
@@ -41,7 +42,8 @@ class DuelPlayer(BaseModel):
 	rating: int
 	"""This seems to always be 700 for the player?"""
 	countryCode: CountryCode
-	progressChange: ProgressChange | None
+	progressChange: Annotated[ProgressChange | None, Lazy()]
+	"""Also None if the duel was gotten with skip_lazy=True"""
 	pin: LatLng | None
 	"""Often null but sometimes this is in Alcatraz? Not sure what this is for"""
 	helpRequested: bool
@@ -191,17 +193,25 @@ class Duel(BaseModel):
 	gameServerNodeId: str | None
 
 
-def get_duel_details(lobby: LobbyToken) -> Duel:
-	return Duel.model_validate_json(
-		call_api(f'https://game-server.geoguessr.com/api/duels/{lobby}', needs_auth=True)
+def get_duel_details(lobby: LobbyToken, *, skip_lazy: bool = False) -> Duel:
+	"""Arguments:
+		skip_lazy: Leave out the progressChange of each player"""
+	return validate_lazy_json(
+		Duel,
+		call_api(f'https://game-server.geoguessr.com/api/duels/{lobby}', needs_auth=True),
+		skip_lazy=skip_lazy,
 	)
 
 
 async def get_duel_details_async(
-	lobby: LobbyToken, session: 'aiohttp.ClientSession | None' = None
+	lobby: LobbyToken, session: 'aiohttp.ClientSession | None' = None, *, skip_lazy: bool = False
 ) -> Duel:
-	return Duel.model_validate_json(
+	"""Arguments:
+		skip_lazy: Leave out the progressChange of each player"""
+	return validate_lazy_json(
+		Duel,
 		await call_api_async(
 			f'https://game-server.geoguessr.com/api/duels/{lobby}', session, needs_auth=True
-		)
+		),
+		skip_lazy=skip_lazy,
 	)
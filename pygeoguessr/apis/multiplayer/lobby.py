@@ -5,6 +5,7 @@ from typing import TYPE_CHECKING, Annotated, Literal
 import pydantic
 
 from pygeoguessr.api import call_api, call_api_async
+from pygeoguessr.lazy import Lazy, validate_lazy_json
 from pygeoguessr.settings import BaseModel
 from pygeoguessr.types import CompetitiveGameMode, LobbyToken, MapSlug, PartyID, QuizID, UserID
 from pygeoguessr.utils import x_or_none
@@ -35,7 +36,8 @@ class BaseLobby(BaseModel):
 	numOpenSpots: int
 	minPlayersRequired: int
 	playerIds: list[UserID]
-	players: list[Player]
+	players: Annotated[list[Player] | None, Lazy()]
+	"""None if the lobby was gotten with skip_lazy=True"""
 	visibility: Literal['Public', 'Private']
 	closingTime: datetime | None
 	timestamp: datetime
@@ -155,15 +157,23 @@ Lobby = Annotated[
 LobbyAdapter = pydantic.TypeAdapter(Lobby)
 
 
-def get_lobby_details(lobby: LobbyToken) -> Lobby:
-	return LobbyAdapter.validate_json(
-		call_api(f'https://game-server.geoguessr.com/api/lobby/{lobby}')
+def get_lobby_details(lobby: LobbyToken, *, skip_lazy: bool = False) -> Lobby:
+	"""Arguments:
+		skip_lazy: Leave out players (playerIds is still there)"""
+	return validate_lazy_json(
+		LobbyAdapter,
+		call_api(f'https://game-server.geoguessr.com/api/lobby/{lobby}'),
+		skip_lazy=skip_lazy,
 	)
 
 
 async def get_lobby_details_async(
-	lobby: LobbyToken, session: 'aiohttp.ClientSession | None' = None
+	lobby: LobbyToken, session: 'aiohttp.ClientSession | None' = None, *, skip_lazy: bool = False
 ) -> Lobby:
-	return LobbyAdapter.validate_json(
-		await call_api_async(f'https://game-server.geoguessr.com/api/lobby/{lobby}', session)
+	"""Arguments:
+		skip_lazy: Leave out players (playerIds is still there)"""
+	return validate_lazy_json(
+		LobbyAdapter,
+		await call_api_async(f'https://game-server.geoguessr.com/api/lobby/{lobby}', session),
+		skip_lazy=skip_lazy,
 	)
@@ -1,6 +1,7 @@
 from typing import TYPE_CHECKING
 
 from pygeoguessr.api import call_api, call_api_async
+from pygeoguessr.entity_store import lookup
 from pygeoguessr.models import User
 
 if TYPE_CHECKING:
@@ -10,10 +11,16 @@ if TYPE_CHECKING:
 
 
 def get_user(user_id: 'UserID') -> User:
+	user = lookup(User, user_id)
+	if user:
+		return user
 	return User.model_validate_json(call_api(f'https://www.geoguessr.com/api/v3/users/{user_id}'))
 
 
 async def get_user_async(user_id: 'UserID', session: 'aiohttp.ClientSession | None' = None) -> User:
+	user = lookup(User, user_id)
+	if user:
+		return user
 	return User.model_validate_json(
 		await call_api_async(f'https://www.geoguessr.com/api/v3/users/{user_id}', session)
 	)
@@ -0,0 +1,92 @@
+"""Keeping the slow parts of the async cache (unpickling big responses, mostly) off the event loop"""
+
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, TypeVar
+
+from aiohttp_client_cache import FileBackend
+from aiohttp_client_cache.backends.base import ResponseOrKey
+from aiohttp_client_cache.backends.filesystem import FileCache
+
+T = TypeVar('T')
+
+
+class CacheIOExecutor:
+	"""Runs functions in an executor, but only lets max_pending of them be queued up at once, so a flood of cache hits waits its turn instead of piling up in the executor"""
+
+	def __init__(self, executor: Executor | None = None, max_workers: int = 4, max_pending: int = 64):
+		self.max_workers = max_workers
+		self._owns_executor = executor is None
+		self.executor = executor or self._new_executor()
+		self.max_pending = max_pending
+		self._shut_down = False
+		self._semaphore: asyncio.Semaphore | None = None
+		self._loop: asyncio.AbstractEventLoop | None = None
+
+	def _new_executor(self) -> Executor:
+		return ThreadPoolExecutor(self.max_workers, thread_name_prefix='pygeoguessr-cache')
+
+	async def run(self, func: Callable[..., T], *args: Any) -> T:
+		loop = asyncio.get_running_loop()
+		if self._shut_down:
+			# The cache is being used again after being closed
+			self.executor = self._new_executor()
+			self._shut_down = False
+		if self._semaphore is None or self._loop is not loop:
+			# Created here and not in __init__ so it belongs to whatever event loop is running, as the cache can outlive one
+			self._semaphore = asyncio.Semaphore(self.max_pending)
+			self._loop = loop
+		async with self._semaphore:
+			return await loop.run_in_executor(self.executor, func, *args)
+
+	def shutdown(self):
+		"""Stops the executor's threads, if it was created here and not passed in. Called when closing the cache"""
+		if self._owns_executor:
+			self.executor.shutdown(wait=False)
+			self._shut_down = True
+
+
+class _OffloadedFileCache(FileCache):
+	def __init__(self, cache_name, use_temp: bool = False, *, io: CacheIOExecutor, **kwargs: Any):  # noqa: FBT001, FBT002
+		super().__init__(cache_name, use_temp, **kwargs)
+		self.io = io
+
+	def _read_file(self, key: str) -> ResponseOrKey:
+		try:
+			with open(self._join(key), 'rb') as f:  # noqa: PTH123
+				return self.deserialize(f.read())
+		except FileNotFoundError:
+			return None
+
+	def _write_file(self, key: str, value: ResponseOrKey):
+		with open(self._join(key), 'wb') as f:  # noqa: PTH123
+			f.write(self.serialize(value) or b'')
+
+	async def read(self, key: str) -> ResponseOrKey:
+		with self._try_io(ignore_errors=False):
+			return await self.io.run(self._read_file, key)
+
+	async def write(self, key: str, value: ResponseOrKey):
+		with self._try_io(ignore_errors=False):
+			await self.io.run(self._write_file, key, value)
+
+
+class OffloadedFileBackend(FileBackend):
+	"""Like aiohttp_client_cache FileBackend, but reads, unpickles, pickles and writes each response in an executor instead of unpickling on the event loop"""
+
+	def __init__(
+		self,
+		cache_name: str = 'http_cache',
+		use_temp: bool = False,  # noqa: FBT001, FBT002 #It's how aiohttp_client_cache works
+		autoclose: bool = True,  # noqa: FBT001, FBT002
+		io: CacheIOExecutor | None = None,
+		**kwargs: Any,
+	):
+		super().__init__(cache_name, use_temp, autoclose, **kwargs)
+		self.io = io or CacheIOExecutor()
+		self.responses = _OffloadedFileCache(cache_name, use_temp=use_temp, io=self.io, **kwargs)
+
+	async def close(self):
+		await super().close()
+		self.io.shutdown()
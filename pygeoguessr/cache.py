@@ -0,0 +1,213 @@
+"""Looking at what's in the cache: how big it is, which endpoints it's full of, how often it actually gets used, and what's about to expire"""
+
+import pickle
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from fnmatch import fnmatchcase
+from typing import TYPE_CHECKING, Literal
+
+from requests_cache.serializers import json_serializer
+
+from .api import _get_async_cache, _get_cache, cache_hits, cache_misses
+from .endpoints import endpoint_template, url_path
+
+if TYPE_CHECKING:
+	from collections.abc import Iterator
+	from pathlib import Path
+
+	from .filesystem_cache_with_dirs import FileCacheWithDirectories
+	from .sqlite_cache_with_index import SQLiteBackendWithIndex
+
+age_buckets = (
+	timedelta(hours=1),
+	timedelta(days=1),
+	timedelta(weeks=1),
+	timedelta(days=30),
+	timedelta(days=365),
+)
+"""Upper bounds of each bucket in EndpointCacheStats.age_histogram, which has one more bucket at the end for anything older than the last one"""
+
+
+def _as_utc(d: datetime) -> datetime:
+	# The caches use naive datetimes that are actually UTC
+	return d if d.tzinfo else d.replace(tzinfo=UTC)
+
+
+@dataclass
+class EndpointCacheStats:
+	"""Stats for all cached responses from one endpoint"""
+
+	template: str
+	"""See endpoints.endpoint_template"""
+	count: int = 0
+	size: int = 0
+	"""Total size in bytes"""
+	age_histogram: list[int] = field(default_factory=lambda: [0] * (len(age_buckets) + 1))
+	"""Number of responses by age, see age_buckets"""
+	oldest: datetime | None = None
+	newest: datetime | None = None
+	expired: int = 0
+	expiring_soon: int = 0
+	"""Not expired yet, but will be within the expiring_within argument"""
+	hits: int = 0
+	"""Number of times call_api/call_api_async got a response from this endpoint out of the cache, since the program started"""
+	misses: int = 0
+
+	@property
+	def hit_ratio(self) -> float | None:
+		"""None if nothing has been requested from this endpoint yet"""
+		total = self.hits + self.misses
+		return self.hits / total if total else None
+
+	def _add(
+		self,
+		size: int,
+		created: datetime,
+		expires: datetime | None,
+		now: datetime,
+		expiring_within: timedelta,
+	):
+		self.count += 1
+		self.size += size
+		age = now - created
+		bucket = next((i for i, bound in enumerate(age_buckets) if age < bound), len(age_buckets))
+		self.age_histogram[bucket] += 1
+		if self.oldest is None or created < self.oldest:
+			self.oldest = created
+		if self.newest is None or created > self.newest:
+			self.newest = created
+		if expires is not None:
+			if expires <= now:
+				self.expired += 1
+			elif expires - now <= expiring_within:
+				self.expiring_soon += 1
+
+
+def _stats_with_hit_counts(stats: dict[str, EndpointCacheStats]) -> dict[str, EndpointCacheStats]:
+	for template in cache_hits.keys() | cache_misses.keys():
+		endpoint_stats = stats.setdefault(template, EndpointCacheStats(template))
+		endpoint_stats.hits = cache_hits[template]
+		endpoint_stats.misses = cache_misses[template]
+	return stats
+
+
+def reset_hit_counts():
+	cache_hits.clear()
+	cache_misses.clear()
+
+
+def _iter_file_cache_keys(cache: 'FileCacheWithDirectories') -> 'Iterator[tuple[str, Path]]':
+	extension = cache.responses.extension
+	for path in cache.paths():
+		yield path.relative_to(cache.cache_dir).as_posix().removesuffix(extension), path
+
+
+def _response_body(kind: Literal['file', 'sqlite'], raw: bytes) -> bytes:
+	"""Gets the body out of a response as it is stored in either the sync cache (JSON) or the async cache (pickled CachedResponse)"""
+	if kind == 'sqlite':
+		return pickle.loads(raw)._body  # noqa: S301 #It's our own cache
+	return json_serializer.loads(raw).content
+
+
+def get_cache_stats(
+	cache: 'FileCacheWithDirectories | None' = None,
+	expiring_within: timedelta = timedelta(days=1),
+	*,
+	check_expiry: bool = False,
+) -> dict[str, EndpointCacheStats]:
+	"""Gets stats for the sync cache, grouped by endpoint. Ages are from the file modification times.
+
+	Arguments:
+		cache: Defaults to the cache used by call_api
+		expiring_within: What counts as "about to expire"
+		check_expiry: Also count expired and soon to be expired responses. This has to read every file, so it is off by default
+
+	Returns:
+		{endpoint template: EndpointCacheStats}
+	"""
+	if cache is None:
+		cache = _get_cache()
+	now = datetime.now(UTC)
+	stats: dict[str, EndpointCacheStats] = {}
+	for key, path in _iter_file_cache_keys(cache):
+		template = endpoint_template(key)
+		stat = path.stat()
+		expires = None
+		if check_expiry:
+			try:
+				expires = cache.responses[key].expires
+			except KeyError:
+				# Deleted in the meantime, or not readable
+				continue
+		stats.setdefault(template, EndpointCacheStats(template))._add(
+			stat.st_size,
+			datetime.fromtimestamp(stat.st_mtime, UTC),
+			_as_utc(expires) if expires else None,
+			now,
+			expiring_within,
+		)
+	return _stats_with_hit_counts(stats)
+
+
+async def get_async_cache_stats(
+	cache: 'SQLiteBackendWithIndex | None' = None,
+	expiring_within: timedelta = timedelta(days=1),
+) -> dict[str, EndpointCacheStats]:
+	"""Gets stats for the async cache, grouped by endpoint. This only looks at the index, so it is fast even for a big cache, except for the first time if the index needs to be built.
+
+	Arguments:
+		cache: Defaults to the cache used by get_default_async_session
+		expiring_within: What counts as "about to expire"
+
+	Returns:
+		{endpoint template: EndpointCacheStats}
+	"""
+	if cache is None:
+		cache = _get_async_cache()
+	if await cache.index.size() < await cache.responses.size():
+		await cache.rebuild_index()
+	now = datetime.now(UTC)
+	stats: dict[str, EndpointCacheStats] = {}
+	async for _, template, size, created, expires in cache.index.rows():
+		stats.setdefault(template, EndpointCacheStats(template))._add(
+			size,
+			datetime.fromtimestamp(created, UTC),
+			None if expires is None else datetime.fromtimestamp(expires, UTC),
+			now,
+			expiring_within,
+		)
+	return _stats_with_hit_counts(stats)
+
+
+def delete_matching(pattern: str, cache: 'FileCacheWithDirectories | None' = None) -> int:
+	"""Deletes everything from the sync cache where the URL path matches a glob pattern (e.g. api/v3/games/*), without reading any of it.
+
+	Returns:
+		Number of responses deleted"""
+	if cache is None:
+		cache = _get_cache()
+	pattern = pattern.strip('/')
+	keys = [key for key, _ in _iter_file_cache_keys(cache) if fnmatchcase(url_path(key), pattern)]
+	for key in keys:
+		try:
+			del cache.responses[key]
+		except KeyError:
+			pass
+	return len(keys)
+
+
+async def delete_matching_async(
+	pattern: str, cache: 'SQLiteBackendWithIndex | None' = None
+) -> int:
+	"""Deletes everything from the async cache where the URL path matches a glob pattern (e.g. api/v3/games/*), using the index instead of reading any of it.
+
+	Returns:
+		Number of responses deleted"""
+	if cache is None:
+		cache = _get_async_cache()
+	if await cache.index.size() < await cache.responses.size():
+		await cache.rebuild_index()
+	keys = {key async for key in cache.index.keys_matching(pattern)}
+	if keys:
+		await cache.bulk_delete(keys)
+	return len(keys)
@@ -0,0 +1,290 @@
+"""Local archive of daily challenges and their leaderboards, for keeping them around longer than the week that get_daily_challenges_for_this_week returns, without storing the same scores over and over again"""
+
+import sqlite3
+from collections.abc import Iterable
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+
+from pygeoguessr.apis.challenges import (
+	DailyChallengeInfo,
+	get_daily_challenges_for_this_week,
+	get_daily_challenges_for_this_week_async,
+)
+
+if TYPE_CHECKING:
+	import aiohttp
+
+	from pygeoguessr.types import ChallengeToken, CountryCode, UserID
+
+_schema = """
+CREATE TABLE IF NOT EXISTS challenges (
+	date TEXT PRIMARY KEY,
+	token TEXT NOT NULL,
+	participants INTEGER NOT NULL,
+	picked_winner INTEGER NOT NULL,
+	description TEXT,
+	first_seen REAL NOT NULL,
+	last_seen REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS scores (
+	date TEXT NOT NULL,
+	user_id TEXT NOT NULL,
+	nick TEXT NOT NULL,
+	pin_url TEXT NOT NULL,
+	total_score INTEGER NOT NULL,
+	total_time REAL NOT NULL,
+	total_distance REAL NOT NULL,
+	is_on_leaderboard INTEGER NOT NULL,
+	is_verified INTEGER NOT NULL,
+	flair INTEGER NOT NULL,
+	country_code TEXT NOT NULL,
+	current_streak INTEGER NOT NULL,
+	total_steps_count INTEGER NOT NULL,
+	in_leaderboard INTEGER NOT NULL,
+	in_friends INTEGER NOT NULL,
+	in_country INTEGER NOT NULL,
+	PRIMARY KEY (date, user_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS scores_by_user ON scores (user_id, date);
+CREATE INDEX IF NOT EXISTS friend_scores_by_date ON scores (date) WHERE in_friends;
+"""
+
+# Only which lists the user has been seen in changes after the first time, everything else stays as it was first seen
+_insert_score = """
+INSERT INTO scores VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (date, user_id) DO UPDATE SET
+	in_leaderboard = in_leaderboard OR excluded.in_leaderboard,
+	in_friends = in_friends OR excluded.in_friends,
+	in_country = in_country OR excluded.in_country
+"""
+
+_insert_challenge = """
+INSERT INTO challenges VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (date) DO UPDATE SET
+	participants = max(participants, excluded.participants),
+	picked_winner = excluded.picked_winner,
+	last_seen = excluded.last_seen
+"""
+
+_score_columns = 'date, user_id, nick, pin_url, total_score, total_time, total_distance, is_on_leaderboard, is_verified, flair, country_code, current_streak, total_steps_count, in_leaderboard, in_friends, in_country'
+
+
+class ArchivedChallenge(NamedTuple):
+	date: date
+	"""UTC"""
+	token: 'ChallengeToken'
+	participants: int
+	"""Most participants seen for it"""
+	picked_winner: bool
+	description: str | None
+
+
+class ArchivedScore(NamedTuple):
+	"""One user's result on one daily challenge, which is a DailyChallengeLeaderboardItem along with the date and which lists it was seen in"""
+
+	date: date
+	user_id: 'UserID'
+	nick: str
+	pin_url: str
+	total_score: int
+	total_time: timedelta
+	total_distance: float
+	"""Metres"""
+	is_on_leaderboard: bool
+	is_verified: bool
+	flair: int
+	country_code: 'CountryCode'
+	current_streak: int
+	total_steps_count: int
+	in_leaderboard: bool
+	in_friends: bool
+	"""Was in the friends leaderboard, i.e. a friend of whoever was logged in when it was archived (or that user themselves)"""
+	in_country: bool
+
+	@classmethod
+	def _from_row(cls, row: tuple) -> 'ArchivedScore':
+		(
+			day,
+			user_id,
+			nick,
+			pin_url,
+			total_score,
+			total_time,
+			total_distance,
+			is_on_leaderboard,
+			is_verified,
+			flair,
+			country_code,
+			current_streak,
+			total_steps_count,
+			in_leaderboard,
+			in_friends,
+			in_country,
+		) = row
+		return cls(
+			date.fromisoformat(day),
+			user_id,
+			nick,
+			pin_url,
+			total_score,
+			timedelta(seconds=total_time),
+			total_distance,
+			bool(is_on_leaderboard),
+			bool(is_verified),
+			flair,
+			country_code,
+			current_streak,
+			total_steps_count,
+			bool(in_leaderboard),
+			bool(in_friends),
+			bool(in_country),
+		)
+
+
+def _date_range(since: date | None, until: date | None) -> tuple[str, list[str]]:
+	conditions = []
+	params = []
+	if since:
+		conditions.append('date >= ?')
+		params.append(since.isoformat())
+	if until:
+		conditions.append('date <= ?')
+		params.append(until.isoformat())
+	return ''.join(f' AND {condition}' for condition in conditions), params
+
+
+class DailyChallengeArchive:
+	"""SQLite database of daily challenges and their leaderboards, where each user's score is stored once per day no matter how many lists (leaderboard, friends, country) or how many days' worth of get_daily_challenges_for_this_week it is in. Nothing is ever deleted from it.
+
+	Can be used as a context manager to close it afterwards"""
+
+	def __init__(self, path: Path | str):
+		self.path = Path(path)
+		self._connection = sqlite3.connect(self.path)
+		self._connection.execute('PRAGMA journal_mode=WAL')
+		self._connection.executescript(_schema)
+
+	def close(self):
+		self._connection.close()
+
+	def __enter__(self) -> 'DailyChallengeArchive':
+		return self
+
+	def __exit__(self, *_):
+		self.close()
+
+	def ingest(self, challenges: Iterable[DailyChallengeInfo]) -> int:
+		"""Adds daily challenges to the archive, e.g. from get_daily_challenges_for_this_week
+
+		Returns:
+			Number of scores that weren't in the archive before"""
+		now = datetime.now().timestamp()
+		with self._connection:
+			scores_before = self._count_scores()
+			for challenge in challenges:
+				day = challenge.date.date().isoformat()
+				self._connection.execute(
+					_insert_challenge,
+					(
+						day,
+						challenge.token,
+						challenge.participants,
+						challenge.pickedWinner,
+						challenge.description,
+						now,
+						now,
+					),
+				)
+				# Merged here first, so each user is only inserted once for each challenge
+				rows: dict[str, tuple] = {}
+				membership: dict[str, list[bool]] = {}
+				for index, items in enumerate(
+					(challenge.leaderboard, challenge.friends or (), challenge.country)
+				):
+					for item in items:
+						if item.id not in rows:
+							rows[item.id] = (
+								day,
+								item.id,
+								item.nick,
+								item.pinUrl,
+								item.totalScore,
+								item.totalTime.total_seconds(),
+								item.totalDistance,
+								item.isOnLeaderboard,
+								item.isVerified,
+								item.flair,
+								item.countryCode,
+								item.currentStreak,
+								item.totalStepsCount,
+							)
+							membership[item.id] = [False, False, False]
+						membership[item.id][index] = True
+				self._connection.executemany(
+					_insert_score,
+					(row + tuple(membership[user_id]) for user_id, row in rows.items()),
+				)
+			return self._count_scores() - scores_before
+
+	def _count_scores(self) -> int:
+		return self._connection.execute('SELECT count(*) FROM scores').fetchone()[0]
+
+	def update(self) -> int:
+		"""Gets the daily challenges for this week and adds them
+
+		Returns:
+			Number of new scores"""
+		return self.ingest(get_daily_challenges_for_this_week())
+
+	async def update_async(self, session: 'aiohttp.ClientSession | None' = None) -> int:
+		"""Gets the daily challenges for this week and adds them
+
+		Returns:
+			Number of new scores"""
+		return self.ingest(await get_daily_challenges_for_this_week_async(session))
+
+	def challenges(
+		self, since: date | None = None, until: date | None = None
+	) -> list[ArchivedChallenge]:
+		"""Daily challenges in the archive between since and until (inclusive), oldest first"""
+		conditions, params = _date_range(since, until)
+		rows = self._connection.execute(
+			f'SELECT date, token, participants, picked_winner, description FROM challenges WHERE 1{conditions} ORDER BY date',  # noqa: S608 #Only the conditions are put in there
+			params,
+		)
+		return [
+			ArchivedChallenge(date.fromisoformat(day), token, participants, bool(picked), description)
+			for day, token, participants, picked, description in rows
+		]
+
+	def scores_for_date(self, day: date, *, friends_only: bool = False) -> list[ArchivedScore]:
+		"""Every archived score for one daily challenge, highest first"""
+		friends = ' AND in_friends' if friends_only else ''
+		rows = self._connection.execute(
+			f'SELECT {_score_columns} FROM scores WHERE date = ?{friends} ORDER BY total_score DESC, total_time',  # noqa: S608
+			(day.isoformat(),),
+		)
+		return [ArchivedScore._from_row(row) for row in rows]
+
+	def user_scores(
+		self, user_id: 'UserID', since: date | None = None, until: date | None = None
+	) -> list[ArchivedScore]:
+		"""Scores for one user between since and until (inclusive), oldest first. Only includes days where they were on one of the lists that were archived"""
+		conditions, params = _date_range(since, until)
+		rows = self._connection.execute(
+			f'SELECT {_score_columns} FROM scores WHERE user_id = ?{conditions} ORDER BY date',  # noqa: S608
+			(user_id, *params),
+		)
+		return [ArchivedScore._from_row(row) for row in rows]
+
+	def friend_scores(
+		self, since: date | None = None, until: date | None = None
+	) -> list[ArchivedScore]:
+		"""Scores from the friends leaderboard between since and until (inclusive), oldest first and then highest first"""
+		conditions, params = _date_range(since, until)
+		rows = self._connection.execute(
+			f'SELECT {_score_columns} FROM scores WHERE in_friends{conditions} ORDER BY date, total_score DESC, total_time',  # noqa: S608
+			params,
+		)
+		return [ArchivedScore._from_row(row) for row in rows]
@@ -0,0 +1,330 @@
+"""Rounds, players and guesses from lots of duels as NumPy arrays, for analysing them all at once instead of going through each Duel object, like GameBatch is for games"""
+
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, fields
+from datetime import datetime
+
+import numpy as np
+
+from pygeoguessr.apis.multiplayer.duels import Duel
+from pygeoguessr.lite import LiteDuel, LiteDuelRound
+
+_nat = np.iinfo(np.int64).min
+"""What NaT is as int64"""
+
+
+def _ms(value: datetime | float | None) -> int:
+	"""Milliseconds since the epoch of a datetime (from Duel) or Unix timestamp (from LiteDuel)"""
+	if value is None:
+		return _nat
+	if isinstance(value, datetime):
+		value = value.timestamp()
+	return int(value * 1000)
+
+
+def _datetimes(values: list[int]) -> np.ndarray:
+	return np.array(values, dtype=np.int64).view('datetime64[ms]')
+
+
+@dataclass(frozen=True)
+class DuelBatch:
+	"""Each round that both teams have a result for (so not the current round of an unfinished duel) is one element of each of the per-round arrays, in the same order as the duels and then rounds were in. Per-team arrays are (number of rounds, 2), in the same order as Duel.teams.
+
+	Rounds for duel i are round_arrays[round_offsets[i]:round_offsets[i + 1]]. Players and guesses point to rows of the other tables with player_duel_index, guess_round and guess_player"""
+
+	game_ids: list[str]
+	"""gameId of each duel"""
+	round_offsets: np.ndarray
+	"""int64, length is number of duels + 1"""
+	game_mode: np.ndarray
+	"""str (CompetitiveGameMode value), for each duel"""
+	map_slug: np.ndarray
+	"""str, for each duel"""
+	initial_health: np.ndarray
+	"""int32, for each duel"""
+	max_error_distance: np.ndarray
+	"""float64, of each duel's map, nan if that isn't there"""
+	rated: np.ndarray
+	"""bool, for each duel"""
+	team_ids: np.ndarray
+	"""str, (number of duels, 2)"""
+	winner: np.ndarray
+	"""int8, index of the winning team of each duel, or -1 if it was a draw or is not finished"""
+
+	duel_index: np.ndarray
+	"""int32, index into game_ids of the duel for each round"""
+	round_number: np.ndarray
+	"""int32, starts at 1"""
+	lat: np.ndarray
+	"""float64, of the panorama"""
+	lng: np.ndarray
+	"""float64, of the panorama"""
+	country: np.ndarray
+	"""str, countryCode of the panorama, or an empty string if that isn't there"""
+	multiplier: np.ndarray
+	"""float64"""
+	damage_multiplier: np.ndarray
+	"""float64"""
+	healing: np.ndarray
+	"""bool, isHealingRound"""
+	start_time: np.ndarray
+	"""datetime64[ms] (UTC), NaT if not there"""
+	end_time: np.ndarray
+	"""datetime64[ms] (UTC), NaT if not there"""
+	timer_start_time: np.ndarray
+	"""datetime64[ms] (UTC) of when the countdown started after the first guess, NaT if not there"""
+	team_score: np.ndarray
+	"""int32, (number of rounds, 2)"""
+	health_before: np.ndarray
+	"""int32, (number of rounds, 2)"""
+	health_after: np.ndarray
+	"""int32, (number of rounds, 2)"""
+
+	player_duel_index: np.ndarray
+	"""int32, index into game_ids of the duel for each player (so the same user is in here once for each duel they were in)"""
+	player_team: np.ndarray
+	"""int8, 0 or 1"""
+	player_id: np.ndarray
+	"""str"""
+	player_rating: np.ndarray
+	"""int32"""
+	player_country: np.ndarray
+	"""str, countryCode of the player"""
+
+	guess_round: np.ndarray
+	"""int64, index into the per-round arrays of the round for each guess"""
+	guess_player: np.ndarray
+	"""int64, index into the per-player arrays of who made each guess"""
+	guess_lat: np.ndarray
+	"""float64"""
+	guess_lng: np.ndarray
+	"""float64"""
+	guess_distance: np.ndarray
+	"""float64, metres"""
+	guess_score: np.ndarray
+	"""int32, -1 where score is None"""
+	guess_created: np.ndarray
+	"""datetime64[ms] (UTC)"""
+	best_guess: np.ndarray
+	"""bool, isTeamsBestGuessOnRound"""
+
+	@classmethod
+	def from_duels(cls, duels: Iterable[Duel | LiteDuel]) -> 'DuelBatch':
+		"""Arguments:
+		duels: Duel or LiteDuel (or a mix), which must have two teams each"""
+		game_ids = []
+		round_offsets = [0]
+		game_mode = []
+		map_slug = []
+		initial_health = []
+		max_error_distance = []
+		rated = []
+		team_ids = []
+		winner = []
+		duel_index = []
+		round_number = []
+		lat = []
+		lng = []
+		country = []
+		multiplier = []
+		damage_multiplier = []
+		healing = []
+		start_time = []
+		end_time = []
+		timer_start_time = []
+		team_score = []
+		health_before = []
+		health_after = []
+		player_duel_index = []
+		player_team = []
+		player_id = []
+		player_rating = []
+		player_country = []
+		guess_round = []
+		guess_player = []
+		guess_lat = []
+		guess_lng = []
+		guess_distance = []
+		guess_score = []
+		guess_created = []
+		best_guess = []
+		for i, duel in enumerate(duels):
+			if len(duel.teams) != 2:
+				raise ValueError(f'Duel {duel.gameId} has {len(duel.teams)} teams instead of 2')
+			if isinstance(duel, LiteDuel):
+				game_mode.append(duel.competitiveGameMode)
+				map_slug.append(duel.mapSlug)
+				max_error_distance.append(duel.maxErrorDistance)
+				rated.append(duel.isRated)
+				winning_team_id = None if duel.isDraw else duel.winningTeamId
+			else:
+				options = duel.options
+				game_mode.append(options.competitiveGameMode)
+				map_slug.append(options.mapSlug)
+				max_error_distance.append(options.map.maxErrorDistance if options.map else None)
+				rated.append(options.isRated)
+				winning_team_id = (
+					duel.result.winningTeamId if duel.result and not duel.result.isDraw else None
+				)
+			game_ids.append(duel.gameId)
+			initial_health.append(duel.initialHealth)
+			ids = [team.id for team in duel.teams]
+			team_ids.append(ids)
+			winner.append(ids.index(winning_team_id) if winning_team_id in ids else -1)
+
+			results = [
+				{result.roundNumber: result for result in team.roundResults} for team in duel.teams
+			]
+			row_of_round = {}
+			for duel_round in duel.rounds:
+				number = duel_round.roundNumber
+				if number not in results[0] or number not in results[1]:
+					continue
+				row_of_round[number] = len(round_number)
+				location = (
+					duel_round if isinstance(duel_round, LiteDuelRound) else duel_round.panorama
+				)
+				duel_index.append(i)
+				round_number.append(number)
+				lat.append(location.lat)
+				lng.append(location.lng)
+				country.append(location.countryCode or '')
+				multiplier.append(duel_round.multiplier)
+				damage_multiplier.append(duel_round.damageMultiplier)
+				healing.append(duel_round.isHealingRound)
+				start_time.append(_ms(duel_round.startTime))
+				end_time.append(_ms(duel_round.endTime))
+				timer_start_time.append(_ms(duel_round.timerStartTime))
+				team_score.append([team_results[number].score for team_results in results])
+				health_before.append([team_results[number].healthBefore for team_results in results])
+				health_after.append([team_results[number].healthAfter for team_results in results])
+			round_offsets.append(len(round_number))
+
+			for team_index, team in enumerate(duel.teams):
+				for player in team.players:
+					player_row = len(player_id)
+					player_duel_index.append(i)
+					player_team.append(team_index)
+					player_id.append(player.playerId)
+					player_rating.append(player.rating)
+					player_country.append(player.countryCode)
+					for guess in player.guesses:
+						row = row_of_round.get(guess.roundNumber)
+						if row is None:
+							continue
+						guess_round.append(row)
+						guess_player.append(player_row)
+						guess_lat.append(guess.lat)
+						guess_lng.append(guess.lng)
+						guess_distance.append(guess.distance)
+						guess_score.append(-1 if guess.score is None else guess.score)
+						guess_created.append(_ms(guess.created))
+						best_guess.append(guess.isTeamsBestGuessOnRound)
+		return cls(
+			game_ids=game_ids,
+			round_offsets=np.array(round_offsets, dtype=np.int64),
+			game_mode=np.array(game_mode, dtype=np.str_),
+			map_slug=np.array(map_slug, dtype=np.str_),
+			initial_health=np.array(initial_health, dtype=np.int32),
+			max_error_distance=np.array(max_error_distance, dtype=np.float64),
+			rated=np.array(rated, dtype=np.bool_),
+			team_ids=np.array(team_ids, dtype=np.str_).reshape(-1, 2),
+			winner=np.array(winner, dtype=np.int8),
+			duel_index=np.array(duel_index, dtype=np.int32),
+			round_number=np.array(round_number, dtype=np.int32),
+			lat=np.array(lat, dtype=np.float64),
+			lng=np.array(lng, dtype=np.float64),
+			country=np.array(country, dtype=np.str_),
+			multiplier=np.array(multiplier, dtype=np.float64),
+			damage_multiplier=np.array(damage_multiplier, dtype=np.float64),
+			healing=np.array(healing, dtype=np.bool_),
+			start_time=_datetimes(start_time),
+			end_time=_datetimes(end_time),
+			timer_start_time=_datetimes(timer_start_time),
+			team_score=np.array(team_score, dtype=np.int32).reshape(-1, 2),
+			health_before=np.array(health_before, dtype=np.int32).reshape(-1, 2),
+			health_after=np.array(health_after, dtype=np.int32).reshape(-1, 2),
+			player_duel_index=np.array(player_duel_index, dtype=np.int32),
+			player_team=np.array(player_team, dtype=np.int8),
+			player_id=np.array(player_id, dtype=np.str_),
+			player_rating=np.array(player_rating, dtype=np.int32),
+			player_country=np.array(player_country, dtype=np.str_),
+			guess_round=np.array(guess_round, dtype=np.int64),
+			guess_player=np.array(guess_player, dtype=np.int64),
+			guess_lat=np.array(guess_lat, dtype=np.float64),
+			guess_lng=np.array(guess_lng, dtype=np.float64),
+			guess_distance=np.array(guess_distance, dtype=np.float64),
+			guess_score=np.array(guess_score, dtype=np.int32),
+			guess_created=_datetimes(guess_created),
+			best_guess=np.array(best_guess, dtype=np.bool_),
+		)
+
+	@classmethod
+	def concat(cls, batches: Sequence['DuelBatch']) -> 'DuelBatch':
+		"""Puts batches (e.g. made separately for different sets of duels) into one"""
+		duel_starts = np.cumsum([0, *(batch.duel_count for batch in batches)])
+		round_starts = np.cumsum([0, *(len(batch) for batch in batches)])
+		player_starts = np.cumsum([0, *(len(batch.player_id) for batch in batches)])
+		# Columns that index into other tables, which need to be shifted along by however much is before each batch
+		index_columns = {
+			'duel_index': (duel_starts, np.int32),
+			'player_duel_index': (duel_starts, np.int32),
+			'guess_round': (round_starts, np.int64),
+			'guess_player': (player_starts, np.int64),
+		}
+		arrays = {}
+		for field in fields(cls):
+			if field.name in {'game_ids', 'round_offsets'}:
+				continue
+			columns = [getattr(batch, field.name) for batch in batches]
+			if field.name in index_columns:
+				starts, dtype = index_columns[field.name]
+				arrays[field.name] = np.concatenate(
+					[column + start for column, start in zip(columns, starts, strict=False)]
+				).astype(dtype)
+			else:
+				arrays[field.name] = np.concatenate(columns)
+		round_offsets = np.concatenate(
+			[
+				[0],
+				*(
+					batch.round_offsets[1:] + start
+					for batch, start in zip(batches, round_starts, strict=False)
+				),
+			]
+		).astype(np.int64)
+		return cls(
+			game_ids=[game_id for batch in batches for game_id in batch.game_ids],
+			round_offsets=round_offsets,
+			**arrays,
+		)
+
+	def __len__(self) -> int:
+		"""Number of rounds"""
+		return len(self.duel_index)
+
+	@property
+	def duel_count(self) -> int:
+		return len(self.game_ids)
+
+	@property
+	def rounds_per_duel(self) -> np.ndarray:
+		return np.diff(self.round_offsets)
+
+	@property
+	def guess_duel_index(self) -> np.ndarray:
+		"""Index into game_ids of the duel for each guess"""
+		return self.duel_index[self.guess_round]
+
+	@property
+	def guess_team(self) -> np.ndarray:
+		"""Index of the team (0 or 1) that made each guess"""
+		return self.player_team[self.guess_player]
+
+	def per_duel_sum(self, values: np.ndarray) -> np.ndarray:
+		"""Adds up a per-round array for each duel, giving an array with one element (or row, if values is per-team) per duel"""
+		if values.ndim == 2:
+			return np.stack(
+				[self.per_duel_sum(values[:, team]) for team in range(values.shape[1])], axis=1
+			)
+		return np.bincount(self.duel_index, weights=values, minlength=self.duel_count)
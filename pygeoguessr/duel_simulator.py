@@ -0,0 +1,266 @@
+"""Replaying the round scores of duels under different rules (health, multipliers, healing rounds), to see what would have happened, either with the rounds that were actually played or with rounds picked at random from them (or from any other scores) many times over"""
+
+import math
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+from pygeoguessr.apis.multiplayer.duels import DuelOptions
+from pygeoguessr.duel_batch import DuelBatch
+
+_rounds_per_chunk = 1 << 22
+"""Roughly how many rounds resample_rounds and sample_rounds pick at once, so that memory use doesn't grow with the number of simulations"""
+
+
+@dataclass(frozen=True)
+class DuelRules:
+	"""The parts of DuelOptions that decide how health goes down"""
+
+	initial_health: int = 6000
+	healing_rounds: tuple[int, ...] = ()
+	"""Round numbers, empty if healing is disabled"""
+	rounds_without_damage_multiplier: int = 4
+	disable_multipliers: bool = False
+	multiplier_increment: int = 5
+	"""In tenths, so 5 means the multiplier goes up by 0.5 each round after rounds_without_damage_multiplier"""
+	damage_multiplier: float = 1
+	"""Applied on top of the multiplier for each round, to see what happens if every round does more or less damage"""
+	max_rounds: int = 0
+	"""0 for no limit, otherwise whoever has more health after this many rounds wins"""
+
+	@classmethod
+	def from_options(cls, options: DuelOptions) -> 'DuelRules':
+		return cls(
+			initial_health=options.initialHealth,
+			healing_rounds=() if options.disableHealing else tuple(options.healingRounds),
+			rounds_without_damage_multiplier=options.roundsWithoutDamageMultiplier,
+			disable_multipliers=options.disableMultipliers,
+			multiplier_increment=options.multiplierIncrement,
+			max_rounds=options.maxNumberOfRounds,
+		)
+
+	def multipliers(self, round_numbers: ArrayLike) -> np.ndarray:
+		"""float64, damage multiplier for each round number (including damage_multiplier)"""
+		round_numbers = np.asarray(round_numbers)
+		if self.disable_multipliers:
+			multipliers = np.ones(round_numbers.shape)
+		else:
+			extra_rounds = np.maximum(round_numbers - self.rounds_without_damage_multiplier, 0)
+			multipliers = 1 + extra_rounds * self.multiplier_increment / 10
+		return multipliers * self.damage_multiplier
+
+
+@dataclass(frozen=True)
+class SimulationResult:
+	"""Outcome of each simulated duel. If from resample_rounds or sample_rounds, the first axis of each array is the simulation"""
+
+	winner: np.ndarray
+	"""int8, 0 or 1 for the winning team, -1 for a draw (both teams had the same health after max_rounds), or -2 if the scores ran out before anyone lost"""
+	rounds: np.ndarray
+	"""int32, number of rounds it took"""
+	health: np.ndarray
+	"""int64, (…, 2) of each team's health at the end"""
+	health_after: np.ndarray | None
+	"""int64, (…, number of rounds, 2) of each team's health after each round, staying the same after the duel finished, or None if not simulated with keep_history=True"""
+
+	def win_rate(self, team: int | ArrayLike = 0) -> np.ndarray:
+		"""Fraction of simulations (along the first axis) that team won, for each duel
+
+		Arguments:
+			team: 0 or 1, or an array of which team for each duel (e.g. from duel_stats.player_teams)"""
+		return (self.winner == np.asarray(team)).mean(axis=0)
+
+
+def simulate(
+	team_scores: np.ndarray,
+	rules: DuelRules,
+	round_counts: ArrayLike | None = None,
+	*,
+	keep_history: bool = False,
+) -> SimulationResult:
+	"""Plays out rounds with these scores under rules, all duels at once.
+
+	Each round, the team with the lower score loses the difference times the multiplier in health (rounded), and the duel finishes when a team has none left. In healing rounds, no damage is done and each team instead gets its score back as health, which is a guess at how healing works, as the API doesn't say.
+
+	Arguments:
+		team_scores: (…, number of rounds, 2) of each team's score in each round, in order
+		round_counts: How many rounds each duel has scores for (e.g. if team_scores is padded with rounds after the duel finished), otherwise all of them are used
+		keep_history: Also return each team's health after every round, which takes a lot more memory than everything else
+
+	Returns:
+		SimulationResult with the same leading shape as team_scores"""
+	# Not int64, as this can be big, and scores are never more than 5000 anyway
+	team_scores = np.asarray(team_scores, dtype=np.int32)
+	leading_shape = team_scores.shape[:-2]
+	round_total = team_scores.shape[-2]
+	count = math.prod(leading_shape)
+	# Not -1, as that can't work out the size when there are no rounds
+	scores = team_scores.reshape(count, round_total, 2)
+	if round_counts is None:
+		counts = np.full(count, round_total)
+	else:
+		counts = np.broadcast_to(np.asarray(round_counts), leading_shape).reshape(-1)
+	if rules.max_rounds:
+		counts = np.minimum(counts, rules.max_rounds)
+
+	round_numbers = np.arange(1, round_total + 1)
+	multipliers = rules.multipliers(round_numbers)
+	healing = np.isin(round_numbers, rules.healing_rounds)
+	health = np.full((count, 2), rules.initial_health, dtype=np.int64)
+	health_after = np.empty((count, round_total, 2), dtype=np.int64) if keep_history else None
+	finished = np.zeros(count, dtype=np.bool_)
+	rounds = np.zeros(count, dtype=np.int32)
+	for i in range(round_total):
+		playing = ~finished & (i < counts)
+		round_scores = scores[:, i]
+		if healing[i]:
+			health[playing] += round_scores[playing]
+		else:
+			difference = round_scores[:, 0].astype(np.int64) - round_scores[:, 1]
+			damage = np.rint(np.abs(difference) * multipliers[i]).astype(np.int64)
+			# Team 1 loses health if team 0 did better, and vice versa (ties do no damage anyway)
+			loser = (difference > 0).astype(np.int64)
+			rows = np.nonzero(playing)[0]
+			health[rows, loser[rows]] = np.maximum(health[rows, loser[rows]] - damage[rows], 0)
+		rounds[playing] += 1
+		finished |= playing & (health == 0).any(axis=1)
+		if health_after is not None:
+			health_after[:, i] = health
+
+	winner = np.full(count, -2, dtype=np.int8)
+	winner[finished] = np.where(health[finished, 0] > 0, 0, 1)
+	# Ran out of rounds because of max_rounds rather than running out of scores
+	out_of_rounds = ~finished & (rules.max_rounds > 0) & (rounds == rules.max_rounds)
+	by_health = np.where(health[:, 0] > health[:, 1], 0, 1)
+	by_health[health[:, 0] == health[:, 1]] = -1
+	winner[out_of_rounds] = by_health[out_of_rounds]
+	return SimulationResult(
+		winner=winner.reshape(leading_shape),
+		rounds=rounds.reshape(leading_shape),
+		health=health.reshape(*leading_shape, 2),
+		health_after=None
+		if health_after is None
+		else health_after.reshape(*leading_shape, round_total, 2),
+	)
+
+
+def score_table(batch: DuelBatch) -> tuple[np.ndarray, np.ndarray]:
+	"""Returns:
+	int32 team scores of (number of duels, most rounds in a duel, 2) padded with 0 after each duel finished, and how many rounds each duel had"""
+	counts = batch.rounds_per_duel
+	scores = np.zeros((batch.duel_count, int(counts.max(initial=0)), 2), dtype=np.int32)
+	position = np.arange(len(batch)) - batch.round_offsets[batch.duel_index]
+	scores[batch.duel_index, position] = batch.team_score
+	return scores, counts
+
+
+def replay(batch: DuelBatch, rules: DuelRules, *, keep_history: bool = False) -> SimulationResult:
+	"""What would have happened in each duel with the same scores each round under different rules. If the duel would have gone on for longer than it did, the winner is -2, as there's no way to know how the rest of it would have gone (see resample_rounds for that)"""
+	scores, counts = score_table(batch)
+	return simulate(scores, rules, counts, keep_history=keep_history)
+
+
+def _simulate_in_chunks(
+	pick_scores: Callable[[int], np.ndarray],
+	simulations: int,
+	rounds_per_simulation: int,
+	rules: DuelRules,
+	*,
+	keep_history: bool,
+) -> SimulationResult:
+	"""Runs simulate on pick_scores(number of simulations) a chunk of simulations at a time, and puts the results together"""
+	chunk_size = max(_rounds_per_chunk // max(rounds_per_simulation, 1), 1)
+	results = [
+		simulate(
+			pick_scores(min(chunk_size, simulations - start)), rules, keep_history=keep_history
+		)
+		# At least one chunk, even if it's empty, so there is something to concatenate
+		for start in range(0, max(simulations, 1), chunk_size)
+	]
+	return SimulationResult(
+		winner=np.concatenate([result.winner for result in results]),
+		rounds=np.concatenate([result.rounds for result in results]),
+		health=np.concatenate([result.health for result in results]),
+		health_after=np.concatenate([result.health_after for result in results])  # type: ignore[misc] #Either all None or none of them are
+		if keep_history
+		else None,
+	)
+
+
+def resample_rounds(
+	batch: DuelBatch,
+	rules: DuelRules,
+	simulations: int = 1000,
+	*,
+	round_count: int = 30,
+	keep_history: bool = False,
+	rng: np.random.Generator | None = None,
+) -> SimulationResult:
+	"""Simulates each duel many times over with rounds picked at random (with replacement) from the rounds that were played in that duel, i.e. how likely each team was to win under rules given how they played against each other
+
+	Arguments:
+		round_count: How many rounds to pick for each simulation, which should be enough for almost all duels to finish
+		keep_history: See simulate
+
+	Returns:
+		SimulationResult of (simulations, number of duels)"""
+	rng = rng or np.random.default_rng()
+	counts = batch.rounds_per_duel
+	# Duels with no rounds have nothing to pick from, so they get 0 for everything
+	has_rounds = counts > 0
+	starts = batch.round_offsets[:-1][has_rounds, None]
+	picked_counts = counts[has_rounds, None]
+
+	def pick_scores(chunk_size: int) -> np.ndarray:
+		picks = rng.integers(
+			0, picked_counts, (chunk_size, len(picked_counts), round_count), dtype=np.int32
+		)
+		scores = np.zeros((chunk_size, batch.duel_count, round_count, 2), dtype=np.int32)
+		scores[:, has_rounds] = batch.team_score[starts + picks]
+		return scores
+
+	return _simulate_in_chunks(
+		pick_scores,
+		simulations,
+		batch.duel_count * round_count,
+		rules,
+		keep_history=keep_history,
+	)
+
+
+def sample_rounds(
+	team_scores: ArrayLike,
+	rules: DuelRules,
+	simulations: int = 1000,
+	*,
+	round_count: int = 30,
+	weights: ArrayLike | None = None,
+	keep_history: bool = False,
+	rng: np.random.Generator | None = None,
+) -> SimulationResult:
+	"""Simulates duels with rounds picked at random (with replacement) from any scores, e.g. a player's scores and their opponents' scores from all their NMPZ duels, to see how often they would win with a different set of rules
+
+	Arguments:
+		team_scores: (number of rounds, 2)
+		weights: Relative chance of picking each round
+		keep_history: See simulate
+
+	Returns:
+		SimulationResult of (simulations,)"""
+	rng = rng or np.random.default_rng()
+	team_scores = np.asarray(team_scores, dtype=np.int32).reshape(-1, 2)
+	probabilities = None
+	if weights is not None:
+		weights = np.asarray(weights, dtype=np.float64)
+		probabilities = weights / weights.sum()
+
+	def pick_scores(chunk_size: int) -> np.ndarray:
+		return team_scores[
+			rng.choice(len(team_scores), size=(chunk_size, round_count), p=probabilities)
+		]
+
+	return _simulate_in_chunks(
+		pick_scores, simulations, round_count, rules, keep_history=keep_history
+	)
@@ -0,0 +1,119 @@
+"""Statistics over DuelBatch: how long guesses take, damage dealt each round, health over the course of each duel, comebacks, and how a player does in each country"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from pygeoguessr.duel_batch import DuelBatch
+from pygeoguessr.stats import group, group_count, group_mean, group_sum
+
+
+def time_to_guess(batch: DuelBatch, *, since_timer: bool = False) -> np.ndarray:
+	"""Seconds until each guess was made, nan where the round doesn't have a start time
+
+	Arguments:
+		since_timer: From when the countdown started instead of the start of the round, which is negative (or 0) for whoever made the first guess"""
+	start = (batch.timer_start_time if since_timer else batch.start_time)[batch.guess_round]
+	return (batch.guess_created - start) / np.timedelta64(1, 's')
+
+
+def damage_taken(batch: DuelBatch) -> np.ndarray:
+	"""int32, (number of rounds, 2) of how much health each team lost in each round, 0 if it went up (in healing rounds)"""
+	return np.maximum(batch.health_before - batch.health_after, 0)
+
+
+def damage_dealt(batch: DuelBatch) -> np.ndarray:
+	"""int32, (number of rounds, 2) of how much health each team took off the other team in each round"""
+	return damage_taken(batch)[:, ::-1]
+
+
+def health_curves(batch: DuelBatch) -> np.ndarray:
+	"""float64, (number of duels, most rounds in a duel + 1, 2) of each team's health at the start and then after each round, nan after the duel finished"""
+	counts = batch.rounds_per_duel
+	curves = np.full((batch.duel_count, int(counts.max(initial=0)) + 1, 2), np.nan)
+	curves[:, 0, :] = batch.initial_health[:, None]
+	has_rounds = counts > 0
+	# Teams can have different initial health, so use what it actually was if it's there
+	curves[has_rounds, 0, :] = batch.health_before[batch.round_offsets[:-1][has_rounds]]
+	position = np.arange(len(batch)) - batch.round_offsets[batch.duel_index]
+	curves[batch.duel_index, position + 1, :] = batch.health_after
+	return curves
+
+
+def largest_deficit(batch: DuelBatch) -> np.ndarray:
+	"""int64, for each duel, the most health the winning team was behind by at the end of any round, 0 if it was never behind, or -1 if there was no winner"""
+	winner = batch.winner[batch.duel_index].astype(np.int64)
+	rows = np.nonzero(winner >= 0)[0]
+	winner = winner[rows]
+	behind = batch.health_after[rows, 1 - winner] - batch.health_after[rows, winner]
+	deficit = np.zeros(batch.duel_count, dtype=np.int64)
+	np.maximum.at(deficit, batch.duel_index[rows], behind)
+	deficit[batch.winner < 0] = -1
+	return deficit
+
+
+def comebacks(batch: DuelBatch, min_deficit: int = 1000) -> np.ndarray:
+	"""bool, for each duel, if the winning team was behind by at least min_deficit health at some point"""
+	return largest_deficit(batch) >= min_deficit
+
+
+def player_teams(batch: DuelBatch, player_id: str) -> np.ndarray:
+	"""int8, for each duel, which team (0 or 1) the player was on, or -1 if they weren't in it"""
+	teams = np.full(batch.duel_count, -1, dtype=np.int8)
+	is_player = batch.player_id == player_id
+	teams[batch.player_duel_index[is_player]] = batch.player_team[is_player]
+	return teams
+
+
+@dataclass(frozen=True)
+class DuelCountryStats:
+	"""A player's results in rounds located in each country, from the point of view of their team, where each array has one element per country"""
+
+	player_id: str
+	keys: np.ndarray
+	"""Country code, sorted"""
+	rounds: np.ndarray
+	rounds_won: np.ndarray
+	"""Rounds where their team had a higher score than the other team"""
+	mean_score: np.ndarray
+	"""Of their team"""
+	mean_score_difference: np.ndarray
+	"""Their team's score minus the other team's score"""
+	damage_dealt: np.ndarray
+	"""Total"""
+	damage_taken: np.ndarray
+	"""Total"""
+	mean_time_to_guess: np.ndarray
+	"""Seconds from the start of the round of the player's own guesses, nan if none had a time"""
+
+
+def duel_country_stats(batch: DuelBatch, player_id: str) -> DuelCountryStats:
+	"""Aggregates the rounds of each duel the player was in by the country of the location (rounds without one are left out)"""
+	teams = player_teams(batch, player_id)[batch.duel_index].astype(np.int64)
+	rows = np.nonzero((teams >= 0) & (batch.country != ''))[0]
+	own = teams[rows]
+	keys, groups = group(batch.country[rows])
+	key_count = len(keys)
+
+	own_score = batch.team_score[rows, own]
+	difference = own_score - batch.team_score[rows, 1 - own]
+	taken = damage_taken(batch)
+
+	is_own_guess = batch.player_id[batch.guess_player] == player_id
+	times = time_to_guess(batch)
+	guess_rows = batch.guess_round[is_own_guess]
+	guess_times = times[is_own_guess]
+	has_time = (batch.country[guess_rows] != '') & ~np.isnan(guess_times)
+	guess_groups = np.searchsorted(keys, batch.country[guess_rows[has_time]])
+
+	return DuelCountryStats(
+		player_id=player_id,
+		keys=keys,
+		rounds=group_count(groups, key_count),
+		rounds_won=group_count(groups[difference > 0], key_count),
+		mean_score=group_mean(groups, own_score, key_count),
+		mean_score_difference=group_mean(groups, difference, key_count),
+		damage_dealt=group_sum(groups, taken[rows, 1 - own], key_count),
+		damage_taken=group_sum(groups, taken[rows, own], key_count),
+		mean_time_to_guess=group_mean(guess_groups, guess_times[has_time], key_count),
+	)
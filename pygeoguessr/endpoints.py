@@ -0,0 +1,98 @@
+"""Working out which API endpoint a URL or cache key belongs to, so things can be grouped by endpoint instead of by individual URL"""
+
+import re
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+endpoint_templates = (
+	'api/maps/explorer',
+	'api/maps/{map_slug}',
+	'api/v3/challenges/daily-challenges/today',
+	'api/v3/challenges/daily-challenges/previous',
+	'api/v3/challenges/{challenge}/game',
+	'api/v3/challenges/{challenge}',
+	'api/v3/explorer/user/{user}',
+	'api/v3/games/{game}',
+	'api/v3/likes/{map_slug}',
+	'api/v3/profiles/me',
+	'api/v3/profiles/wallet',
+	'api/v3/quizzes/{quiz}/leaderboards/game',
+	'api/v3/quizzes/{quiz}',
+	'api/v3/results/highscores/{challenge}',
+	'api/v3/search/map',
+	'api/v3/search/user',
+	'api/v3/social/maps/browse/personalized',
+	'api/v3/social/maps/browse/popular/official',
+	'api/v3/social/maps/browse/random',
+	'api/v3/social/maps/browse/streaks',
+	'api/v3/users/{user}',
+	'api/v4/avatar/user/{user}',
+	'api/v4/avatar',
+	'api/v4/feed/private',
+	'api/v4/feed/friends',
+	'api/v4/geo-coding/country',
+	'api/v4/geo-coding/terrain',
+	'api/v4/parties/{party}',
+	'api/v4/user-maps/dangling-drafts',
+	'api/v4/user-maps/drafts',
+	'api/v4/user-maps/drafts/{map_slug}',
+	'api/v4/user-maps/maps/{map_slug}',
+	'api/v4/user-maps/region-count',
+	'api/v4/webshop/conveyor-belt',
+	'api/v4/webshop/creator-shop/products',
+	'api/v4/webshop/daily-shop-claim',
+	'api/v4/webshop/featured-deals',
+	# game-server.geoguessr.com, but the cache keys don't include the host so neither do these
+	'api/battle-royale/{lobby}',
+	'api/bullseye/{lobby}',
+	'api/competitive-streaks/{lobby}',
+	'api/duels/{lobby}',
+	'api/live-challenge/{lobby}',
+	'api/lobby/{lobby}',
+)
+"""Path of every endpoint that is called somewhere, with {placeholders} for the parts that change. More specific ones go first"""
+
+
+def _compile_template(template: str) -> re.Pattern[str]:
+	pattern = re.sub(r'\\{\w+\\}', '[^/]+', re.escape(template))
+	return re.compile(f'{pattern}/?')
+
+
+_compiled_templates = [
+	(_compile_template(template), template) for template in endpoint_templates
+]
+
+
+def url_path(url: str) -> str:
+	"""Gets just the path part of a URL or a FileCacheWithDirectories key, without the leading slash or any query parameters"""
+	if '://' in url:
+		path = urlsplit(url).path
+	else:
+		path = url.split('?', 1)[0]
+		# FileCacheWithDirectories keys put the query params as the last "directory", like key=value key2=value2
+		head, _, last = path.rpartition('/')
+		if head and '=' in last:
+			path = head
+	return path.strip('/')
+
+
+def _looks_like_id(segment: str) -> bool:
+	return len(segment) >= 8 and any(c.isdigit() for c in segment)
+
+
+@lru_cache(maxsize=1024)
+def _template_for_path(path: str) -> str:
+	for pattern, template in _compiled_templates:
+		if pattern.fullmatch(path):
+			return template
+	# Something we don't know about (yet), so guess which bits are opaque IDs
+	return '/'.join('{id}' if _looks_like_id(segment) else segment for segment in path.split('/'))
+
+
+def endpoint_template(url: str) -> str:
+	"""Gets the endpoint that a URL or cache key is for, e.g. https://www.geoguessr.com/api/v3/games/abc123 -> api/v3/games/{game}
+
+	Returns:
+		One of endpoint_templates, or if it isn't a known endpoint, the path with anything that looks like an ID replaced with {id}
+	"""
+	return _template_for_path(url_path(url))
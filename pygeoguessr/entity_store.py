@@ -0,0 +1,61 @@
+"""In-memory store of maps, users and games that came embedded in some other response, so getting them on their own afterwards doesn't need another request. Only used if settings.use_entity_store is True"""
+
+import threading
+from collections import OrderedDict
+from typing import TypeVar
+
+import pydantic
+
+from pygeoguessr import settings
+
+T = TypeVar('T', bound=pydantic.BaseModel)
+
+
+class EntityStore:
+	"""Models keyed by (type, ID), which forgets the least recently used ones once there are more than max_size of them.
+	Anything returned from here is the same object that was stored (and may be returned again), so don't modify it"""
+
+	def __init__(self, max_size: int = 10_000):
+		self.max_size = max_size
+		self._entities: OrderedDict[tuple[type, str], pydantic.BaseModel] = OrderedDict()
+		self._lock = threading.Lock()
+
+	def add(self, entity: pydantic.BaseModel, *ids: str):
+		"""Stores an entity under each of its IDs, e.g. a map's id and slug if they are different"""
+		with self._lock:
+			for entity_id in ids:
+				key = (type(entity), entity_id)
+				self._entities[key] = entity
+				self._entities.move_to_end(key)
+			while len(self._entities) > self.max_size:
+				self._entities.popitem(last=False)
+
+	def get(self, entity_type: type[T], entity_id: str) -> T | None:
+		with self._lock:
+			entity = self._entities.get((entity_type, entity_id))
+			if entity is not None:
+				self._entities.move_to_end((entity_type, entity_id))
+		return entity  # type: ignore[return-value] #It's always stored under its own type
+
+	def clear(self):
+		with self._lock:
+			self._entities.clear()
+
+	def __len__(self) -> int:
+		return len(self._entities)
+
+
+entity_store = EntityStore()
+
+
+def remember(entity: pydantic.BaseModel | None, *ids: str):
+	"""Adds an embedded entity to entity_store, if settings.use_entity_store is on"""
+	if entity is not None and settings.use_entity_store:
+		entity_store.add(entity, *ids)
+
+
+def lookup(entity_type: type[T], entity_id: str) -> T | None:
+	"""Gets an entity from entity_store, if settings.use_entity_store is on and it's in there"""
+	if not settings.use_entity_store:
+		return None
+	return entity_store.get(entity_type, entity_id)
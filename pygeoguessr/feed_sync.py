@@ -0,0 +1,223 @@
+"""Syncing the activity feed incrementally, i.e. only getting what is new since the last time, instead of going through the whole feed every time like iter_activity_feed does"""
+
+import hashlib
+from collections.abc import AsyncIterator, Iterator
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Literal
+
+import pydantic
+
+from pygeoguessr.api import get_default_async_session
+from pygeoguessr.apis.activities import (
+	Activity,
+	_get_activity_feed_page,
+	_get_activity_feed_page_async,
+	_iter_page_activities,
+	_ParsedActivityFeedPage,
+)
+from pygeoguessr.settings import BaseModel
+
+if TYPE_CHECKING:
+	import aiohttp
+
+
+def activity_key(activity: Activity) -> str:
+	"""Something that identifies an activity, as they don't have IDs of their own"""
+	identity = f'{activity.user.id}|{activity.type:d}|{activity.time.isoformat()}|{activity.payload.model_dump_json()}'
+	return hashlib.sha1(identity.encode(), usedforsecurity=False).hexdigest()
+
+
+class FeedCheckpoint(BaseModel):
+	"""How far sync_activity_feed has gotten, saved as JSON between syncs"""
+
+	feed: Literal['private', 'friends'] = 'private'
+	newest_time: datetime | None = None
+	"""Time of the newest activity that has been synced. Everything older than this has been synced too"""
+	newest_keys: list[str] = pydantic.Field(default_factory=list)
+	"""activity_key of each activity at newest_time, as there can be more than one at the same time"""
+	resume_token: str | None = None
+	"""paginationToken of the next page, if the last sync was interrupted before it got to newest_time"""
+	pending_newest_time: datetime | None = None
+	"""Newest activity of the interrupted sync, which becomes newest_time once it has been finished"""
+	pending_newest_keys: list[str] = pydantic.Field(default_factory=list)
+
+	@classmethod
+	def load(cls, path: Path | str, *, friends: bool = False) -> 'FeedCheckpoint':
+		"""Loads a checkpoint from a file, or starts a new one if the file doesn't exist yet"""
+		feed = 'friends' if friends else 'private'
+		path = Path(path)
+		if not path.is_file():
+			return cls(feed=feed)
+		checkpoint = cls.model_validate_json(path.read_bytes())
+		if checkpoint.feed != feed:
+			raise ValueError(f'{path} is a checkpoint for the {checkpoint.feed} feed, not {feed}')
+		return checkpoint
+
+	def save(self, path: Path | str):
+		path = Path(path)
+		temp_path = path.with_name(f'{path.name}.tmp')
+		temp_path.write_text(self.model_dump_json(indent=2), 'utf-8')
+		# So it doesn't end up half written if we get interrupted in the middle of it
+		temp_path.replace(path)
+
+
+class _SyncRun:
+	"""One pass from some page down to the checkpoint's newest_time"""
+
+	def __init__(self, checkpoint: FeedCheckpoint, *, resuming: bool):
+		self.checkpoint = checkpoint
+		self.stop_time = checkpoint.newest_time
+		self.stop_keys = set(checkpoint.newest_keys)
+		if resuming:
+			self.top_time = checkpoint.pending_newest_time
+			self.top_keys = list(checkpoint.pending_newest_keys)
+		else:
+			self.top_time = None
+			self.top_keys = []
+
+	def _already_synced(self, activity: Activity, key: str) -> bool:
+		if self.stop_time is None:
+			return False
+		return activity.time < self.stop_time or (
+			activity.time == self.stop_time and key in self.stop_keys
+		)
+
+	def process_page(self, page: _ParsedActivityFeedPage) -> tuple[list[Activity], bool]:
+		"""Returns:
+		New activities from this page, and whether this is the last page to get"""
+		new = []
+		reached_synced = False
+		for activity in _iter_page_activities(page):
+			key = activity_key(activity)
+			if self._already_synced(activity, key):
+				# Keep going through the rest of this page though, as entries aren't necessarily in order inside a page (MultipleActivities etc)
+				reached_synced = True
+				continue
+			new.append(activity)
+			if self.top_time is None or activity.time > self.top_time:
+				self.top_time = activity.time
+				self.top_keys = [key]
+			elif activity.time == self.top_time:
+				self.top_keys.append(key)
+		return new, reached_synced or not page.paginationToken
+
+	def page_done(self, next_token: str | None, *, finished: bool):
+		checkpoint = self.checkpoint
+		if not finished:
+			checkpoint.resume_token = next_token
+			checkpoint.pending_newest_time = self.top_time
+			checkpoint.pending_newest_keys = self.top_keys
+			return
+		if self.top_time is not None:
+			if self.top_time == checkpoint.newest_time:
+				checkpoint.newest_keys = list(dict.fromkeys([*checkpoint.newest_keys, *self.top_keys]))
+			else:
+				checkpoint.newest_time = self.top_time
+				checkpoint.newest_keys = self.top_keys
+		checkpoint.resume_token = None
+		checkpoint.pending_newest_time = None
+		checkpoint.pending_newest_keys = []
+
+
+def _sync_pages(
+	checkpoint: FeedCheckpoint,
+	checkpoint_path: Path | str,
+	per_page: int,
+	*,
+	resuming: bool,
+) -> Iterator[Activity]:
+	run = _SyncRun(checkpoint, resuming=resuming)
+	pagination_token = checkpoint.resume_token if resuming else None
+	friends = checkpoint.feed == 'friends'
+	while True:
+		page = _get_activity_feed_page(pagination_token, per_page, friends=friends)
+		new, finished = run.process_page(page)
+		yield from new
+		# Only saved once everything on the page has been yielded (and presumably dealt with)
+		run.page_done(page.paginationToken, finished=finished)
+		checkpoint.save(checkpoint_path)
+		if finished:
+			break
+		pagination_token = page.paginationToken
+
+
+def sync_activity_feed(
+	checkpoint_path: Path | str, per_page: int = 50, *, friends: bool = False
+) -> Iterator[Activity]:
+	"""Gets activities that are newer than the last sync, stopping at the first one that has already been synced, and saves a checkpoint to checkpoint_path after each page. The first sync goes through the whole feed.
+
+	If a sync was interrupted before it finished (the generator wasn't run to the end), the next one first carries on from where that one got up to, and then gets anything newer than that, so activities are newest first within each of those two parts but not overall.
+
+	Arguments:
+		checkpoint_path: JSON file to keep the checkpoint in, which should be a different one for each feed and account
+
+	Yields:
+		Activity for each activity that hasn't been synced before
+	"""
+	checkpoint = FeedCheckpoint.load(checkpoint_path, friends=friends)
+	if checkpoint.resume_token:
+		yield from _sync_pages(checkpoint, checkpoint_path, per_page, resuming=True)
+	yield from _sync_pages(checkpoint, checkpoint_path, per_page, resuming=False)
+
+
+async def _sync_pages_async(
+	session: 'aiohttp.ClientSession',
+	checkpoint: FeedCheckpoint,
+	checkpoint_path: Path | str,
+	per_page: int,
+	*,
+	resuming: bool,
+) -> AsyncIterator[Activity]:
+	run = _SyncRun(checkpoint, resuming=resuming)
+	pagination_token = checkpoint.resume_token if resuming else None
+	friends = checkpoint.feed == 'friends'
+	while True:
+		page = await _get_activity_feed_page_async(
+			session, pagination_token, per_page, friends=friends
+		)
+		new, finished = run.process_page(page)
+		for activity in new:
+			yield activity
+		run.page_done(page.paginationToken, finished=finished)
+		checkpoint.save(checkpoint_path)
+		if finished:
+			break
+		pagination_token = page.paginationToken
+
+
+async def sync_activity_feed_async(
+	checkpoint_path: Path | str,
+	per_page: int = 50,
+	session: 'aiohttp.ClientSession | None' = None,
+	*,
+	friends: bool = False,
+) -> AsyncIterator[Activity]:
+	"""Gets activities that are newer than the last sync, stopping at the first one that has already been synced, and saves a checkpoint to checkpoint_path after each page. The first sync goes through the whole feed.
+
+	If a sync was interrupted before it finished, the next one first carries on from where that one got up to, and then gets anything newer than that, so activities are newest first within each of those two parts but not overall.
+
+	Arguments:
+		checkpoint_path: JSON file to keep the checkpoint in, which should be a different one for each feed and account
+
+	Yields:
+		Activity for each activity that hasn't been synced before
+	"""
+	if session is None:
+		async with get_default_async_session() as default_session:
+			async for activity in sync_activity_feed_async(
+				checkpoint_path, per_page, default_session, friends=friends
+			):
+				yield activity
+		return
+
+	checkpoint = FeedCheckpoint.load(checkpoint_path, friends=friends)
+	if checkpoint.resume_token:
+		async for activity in _sync_pages_async(
+			session, checkpoint, checkpoint_path, per_page, resuming=True
+		):
+			yield activity
+	async for activity in _sync_pages_async(
+		session, checkpoint, checkpoint_path, per_page, resuming=False
+	):
+		yield activity
@@ -0,0 +1,234 @@
+"""Rounds and guesses from lots of games as NumPy arrays, for analysing them all at once instead of going through each Game object"""
+
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, fields
+
+import numpy as np
+
+from pygeoguessr.apis.games import Game
+from pygeoguessr.lite import LiteGame
+
+_nat = np.iinfo(np.int64).min
+"""What NaT is as int64"""
+
+
+def _first_round_start(game: LiteGame) -> int:
+	if not game.rounds or game.rounds[0].startTime is None:
+		return _nat
+	return int(game.rounds[0].startTime * 1000)
+
+
+@dataclass(frozen=True)
+class GameBatch:
+	"""Each round that has a guess (so not the current round of an unfinished game) is one element of each of the per-round arrays, in the same order as the games and then rounds were in.
+
+	Rounds for game i are round_arrays[offsets[i]:offsets[i + 1]], and per-round values can be added up for each game with per_game_sum"""
+
+	tokens: list[str]
+	"""Token of each game"""
+	offsets: np.ndarray
+	"""int64, length is number of games + 1"""
+	bounds: np.ndarray
+	"""float64, (number of games, 4) of min lat, min lng, max lat, max lng of each game's map"""
+	streak: np.ndarray
+	"""bool, for each game, where scores are not 0 to 5000 points"""
+	streak_type: np.ndarray
+	"""str (StreakType value), for each game, which is still there for non-streak games but doesn't mean anything"""
+	map_slug: np.ndarray
+	"""str, for each game"""
+	game_type: np.ndarray
+	"""str (GameType value), for each game"""
+	start_time: np.ndarray
+	"""datetime64[ms] (UTC) of when each game's first round started, or NaT if it has no rounds"""
+
+	game_index: np.ndarray
+	"""int32, index into tokens of the game for each round"""
+	round_index: np.ndarray
+	"""int32, 0 for the first round of each game"""
+	actual_lat: np.ndarray
+	"""float64"""
+	actual_lng: np.ndarray
+	"""float64"""
+	guess_lat: np.ndarray
+	"""float64"""
+	guess_lng: np.ndarray
+	"""float64"""
+	score: np.ndarray
+	"""int32, roundScoreInPoints"""
+	distance: np.ndarray
+	"""float64, distanceInMeters"""
+	time: np.ndarray
+	"""float64, seconds"""
+	steps: np.ndarray
+	"""int32, -1 where stepsCount is None"""
+	timed_out: np.ndarray
+	"""bool"""
+	country: np.ndarray
+	"""str, streakLocationCode of the round (the country or US state of the location), or an empty string if that isn't there"""
+	guess_country: np.ndarray
+	"""str, streakLocationCode of the guess, which is only there for streak games (otherwise an empty string)"""
+
+	@classmethod
+	def from_games(cls, games: Iterable[Game]) -> 'GameBatch':
+		tokens = []
+		offsets = [0]
+		bounds = []
+		streak = []
+		streak_type = []
+		map_slug = []
+		game_type = []
+		start_time = []
+		game_index = []
+		round_index = []
+		actual_lat = []
+		actual_lng = []
+		guess_lat = []
+		guess_lng = []
+		score = []
+		distance = []
+		time = []
+		steps = []
+		timed_out = []
+		country = []
+		guess_country = []
+		for i, game in enumerate(games):
+			tokens.append(game.token)
+			bounds.append(
+				(game.bounds.min.lat, game.bounds.min.lng, game.bounds.max.lat, game.bounds.max.lng)
+			)
+			streak.append(game.mode == 'streak')
+			streak_type.append(game.streakType)
+			map_slug.append(game.map)
+			game_type.append(game.type)
+			start_time.append(
+				int(game.rounds[0].startTime.timestamp() * 1000) if game.rounds else _nat
+			)
+			guesses = game.player.guesses
+			count = min(len(game.rounds), len(guesses))
+			game_index.extend([i] * count)
+			round_index.extend(range(count))
+			for game_round, guess in zip(game.rounds, guesses[:count], strict=False):
+				actual_lat.append(game_round.lat)
+				actual_lng.append(game_round.lng)
+				guess_lat.append(guess.lat)
+				guess_lng.append(guess.lng)
+				score.append(guess.roundScoreInPoints)
+				distance.append(guess.distanceInMeters)
+				time.append(guess.time.total_seconds())
+				steps.append(-1 if guess.stepsCount is None else guess.stepsCount)
+				timed_out.append(guess.timedOut)
+				country.append(game_round.streakLocationCode or '')
+				guess_country.append(guess.streakLocationCode or '')
+			offsets.append(offsets[-1] + count)
+		return cls(
+			tokens,
+			np.array(offsets, dtype=np.int64),
+			np.array(bounds, dtype=np.float64).reshape(-1, 4),
+			np.array(streak, dtype=np.bool_),
+			np.array(streak_type, dtype=np.str_),
+			np.array(map_slug, dtype=np.str_),
+			np.array(game_type, dtype=np.str_),
+			np.array(start_time, dtype=np.int64).view('datetime64[ms]'),
+			np.array(game_index, dtype=np.int32),
+			np.array(round_index, dtype=np.int32),
+			np.array(actual_lat, dtype=np.float64),
+			np.array(actual_lng, dtype=np.float64),
+			np.array(guess_lat, dtype=np.float64),
+			np.array(guess_lng, dtype=np.float64),
+			np.array(score, dtype=np.int32),
+			np.array(distance, dtype=np.float64),
+			np.array(time, dtype=np.float64),
+			np.array(steps, dtype=np.int32),
+			np.array(timed_out, dtype=np.bool_),
+			np.array(country, dtype=np.str_),
+			np.array(guess_country, dtype=np.str_),
+		)
+
+	@classmethod
+	def from_lite_games(cls, games: Sequence[LiteGame]) -> 'GameBatch':
+		"""Like from_games, but for LiteGame (which has to be a sequence here, as it goes through it more than once)"""
+		tokens = []
+		offsets = [0]
+		rounds = []
+		guesses = []
+		for game in games:
+			tokens.append(game.token)
+			count = min(len(game.rounds), len(game.guesses))
+			rounds.extend(game.rounds[:count])
+			guesses.extend(game.guesses[:count])
+			offsets.append(offsets[-1] + count)
+		counts = np.diff(offsets)
+		return cls(
+			tokens,
+			np.array(offsets, dtype=np.int64),
+			np.array([game.bounds for game in games], dtype=np.float64).reshape(-1, 4),
+			np.array([game.mode == 'streak' for game in games], dtype=np.bool_),
+			np.array([game.streakType for game in games], dtype=np.str_),
+			np.array([game.map for game in games], dtype=np.str_),
+			np.array([game.type for game in games], dtype=np.str_),
+			np.array([_first_round_start(game) for game in games], dtype=np.int64).view(
+				'datetime64[ms]'
+			),
+			np.repeat(np.arange(len(tokens), dtype=np.int32), counts),
+			(np.arange(len(rounds)) - np.repeat(offsets[:-1], counts)).astype(np.int32),
+			np.array([game_round.lat for game_round in rounds], dtype=np.float64),
+			np.array([game_round.lng for game_round in rounds], dtype=np.float64),
+			np.array([guess.lat for guess in guesses], dtype=np.float64),
+			np.array([guess.lng for guess in guesses], dtype=np.float64),
+			np.array([guess.roundScoreInPoints for guess in guesses], dtype=np.int32),
+			np.array([guess.distanceInMeters for guess in guesses], dtype=np.float64),
+			np.array([guess.time for guess in guesses], dtype=np.float64),
+			np.array(
+				[-1 if guess.stepsCount is None else guess.stepsCount for guess in guesses],
+				dtype=np.int32,
+			),
+			np.array([guess.timedOut for guess in guesses], dtype=np.bool_),
+			np.array([game_round.streakLocationCode or '' for game_round in rounds], dtype=np.str_),
+			np.array([guess.streakLocationCode or '' for guess in guesses], dtype=np.str_),
+		)
+
+	@classmethod
+	def concat(cls, batches: Sequence['GameBatch']) -> 'GameBatch':
+		"""Puts batches (e.g. made separately for different sets of games) into one"""
+		game_counts = np.cumsum([0, *(len(batch.tokens) for batch in batches)])
+		round_counts = np.cumsum([0, *(len(batch) for batch in batches)])
+		arrays = {}
+		for field in fields(cls):
+			if field.name in {'tokens', 'offsets'}:
+				continue
+			arrays[field.name] = np.concatenate(
+				[getattr(batch, field.name) for batch in batches]
+			)
+		arrays['game_index'] = np.concatenate(
+			[batch.game_index + start for batch, start in zip(batches, game_counts, strict=False)]
+		).astype(np.int32)
+		offsets = np.concatenate(
+			[
+				[0],
+				*(
+					batch.offsets[1:] + start
+					for batch, start in zip(batches, round_counts, strict=False)
+				),
+			]
+		).astype(np.int64)
+		return cls(
+			tokens=[token for batch in batches for token in batch.tokens],
+			offsets=offsets,
+			**arrays,
+		)
+
+	def __len__(self) -> int:
+		"""Number of rounds"""
+		return len(self.game_index)
+
+	@property
+	def game_count(self) -> int:
+		return len(self.tokens)
+
+	@property
+	def rounds_per_game(self) -> np.ndarray:
+		return np.diff(self.offsets)
+
+	def per_game_sum(self, values: np.ndarray) -> np.ndarray:
+		"""Adds up a per-round array (e.g. score) for each game, giving an array with one element per game"""
+		return np.bincount(self.game_index, weights=values, minlength=self.game_count)
@@ -0,0 +1,185 @@
+"""2D histograms of where guesses and locations are (and how far off guesses are at each location), accumulated a batch of rounds at a time, for drawing heatmaps without needing every point"""
+
+import math
+from dataclasses import dataclass, field
+from typing import Literal
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+from pygeoguessr.game_batch import GameBatch
+
+max_mercator_lat = math.degrees(math.atan(math.sinh(math.pi)))
+"""Web Mercator is cut off at about 85.05°, where the world is square"""
+
+Projection = Literal['equirectangular', 'mercator']
+
+
+def _mercator_y(lat: ArrayLike) -> np.ndarray:
+	"""0 at the top (max_mercator_lat) to 1 at the bottom"""
+	lat = np.radians(np.clip(lat, -max_mercator_lat, max_mercator_lat))
+	return (1 - np.log(np.tan(lat) + 1 / np.cos(lat)) / np.pi) / 2
+
+
+def tile_bounds(zoom: int, x: int, y: int) -> tuple[float, float, float, float]:
+	"""(min lat, min lng, max lat, max lng) of a Web Mercator (slippy map) tile"""
+	tiles = 2**zoom
+
+	def lat(tile_y: int) -> float:
+		return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * tile_y / tiles))))
+
+	return lat(y + 1), x / tiles * 360 - 180, lat(y), (x + 1) / tiles * 360 - 180
+
+
+@dataclass
+class Raster:
+	"""Grid of width × height cells covering bounds in some projection, with row 0 at the top (north)"""
+
+	width: int
+	height: int
+	projection: Projection = 'equirectangular'
+	bounds: tuple[float, float, float, float] = (-90, -180, 90, 180)
+	"""min lat, min lng, max lat, max lng"""
+
+	@classmethod
+	def world(
+		cls, width: int, height: int | None = None, projection: Projection = 'equirectangular'
+	) -> 'Raster':
+		"""The whole world, height defaults to what keeps the cells square"""
+		if projection == 'mercator':
+			bounds = (-max_mercator_lat, -180, max_mercator_lat, 180)
+			return cls(width, height or width, projection, bounds)
+		return cls(width, height or width // 2, projection)
+
+	@classmethod
+	def tile(cls, zoom: int, x: int, y: int, size: int = 256) -> 'Raster':
+		"""A Web Mercator tile"""
+		return cls(size, size, 'mercator', tile_bounds(zoom, x, y))
+
+	def cells(self, lat: ArrayLike, lng: ArrayLike) -> tuple[np.ndarray, np.ndarray]:
+		"""Returns:
+		Flat index (row * width + column) of the cell for each point, and a mask of which points are inside bounds at all"""
+		lat = np.asarray(lat, dtype=np.float64)
+		lng = np.asarray(lng, dtype=np.float64)
+		min_lat, min_lng, max_lat, max_lng = self.bounds
+		x = (lng - min_lng) / (max_lng - min_lng)
+		if self.projection == 'mercator':
+			top = _mercator_y(max_lat)
+			y = (_mercator_y(lat) - top) / (_mercator_y(min_lat) - top)
+		else:
+			y = (max_lat - lat) / (max_lat - min_lat)
+		inside = (x >= 0) & (x <= 1) & (y >= 0) & (y <= 1) & (lat >= min_lat) & (lat <= max_lat)
+		# The far edges go in the last cell instead of one past it
+		column = np.minimum((x[inside] * self.width).astype(np.int64), self.width - 1)
+		row = np.minimum((y[inside] * self.height).astype(np.int64), self.height - 1)
+		return row * self.width + column, inside
+
+
+@dataclass
+class Heatmap:
+	"""Number (or total weight) of points in each cell of a raster"""
+
+	raster: Raster
+	counts: np.ndarray = field(init=False)
+	"""float64, (height, width)"""
+
+	def __post_init__(self):
+		self.counts = np.zeros((self.raster.height, self.raster.width))
+
+	def add(self, lat: ArrayLike, lng: ArrayLike, weights: ArrayLike | None = None):
+		cells, inside = self.raster.cells(lat, lng)
+		if weights is not None:
+			weights = np.broadcast_to(np.asarray(weights, dtype=np.float64), inside.shape)[inside]
+		self.counts += np.bincount(cells, weights, minlength=self.counts.size).reshape(
+			self.counts.shape
+		)
+
+	def merge(self, other: 'Heatmap'):
+		if other.raster != self.raster:
+			raise ValueError('Can only merge heatmaps with the same raster')
+		self.counts += other.counts
+
+
+def _east_north(
+	from_lat: np.ndarray, from_lng: np.ndarray, to_lat: np.ndarray, to_lng: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+	# Degrees of longitude are scaled down to be comparable to degrees of latitude at that point, and go the short way around the antimeridian
+	east = (to_lng - from_lng + 180) % 360 - 180
+	return east * np.cos(np.radians(from_lat)), to_lat - from_lat
+
+
+@dataclass
+class GuessHeatmaps:
+	"""Heatmaps of guesses and locations, and the average error (which way and how far off guesses were) for locations in each cell"""
+
+	raster: Raster
+	guesses: Heatmap = field(init=False)
+	locations: Heatmap = field(init=False)
+	error_east: np.ndarray = field(init=False)
+	"""Sum of how far east of the location each guess was (in degrees at the location's latitude), by the location's cell"""
+	error_north: np.ndarray = field(init=False)
+	"""Sum of how far north of the location each guess was in degrees, by the location's cell"""
+	distance: np.ndarray = field(init=False)
+	"""Sum of distances (in whatever unit was passed in, usually metres) by the location's cell"""
+
+	def __post_init__(self):
+		self.guesses = Heatmap(self.raster)
+		self.locations = Heatmap(self.raster)
+		shape = (self.raster.height, self.raster.width)
+		self.error_east = np.zeros(shape)
+		self.error_north = np.zeros(shape)
+		self.distance = np.zeros(shape)
+
+	def add(
+		self,
+		guess_lat: ArrayLike,
+		guess_lng: ArrayLike,
+		actual_lat: ArrayLike,
+		actual_lng: ArrayLike,
+		distance: ArrayLike | None = None,
+	):
+		"""Adds a batch of rounds, e.g. duel guesses and their DuelLocation"""
+		guess_lat, guess_lng, actual_lat, actual_lng = (
+			np.asarray(a, dtype=np.float64) for a in (guess_lat, guess_lng, actual_lat, actual_lng)
+		)
+		self.guesses.add(guess_lat, guess_lng)
+		self.locations.add(actual_lat, actual_lng)
+		cells, inside = self.raster.cells(actual_lat, actual_lng)
+		east, north = _east_north(
+			actual_lat[inside], actual_lng[inside], guess_lat[inside], guess_lng[inside]
+		)
+		size = self.distance.size
+		self.error_east += np.bincount(cells, east, minlength=size).reshape(self.distance.shape)
+		self.error_north += np.bincount(cells, north, minlength=size).reshape(self.distance.shape)
+		if distance is not None:
+			distance = np.broadcast_to(np.asarray(distance, dtype=np.float64), inside.shape)
+			self.distance += np.bincount(cells, distance[inside], minlength=size).reshape(
+				self.distance.shape
+			)
+
+	def add_game_batch(self, batch: GameBatch):
+		"""Adds every round in a GameBatch, except ones that timed out without a guess"""
+		guessed = ~batch.timed_out
+		self.add(
+			batch.guess_lat[guessed],
+			batch.guess_lng[guessed],
+			batch.actual_lat[guessed],
+			batch.actual_lng[guessed],
+			batch.distance[guessed],
+		)
+
+	def merge(self, other: 'GuessHeatmaps'):
+		self.guesses.merge(other.guesses)
+		self.locations.merge(other.locations)
+		self.error_east += other.error_east
+		self.error_north += other.error_north
+		self.distance += other.distance
+
+	def mean_error(self) -> tuple[np.ndarray, np.ndarray]:
+		"""Average (east, north) error of guesses for locations in each cell, nan where there are none"""
+		with np.errstate(invalid='ignore', divide='ignore'):
+			return self.error_east / self.locations.counts, self.error_north / self.locations.counts
+
+	def mean_distance(self) -> np.ndarray:
+		with np.errstate(invalid='ignore', divide='ignore'):
+			return self.distance / self.locations.counts
@@ -0,0 +1,255 @@
+"""Getting all the highscores for a challenge faster than going through one page at a time, by going through each country separately and all at once"""
+
+import asyncio
+import contextlib
+import heapq
+from collections.abc import AsyncIterator, Callable, Collection
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from pygeoguessr.api import get_default_async_session
+from pygeoguessr.apis.challenges import (
+	ChallengeHighscore,
+	ChallengeHighscoresPage,
+	_get_challenge_highscore_page_async,
+)
+
+if TYPE_CHECKING:
+	import aiohttp
+
+	from pygeoguessr.types import ChallengeToken, CountryCode
+
+default_country_codes: tuple['CountryCode', ...] = tuple(
+	"""AD AE AF AG AI AL AM AO AQ AR AS AT AU AW AX AZ BA BB BD BE BF BG BH BI BJ BL BM BN BO BQ BR BS BT BV BW BY BZ
+	CA CC CD CF CG CH CI CK CL CM CN CO CR CU CV CW CX CY CZ DE DJ DK DM DO DZ EC EE EG EH ER ES ET FI FJ FK FM FO FR
+	GA GB GD GE GF GG GH GI GL GM GN GP GQ GR GS GT GU GW GY HK HM HN HR HT HU ID IE IL IM IN IO IQ IR IS IT JE JM JO JP
+	KE KG KH KI KM KN KP KR KW KY KZ LA LB LC LI LK LR LS LT LU LV LY MA MC MD ME MF MG MH MK ML MM MN MO MP MQ MR MS
+	MT MU MV MW MX MY MZ NA NC NE NF NG NI NL NO NP NR NU NZ OM PA PE PF PG PH PK PL PM PN PR PS PT PW PY QA RE RO RS
+	RU RW SA SB SC SD SE SG SH SI SJ SK SL SM SN SO SR SS ST SV SX SY SZ TC TD TF TG TH TJ TK TL TM TN TO TR TT TV TW
+	TZ UA UG UM US UY UZ VA VC VE VG VI VN VU WF WS XK YE YT ZA ZM ZW""".split()
+)
+"""Every ISO 3166-1 alpha-2 code, plus XK for Kosovo"""
+
+
+@dataclass
+class PartitionProgress:
+	country_code: 'CountryCode | None'
+	"""None for the partition without a country filter"""
+	pages: int = 0
+	items: int = 0
+	complete: bool = False
+	"""Got to the last page"""
+	cut_off: bool = False
+	"""Stopped before the last page as nothing further on could be wanted (see top_challenge_highscores_async)"""
+	error: BaseException | None = None
+
+
+@dataclass
+class CrawlProgress:
+	"""How far along each partition of a crawl is, which is updated while the crawl is going"""
+
+	partitions: dict['CountryCode | None', PartitionProgress] = field(default_factory=dict)
+	unique: int = 0
+	"""Number of highscores seen so far, not counting duplicates"""
+
+	@property
+	def complete(self) -> list['CountryCode | None']:
+		return [code for code, partition in self.partitions.items() if partition.complete]
+
+	@property
+	def incomplete(self) -> list['CountryCode | None']:
+		"""Partitions that are still going, failed, or were cut off"""
+		return [code for code, partition in self.partitions.items() if not partition.complete]
+
+	@property
+	def errors(self) -> dict['CountryCode | None', BaseException]:
+		return {
+			code: partition.error
+			for code, partition in self.partitions.items()
+			if partition.error is not None
+		}
+
+
+class _Crawl:
+	def __init__(
+		self,
+		session: 'aiohttp.ClientSession',
+		challenge_token: 'ChallengeToken',
+		min_rounds: int | None,
+		concurrency: int,
+		progress: CrawlProgress,
+		should_stop: Callable[[ChallengeHighscoresPage], bool] | None,
+	):
+		self.session = session
+		self.challenge_token = challenge_token
+		self.min_rounds = min_rounds
+		self.semaphore = asyncio.Semaphore(concurrency)
+		self.queue: asyncio.Queue[list[ChallengeHighscore] | None] = asyncio.Queue(concurrency * 2)
+		self.progress = progress
+		self.should_stop = should_stop
+
+	async def crawl_partition(self, country_code: 'CountryCode | None'):
+		partition = self.progress.partitions[country_code]
+		pagination_token = None
+		try:
+			async with self.semaphore:
+				while True:
+					page = await _get_challenge_highscore_page_async(
+						self.session,
+						self.challenge_token,
+						pagination_token=pagination_token,
+						min_rounds=self.min_rounds,
+						country_code=country_code,
+						friends=False,
+					)
+					partition.pages += 1
+					partition.items += len(page.items)
+					await self.queue.put(page.items)
+					pagination_token = page.paginationToken
+					if not pagination_token:
+						partition.complete = True
+						break
+					if self.should_stop and self.should_stop(page):
+						partition.cut_off = True
+						break
+		except Exception as e:  # noqa: BLE001 #Recorded in the progress, and raised at the end if raise_errors
+			partition.error = e
+
+	async def run(self, country_codes: Collection['CountryCode | None']):
+		async with asyncio.TaskGroup() as tasks:
+			for country_code in country_codes:
+				tasks.create_task(self.crawl_partition(country_code))
+		await self.queue.put(None)
+
+	async def high_scores(
+		self, country_codes: Collection['CountryCode | None']
+	) -> AsyncIterator[ChallengeHighscore]:
+		seen: set[str] = set()
+		runner = asyncio.create_task(self.run(country_codes))
+		try:
+			while (items := await self.queue.get()) is not None:
+				for high_score in items:
+					if high_score.gameToken in seen:
+						continue
+					seen.add(high_score.gameToken)
+					self.progress.unique += 1
+					yield high_score
+			await runner
+		finally:
+			runner.cancel()
+			with contextlib.suppress(asyncio.CancelledError):
+				await runner
+
+
+def _partitions(
+	country_codes: Collection['CountryCode'], progress: CrawlProgress, *, include_global: bool
+) -> list['CountryCode | None']:
+	partitions: list[CountryCode | None] = list(dict.fromkeys(country_codes))
+	if include_global:
+		# First, as it has the top scores of everyone, which matters for top_challenge_highscores_async
+		partitions.insert(0, None)
+	progress.partitions = {code: PartitionProgress(code) for code in partitions}
+	return partitions
+
+
+async def crawl_challenge_highscores_async(
+	challenge_token: 'ChallengeToken',
+	country_codes: Collection['CountryCode'] = default_country_codes,
+	min_rounds: int | None = 5,
+	session: 'aiohttp.ClientSession | None' = None,
+	*,
+	concurrency: int = 8,
+	include_global: bool = False,
+	progress: CrawlProgress | None = None,
+	raise_errors: bool = True,
+) -> AsyncIterator[ChallengeHighscore]:
+	"""Gets every highscore for a challenge, going through the highscores for each country at the same time instead of one page at a time. Highscores are yielded as they come in, so they are not in any particular order.
+
+	Arguments:
+		country_codes: Countries to go through separately, defaults to every country
+		concurrency: Number of countries to go through at once. Note that settings.max_connections still applies on top of that
+		include_global: Also go through the highscores without a country filter at the same time, to get players who don't have a country (or have one that isn't in country_codes). This is as slow as iter_challenge_highscores_async, so the whole crawl will take at least that long
+		progress: Filled in with how far along each partition is while going through them, so you can see which ones are complete (especially if it fails partway through)
+		raise_errors: If getting any partition fails, raise the error once all the others are done. Otherwise, errors are only recorded in progress
+
+	Yields:
+		ChallengeHighscore, without duplicates (by gameToken)
+	"""
+	if session is None:
+		async with get_default_async_session() as default_session:
+			async for high_score in crawl_challenge_highscores_async(
+				challenge_token,
+				country_codes,
+				min_rounds,
+				default_session,
+				concurrency=concurrency,
+				include_global=include_global,
+				progress=progress,
+				raise_errors=raise_errors,
+			):
+				yield high_score
+		return
+
+	if progress is None:
+		progress = CrawlProgress()
+	partitions = _partitions(country_codes, progress, include_global=include_global)
+	crawl = _Crawl(session, challenge_token, min_rounds, concurrency, progress, None)
+	async for high_score in crawl.high_scores(partitions):
+		yield high_score
+	if raise_errors and progress.errors:
+		raise next(iter(progress.errors.values()))
+
+
+async def top_challenge_highscores_async(
+	challenge_token: 'ChallengeToken',
+	n: int,
+	country_codes: Collection['CountryCode'] = default_country_codes,
+	min_rounds: int | None = 5,
+	session: 'aiohttp.ClientSession | None' = None,
+	*,
+	concurrency: int = 8,
+	include_global: bool = True,
+	progress: CrawlProgress | None = None,
+	raise_errors: bool = True,
+) -> list[ChallengeHighscore]:
+	"""Gets the top n highscores for a challenge, using crawl_challenge_highscores_async. Pages are in order of score, so each country stops as soon as it gets to scores that are too low to be in the top n.
+	include_global defaults to True here, as that also only goes as far as it needs to, and means players without a country can still be in the top n.
+
+	Returns:
+		Top n highscores, highest first
+	"""
+	if session is None:
+		async with get_default_async_session() as default_session:
+			return await top_challenge_highscores_async(
+				challenge_token,
+				n,
+				country_codes,
+				min_rounds,
+				default_session,
+				concurrency=concurrency,
+				include_global=include_global,
+				progress=progress,
+				raise_errors=raise_errors,
+			)
+
+	# (score, gameToken) so there is always something to compare for equal scores
+	heap: list[tuple[int, str, ChallengeHighscore]] = []
+
+	def should_stop(page: ChallengeHighscoresPage) -> bool:
+		if len(heap) < n or not page.items:
+			return False
+		return max(high_score.totalScore for high_score in page.items) < heap[0][0]
+
+	if progress is None:
+		progress = CrawlProgress()
+	partitions = _partitions(country_codes, progress, include_global=include_global)
+	crawl = _Crawl(session, challenge_token, min_rounds, concurrency, progress, should_stop)
+	async for high_score in crawl.high_scores(partitions):
+		entry = (high_score.totalScore, high_score.gameToken, high_score)
+		if len(heap) < n:
+			heapq.heappush(heap, entry)
+		elif entry[:2] > heap[0][:2]:
+			heapq.heapreplace(heap, entry)
+	if raise_errors and progress.errors:
+		raise next(iter(progress.errors.values()))
+	return [high_score for _, _, high_score in sorted(heap, key=lambda entry: entry[:2], reverse=True)]
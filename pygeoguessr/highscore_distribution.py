@@ -0,0 +1,95 @@
+"""Distribution of scores and times on a challenge leaderboard, without keeping every highscore around"""
+
+from collections.abc import AsyncIterable, Iterable
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+import pydantic
+
+from pygeoguessr.apis.challenges import ChallengeHighscore
+from pygeoguessr.lazy import peek_raw
+from pygeoguessr.tdigest import TDigest
+
+_timedelta_adapter = pydantic.TypeAdapter(timedelta)
+
+
+def _total_time(high_score: ChallengeHighscore) -> float | None:
+	"""game.player.totalTime in seconds, without validating the whole game if it hasn't been already"""
+	raw_game = peek_raw(high_score, 'game')
+	if isinstance(raw_game, dict):
+		player = raw_game.get('player')
+		total_time = player.get('totalTime') if isinstance(player, dict) else None
+		if isinstance(total_time, (int, float)) and not isinstance(total_time, bool):
+			return total_time
+		if isinstance(total_time, str):
+			return _timedelta_adapter.validate_python(total_time).total_seconds()
+	# Not validated yet and doesn't look like it should, so validate the game so that it raises the usual ValidationError
+	game = high_score.game
+	if game is None:
+		return None
+	return game.player.totalTime.total_seconds()
+
+
+def _check_percentile(percentile: float):
+	if not 0 <= percentile <= 100:
+		raise ValueError(f'percentile should be between 0 and 100, not {percentile}')
+
+
+@dataclass
+class HighscoreDistribution:
+	"""Approximate distribution of totalScore and game.player.totalTime of challenge highscores, using t-digests so memory use stays the same however many there are. Distributions for different partitions (e.g. countries) can be merged into one"""
+
+	scores: TDigest = field(default_factory=TDigest)
+	times: TDigest = field(default_factory=TDigest)
+	"""Seconds. Highscores without the game (from skip_lazy=True) are not counted here"""
+
+	@property
+	def count(self) -> int:
+		return int(self.scores.count)
+
+	def add(self, high_score: ChallengeHighscore):
+		self.scores.add(high_score.totalScore)
+		total_time = _total_time(high_score)
+		if total_time is not None:
+			self.times.add(total_time)
+
+	def update(self, high_scores: Iterable[ChallengeHighscore]):
+		for high_score in high_scores:
+			self.add(high_score)
+
+	async def update_async(self, high_scores: AsyncIterable[ChallengeHighscore]):
+		"""Adds everything from e.g. iter_challenge_highscores_async or crawl_challenge_highscores_async"""
+		async for high_score in high_scores:
+			self.add(high_score)
+
+	def merge(self, other: 'HighscoreDistribution'):
+		self.scores.merge(other.scores)
+		self.times.merge(other.times)
+
+	def score_percentile(self, score: float) -> float | None:
+		"""Approximate percentage (0 to 100) of highscores with a totalScore less than or equal to score, or None if there are none"""
+		if not self.scores.count:
+			return None
+		return self.scores.cdf(score) * 100
+
+	def score_at_percentile(self, percentile: float) -> float | None:
+		"""Approximate totalScore that percentile (0 to 100) percent of highscores are below, or None if there are none"""
+		_check_percentile(percentile)
+		if not self.scores.count:
+			return None
+		return self.scores.quantile(percentile / 100)
+
+	def time_percentile(self, time: timedelta | float) -> float | None:
+		"""Approximate percentage (0 to 100) of highscores that took less than or equal to time (in seconds if not a timedelta), or None if there are no highscores with a time"""
+		if not self.times.count:
+			return None
+		if isinstance(time, timedelta):
+			time = time.total_seconds()
+		return self.times.cdf(time) * 100
+
+	def time_at_percentile(self, percentile: float) -> timedelta | None:
+		"""Approximate time that percentile (0 to 100) percent of highscores took less than, or None if there are no highscores with a time"""
+		_check_percentile(percentile)
+		if not self.times.count:
+			return None
+		return timedelta(seconds=self.times.quantile(percentile / 100))
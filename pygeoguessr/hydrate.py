@@ -0,0 +1,171 @@
+"""Turning activities from the feed into the full games/duels/parties they refer to, getting lots of them at once"""
+
+import asyncio
+import contextlib
+from collections import deque
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Callable
+from typing import TYPE_CHECKING, Any
+
+from pygeoguessr.api import get_default_async_session
+from pygeoguessr.apis.activities import (
+	Activity,
+	InfinityGameActivity,
+	PlayedChallengeActivity,
+	PlayedCompetitiveActivity,
+	PlayedGameActivity,
+	PlayedMultiplayerActivity,
+	iter_activity_feed_async,
+)
+from pygeoguessr.apis.challenges import get_game_for_challenge_async
+from pygeoguessr.apis.games import Game, get_game_details_async
+from pygeoguessr.apis.multiplayer.duels import Duel, get_duel_details_async
+from pygeoguessr.apis.parties import PartyResponse, get_party_details_async
+from pygeoguessr.types import GameMode
+
+if TYPE_CHECKING:
+	import aiohttp
+
+Resolved = Game | Duel | PartyResponse | BaseException | None
+"""What an activity gets resolved to: None if it doesn't refer to anything (or what it refers to doesn't exist anymore), or the exception if it couldn't be resolved and return_exceptions is True"""
+
+_duel_modes = {GameMode.Duels, GameMode.TeamDuels}
+
+_fetchers: dict[str, Callable[[str, 'aiohttp.ClientSession'], Awaitable[Any]]] = {
+	'game': get_game_details_async,
+	'challenge': get_game_for_challenge_async,
+	'duel': get_duel_details_async,
+	'party': get_party_details_async,
+}
+
+
+def activity_reference(activity: Activity) -> tuple[str, str] | None:
+	"""What an activity refers to, as (kind, token), or None if it's not something that can be hydrated
+
+	Kinds are game (get_game_details), challenge (get_game_for_challenge, which is the logged in user's game and not necessarily the one from the activity if it is from the friends feed), duel (get_duel_details), and party (get_party_details)"""
+	payload = activity.payload
+	if isinstance(payload, (PlayedGameActivity, InfinityGameActivity)):
+		return 'game', payload.gameToken
+	if isinstance(payload, PlayedChallengeActivity):
+		return 'challenge', payload.challengeToken
+	if isinstance(payload, PlayedCompetitiveActivity) and payload.gameMode in _duel_modes:
+		return 'duel', payload.gameId
+	if isinstance(payload, PlayedMultiplayerActivity):
+		return 'party', payload.partyId
+	return None
+
+
+class _Hydrator:
+	def __init__(
+		self, session: 'aiohttp.ClientSession', concurrency: int, *, return_exceptions: bool
+	):
+		self.session = session
+		self.semaphore = asyncio.Semaphore(concurrency)
+		self.return_exceptions = return_exceptions
+		self.in_flight: dict[tuple[str, str], asyncio.Task] = {}
+		"""So activities that refer to the same thing (while it is still being fetched) all wait for the same request"""
+		self.waiting: dict[tuple[str, str], int] = {}
+
+	async def _fetch(self, kind: str, token: str) -> Any:
+		async with self.semaphore:
+			return await _fetchers[kind](token, self.session)
+
+	async def resolve(self, activity: Activity) -> tuple[Activity, Resolved]:
+		reference = activity_reference(activity)
+		if reference is None:
+			return activity, None
+		task = self.in_flight.get(reference)
+		if task is None:
+			task = asyncio.create_task(self._fetch(*reference))
+			self.in_flight[reference] = task
+		self.waiting[reference] = self.waiting.get(reference, 0) + 1
+		try:
+			# shield so one activity being cancelled doesn't cancel it for the others waiting on it
+			resolved = await asyncio.shield(task)
+		except Exception as e:
+			if not self.return_exceptions:
+				raise
+			resolved = e
+		finally:
+			self.waiting[reference] -= 1
+			if not self.waiting[reference]:
+				del self.waiting[reference]
+				# Not kept around afterwards, as that would end up keeping every single game in memory
+				self.in_flight.pop(reference, None)
+		return activity, resolved
+
+
+async def hydrate_activities(
+	activities: AsyncIterable[Activity] | None = None,
+	session: 'aiohttp.ClientSession | None' = None,
+	*,
+	concurrency: int = 8,
+	ordered: bool = False,
+	max_pending: int | None = None,
+	return_exceptions: bool = False,
+) -> AsyncIterator[tuple[Activity, Resolved]]:
+	"""Gets whatever each activity refers to (see activity_reference), concurrently, while still going through the feed.
+
+	Arguments:
+		activities: Defaults to iter_activity_feed_async, this can also be that with filters or a different feed etc
+		session: Used for getting the activity feed (if activities is None) and everything it refers to
+		concurrency: Maximum number of things being fetched at once. Note that settings.max_connections still applies on top of that
+		ordered: Yield in the same order as activities, instead of as soon as each one is done
+		max_pending: Maximum number of activities that have been taken from activities but not yielded yet, defaults to 4 * concurrency. Once there are this many, no more activities are taken until some are yielded
+		return_exceptions: If getting something raises an exception, yield it as the resolved object instead of raising it
+
+	Yields:
+		(activity, resolved object), where the resolved object is None for activities that don't refer to anything
+	"""
+	if session is None:
+		async with get_default_async_session() as default_session:
+			async for pair in hydrate_activities(
+				activities,
+				default_session,
+				concurrency=concurrency,
+				ordered=ordered,
+				max_pending=max_pending,
+				return_exceptions=return_exceptions,
+			):
+				yield pair
+		return
+
+	if activities is None:
+		activities = iter_activity_feed_async(session=session)
+	max_pending = max_pending or concurrency * 4
+	hydrator = _Hydrator(session, concurrency, return_exceptions=return_exceptions)
+	# For ordered, only the front is ever waited on
+	pending: deque[asyncio.Task[tuple[Activity, Resolved]]] = deque()
+
+	async def wait_for_some(*, block: bool) -> list[tuple[Activity, Resolved]]:
+		if ordered:
+			done = []
+			while pending and (pending[0].done() or (block and not done)):
+				done.append(await pending.popleft())
+			return done
+		if not block:
+			ready = [task for task in pending if task.done()]
+		else:
+			finished, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+			ready = list(finished)
+		done = []
+		for task in ready:
+			# One at a time, so if one raises, the rest are still in pending and get cleaned up
+			done.append(task.result())
+			pending.remove(task)
+		return done
+
+	try:
+		async for activity in activities:
+			pending.append(asyncio.create_task(hydrator.resolve(activity)))
+			for pair in await wait_for_some(block=len(pending) >= max_pending):
+				yield pair
+		while pending:
+			for pair in await wait_for_some(block=True):
+				yield pair
+	finally:
+		for task in pending:
+			task.cancel()
+		for task in hydrator.in_flight.values():
+			task.cancel()
+		with contextlib.suppress(asyncio.CancelledError):
+			await asyncio.gather(*pending, *hydrator.in_flight.values(), return_exceptions=True)
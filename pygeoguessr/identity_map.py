@@ -0,0 +1,71 @@
+"""Sharing one object between identical users, maps etc that come up over and over in different responses (e.g. the user of each activity), and one str between identical short strings, so that each one doesn't take up memory separately and they can be compared with "is". Only used if settings.use_identity_map is True"""
+
+import sys
+import threading
+import weakref
+from typing import TypeVar
+
+import pydantic
+
+from pygeoguessr import settings
+
+T = TypeVar('T', bound=pydantic.BaseModel)
+
+max_interned_length = 64
+"""Strings longer than this are not interned by intern_strings, as they are less likely to be repeated"""
+
+
+class IdentityMap:
+	"""Models keyed by (type, ID), only holding onto them as long as something else is.
+	Anything returned from here may be the same object as was returned before, so don't modify it"""
+
+	def __init__(self):
+		self._entities: weakref.WeakValueDictionary[tuple[type, str], pydantic.BaseModel] = (
+			weakref.WeakValueDictionary()
+		)
+		self._lock = threading.Lock()
+
+	def canonical(self, entity: T, entity_id: str) -> T:
+		"""Returns an existing entity with this ID if it is equal to this one, otherwise this one, which is then what is returned for this ID from now on (as it is presumably the newest)"""
+		key = (type(entity), entity_id)
+		with self._lock:
+			existing = self._entities.get(key)
+			if existing is not None and existing == entity:
+				return existing  # type: ignore[return-value] #It's always stored under its own type
+			self._entities[key] = entity
+		return entity
+
+	def clear(self):
+		with self._lock:
+			self._entities.clear()
+
+	def __len__(self) -> int:
+		return len(self._entities)
+
+
+identity_map = IdentityMap()
+
+
+def intern_strings(model: pydantic.BaseModel):
+	"""Replaces each short str field of a model (not ones in nested models) with the interned version"""
+	values = model.__dict__
+	for name, value in values.items():
+		# type() and not isinstance(), as str enums etc shouldn't be turned into plain str
+		if type(value) is str and len(value) <= max_interned_length:
+			values[name] = sys.intern(value)
+
+
+def canonical(entity: T, entity_id: str) -> T:
+	"""Shared instance of an entity from identity_map (with its strings interned), if settings.use_identity_map is on, otherwise just the entity"""
+	if not settings.use_identity_map:
+		return entity
+	shared = identity_map.canonical(entity, entity_id)
+	if shared is entity:
+		intern_strings(entity)
+	return shared
+
+
+def canonical_strings(model: pydantic.BaseModel):
+	"""intern_strings, if settings.use_identity_map is on"""
+	if settings.use_identity_map:
+		intern_strings(model)
@@ -0,0 +1,142 @@
+"""Nested fields that are expensive to validate and often not needed (e.g. the whole game in each challenge highscore), which can be validated only when they are first used, or skipped entirely"""
+
+from functools import cache
+from typing import Any, TypeVar
+
+import pydantic
+from pydantic_core import core_schema, from_json
+
+from pygeoguessr import settings
+
+skip_lazy_context = {'skip_lazy': True}
+"""Validation context for leaving out every Lazy field (they will be None), for getters with skip_lazy=True"""
+eager_context = {'eager': True}
+"""Validation context for validating every Lazy field straight away even if settings.lazy_nested_fields is on, so that any errors are raised from validating the response"""
+
+T = TypeVar('T')
+
+
+@cache
+def _adapter(source: Any) -> pydantic.TypeAdapter:
+	return pydantic.TypeAdapter(source)
+
+
+_unvalidated = object()
+
+
+class LazyValue:
+	"""What is actually stored for a Lazy field until it is first accessed"""
+
+	__slots__ = ('_value', 'context', 'raw', 'source')
+
+	def __init__(self, source: Any, raw: Any, context: Any):
+		self.source = source
+		self.raw = raw
+		"""Value from the JSON, which is whatever json.loads would return"""
+		self.context = context
+		self._value: Any = _unvalidated
+
+	def validate(self) -> Any:
+		"""Validates raw the first time, and returns the same result after that (e.g. if it was dumped before being accessed)"""
+		if self._value is _unvalidated:
+			self._value = _adapter(self.source).validate_python(self.raw, context=self.context)
+		return self._value
+
+	def __eq__(self, other: object) -> bool:
+		if isinstance(other, LazyValue):
+			return self.source == other.source and self.raw == other.raw
+		# For comparing models where the field has been accessed in one but not the other
+		return self.validate() == other
+
+	__hash__ = None  # type: ignore[assignment]
+
+	def __repr__(self) -> str:
+		return f'LazyValue({self.raw!r})'
+
+
+class Lazy:
+	"""Annotated metadata for a field that is only validated when it is first accessed (if settings.lazy_nested_fields is on), and left out if the getter was called with skip_lazy=True. Any validation error is then raised from accessing it instead of from the getter. Getters need to use validate_lazy_json for either of those to happen, otherwise the field is validated like normal
+
+	e.g. game: Annotated[Game, Lazy()]"""
+
+	def __get_pydantic_core_schema__(
+		self, source: Any, handler: pydantic.GetCoreSchemaHandler
+	) -> core_schema.CoreSchema:
+		schema = handler(source)
+		# Validating from JSON uses the field's usual schema as is, so that it's just as fast as without Lazy, and only validating from Python objects (see validate_lazy_json) does anything lazily
+		return core_schema.json_or_python_schema(
+			json_schema=schema,
+			python_schema=core_schema.with_info_wrap_validator_function(
+				lambda value, validate, info: _validate(source, value, validate, info), schema
+			),
+			serialization=core_schema.wrap_serializer_function_ser_schema(
+				_serialize, schema=schema, info_arg=False
+			),
+		)
+
+
+def _validate(
+	source: Any,
+	value: Any,
+	validate: core_schema.ValidatorFunctionWrapHandler,
+	info: core_schema.ValidationInfo,
+) -> Any:
+	if info.context and info.context.get('skip_lazy'):
+		return None
+	if not settings.lazy_nested_fields or (info.context and info.context.get('eager')):
+		return validate(value)
+	return LazyValue(source, value, info.context)
+
+
+def _serialize(value: Any, serialize: core_schema.SerializerFunctionWrapHandler) -> Any:
+	# Validated first so that the output is the same whether or not the field has been accessed, and the LazyValue keeps the result so it is only validated once
+	if isinstance(value, LazyValue):
+		value = value.validate()
+	return serialize(value)
+
+
+def peek_raw(model: pydantic.BaseModel, field: str) -> Any:
+	"""Value of a Lazy field as it was in the JSON (i.e. whatever json.loads would return) if it hasn't been validated yet, for getting a small part of it without validating all of it. None if it has been validated already or was left out, in which case just use the field"""
+	value = model.__dict__.get(field)
+	if isinstance(value, LazyValue) and value._value is _unvalidated:
+		return value.raw
+	return None
+
+
+def validate_lazy_json(
+	source: type[T] | pydantic.TypeAdapter[T], data: str | bytes, *, skip_lazy: bool = False
+) -> T:
+	"""Validates a response that has Lazy fields in it, for the getters. If settings.lazy_nested_fields is on or skip_lazy is True, the JSON is parsed first and then validated from that, as otherwise the Lazy fields would be validated like any other field"""
+	adapter = source if isinstance(source, pydantic.TypeAdapter) else _adapter(source)
+	if skip_lazy or settings.lazy_nested_fields:
+		return adapter.validate_python(
+			from_json(data), context=skip_lazy_context if skip_lazy else None
+		)
+	return adapter.validate_json(data)
+
+
+class _LazyField:
+	"""Put on the model class in place of each Lazy field, so that accessing the field validates it and replaces it with the result"""
+
+	def __init__(self, name: str):
+		self.name = name
+
+	def __get__(self, instance: pydantic.BaseModel | None, owner: type) -> Any:
+		if instance is None:
+			# Pretend to not be here, otherwise pydantic would think this is the default value when the model is subclassed
+			raise AttributeError(self.name)
+		value = instance.__dict__[self.name]
+		if isinstance(value, LazyValue):
+			value = value.validate()
+			instance.__dict__[self.name] = value
+		return value
+
+	def __set__(self, instance: pydantic.BaseModel, value: Any):
+		instance.__dict__[self.name] = value
+
+
+def install_lazy_fields(model: type[pydantic.BaseModel]):
+	"""Called for each model when it is created (by settings.BaseModel)"""
+	for name, field in model.model_fields.items():
+		if any(isinstance(metadata, Lazy) for metadata in field.metadata):
+			setattr(model, name, _LazyField(name))
@@ -0,0 +1,332 @@
+"""Smaller versions of Game, Duel and Activity for keeping lots of them in memory at once, which only have the fields that are useful for analysing them, and are made straight from the JSON without validating it.
+
+Field names are the same as the full models (and country codes are uppercase like theirs), but times are Unix timestamps and durations are seconds (as floats), and nested objects that are only there for formatting are left out"""
+
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any
+
+import pydantic_core
+
+from pygeoguessr.apis.activities import ActivityType
+
+
+def _timestamp(value: str | None) -> float | None:
+	if not value:
+		return None
+	d = datetime.fromisoformat(value)
+	return (d if d.tzinfo else d.replace(tzinfo=UTC)).timestamp()
+
+
+def _required_timestamp(value: str) -> float:
+	# For times that the full models require, so an empty one means the response isn't what it should be
+	timestamp = _timestamp(value)
+	if timestamp is None:
+		raise ValueError(f'Expected a timestamp, got {value!r}')
+	return timestamp
+
+
+def _country_code(value: str | None) -> str | None:
+	# Same as types.CountryCode
+	return value.upper() if value else None
+
+
+def _seconds(value: float | str) -> float:
+	# pydantic can also take ISO 8601 durations, but the API only uses numbers of seconds as far as I know
+	return float(value)
+
+
+@dataclass(slots=True)
+class LiteGameRound:
+	lat: float
+	lng: float
+	streakLocationCode: str | None
+	startTime: float | None
+	"""Unix timestamp"""
+
+	@classmethod
+	def from_dict(cls, d: dict[str, Any]) -> 'LiteGameRound':
+		return cls(
+			d['lat'],
+			d['lng'],
+			_country_code(d.get('streakLocationCode')),
+			_timestamp(d.get('startTime')),
+		)
+
+
+@dataclass(slots=True)
+class LiteGuess:
+	"""StandardGameGuess"""
+
+	lat: float
+	lng: float
+	roundScoreInPoints: int
+	distanceInMeters: float
+	time: float
+	"""Seconds"""
+	stepsCount: int | None
+	timedOut: bool
+	streakLocationCode: str | None
+
+	@classmethod
+	def from_dict(cls, d: dict[str, Any]) -> 'LiteGuess':
+		return cls(
+			d['lat'],
+			d['lng'],
+			d['roundScoreInPoints'],
+			d['distanceInMeters'],
+			_seconds(d['time']),
+			d.get('stepsCount'),
+			d['timedOut'],
+			_country_code(d.get('streakLocationCode')),
+		)
+
+
+@dataclass(slots=True)
+class LiteGame:
+	token: str
+	type: str
+	"""GameType value"""
+	mode: str
+	streakType: str
+	"""StreakType value"""
+	state: str
+	map: str
+	"""Map slug"""
+	roundCount: int
+	timeLimit: float
+	"""Seconds, 0 for no time limit"""
+	bounds: tuple[float, float, float, float]
+	"""min lat, min lng, max lat, max lng"""
+	userId: str
+	"""player.id"""
+	countryCode: str
+	"""player.countryCode"""
+	totalScore: int
+	"""Sum of roundScoreInPoints"""
+	totalDistanceInMeters: float
+	totalTime: float
+	"""Seconds"""
+	rounds: list[LiteGameRound]
+	guesses: list[LiteGuess]
+	"""player.guesses"""
+
+	@classmethod
+	def from_dict(cls, d: dict[str, Any]) -> 'LiteGame':
+		player = d['player']
+		bounds = d['bounds']
+		guesses = [LiteGuess.from_dict(guess) for guess in player['guesses']]
+		return cls(
+			d['token'],
+			d['type'],
+			d['mode'],
+			d['streakType'],
+			d['state'],
+			d['map'],
+			d['roundCount'],
+			_seconds(d['timeLimit']),
+			(bounds['min']['lat'], bounds['min']['lng'], bounds['max']['lat'], bounds['max']['lng']),
+			player['id'],
+			player['countryCode'].upper(),
+			sum(guess.roundScoreInPoints for guess in guesses),
+			player['totalDistanceInMeters'],
+			_seconds(player['totalTime']),
+			[LiteGameRound.from_dict(game_round) for game_round in d['rounds']],
+			guesses,
+		)
+
+	@classmethod
+	def from_json(cls, data: bytes | str) -> 'LiteGame':
+		"""From the response of get_game_details"""
+		return cls.from_dict(pydantic_core.from_json(data))
+
+
+@dataclass(slots=True)
+class LiteDuelGuess:
+	roundNumber: int
+	lat: float
+	lng: float
+	distance: float
+	"""Metres"""
+	score: int | None
+	created: float | None
+	"""Unix timestamp"""
+	isTeamsBestGuessOnRound: bool
+
+	@classmethod
+	def from_dict(cls, d: dict[str, Any]) -> 'LiteDuelGuess':
+		return cls(
+			d['roundNumber'],
+			d['lat'],
+			d['lng'],
+			d['distance'],
+			d.get('score'),
+			_timestamp(d.get('created')),
+			d['isTeamsBestGuessOnRound'],
+		)
+
+
+@dataclass(slots=True)
+class LiteDuelPlayer:
+	playerId: str
+	rating: int
+	countryCode: str
+	guesses: list[LiteDuelGuess]
+
+	@classmethod
+	def from_dict(cls, d: dict[str, Any]) -> 'LiteDuelPlayer':
+		return cls(
+			d['playerId'],
+			d['rating'],
+			d['countryCode'].upper(),
+			[LiteDuelGuess.from_dict(guess) for guess in d['guesses']],
+		)
+
+
+@dataclass(slots=True)
+class LiteDuelRoundResult:
+	roundNumber: int
+	score: int
+	healthBefore: int
+	healthAfter: int
+
+	@classmethod
+	def from_dict(cls, d: dict[str, Any]) -> 'LiteDuelRoundResult':
+		return cls(d['roundNumber'], d['score'], d['healthBefore'], d['healthAfter'])
+
+
+@dataclass(slots=True)
+class LiteDuelTeam:
+	id: str
+	name: str
+	health: int
+	players: list[LiteDuelPlayer]
+	roundResults: list[LiteDuelRoundResult]
+
+	@classmethod
+	def from_dict(cls, d: dict[str, Any]) -> 'LiteDuelTeam':
+		return cls(
+			d['id'],
+			d['name'],
+			d['health'],
+			[LiteDuelPlayer.from_dict(player) for player in d['players']],
+			[LiteDuelRoundResult.from_dict(result) for result in d['roundResults']],
+		)
+
+
+@dataclass(slots=True)
+class LiteDuelRound:
+	roundNumber: int
+	lat: float
+	"""panorama.lat"""
+	lng: float
+	"""panorama.lng"""
+	countryCode: str | None
+	"""panorama.countryCode"""
+	multiplier: float
+	damageMultiplier: float
+	isHealingRound: bool
+	startTime: float | None
+	"""Unix timestamp"""
+	endTime: float | None
+	"""Unix timestamp"""
+	timerStartTime: float | None
+	"""Unix timestamp"""
+
+	@classmethod
+	def from_dict(cls, d: dict[str, Any]) -> 'LiteDuelRound':
+		panorama = d['panorama']
+		return cls(
+			d['roundNumber'],
+			panorama['lat'],
+			panorama['lng'],
+			_country_code(panorama.get('countryCode')),
+			d['multiplier'],
+			d['damageMultiplier'],
+			d['isHealingRound'],
+			_timestamp(d.get('startTime')),
+			_timestamp(d.get('endTime')),
+			_timestamp(d.get('timerStartTime')),
+		)
+
+
+@dataclass(slots=True)
+class LiteDuel:
+	gameId: str
+	status: str
+	competitiveGameMode: str
+	"""options.competitiveGameMode"""
+	mapSlug: str
+	"""options.mapSlug"""
+	maxErrorDistance: float | None
+	"""options.map.maxErrorDistance"""
+	initialHealth: int
+	isRated: bool
+	"""options.isRated"""
+	rounds: list[LiteDuelRound]
+	teams: list[LiteDuelTeam]
+	winningTeamId: str | None
+	"""result.winningTeamId, None if not finished"""
+	isDraw: bool
+
+	@classmethod
+	def from_dict(cls, d: dict[str, Any]) -> 'LiteDuel':
+		options = d['options']
+		duel_map = options.get('map')
+		result = d.get('result')
+		return cls(
+			d['gameId'],
+			d['status'],
+			options['competitiveGameMode'],
+			options['mapSlug'],
+			duel_map['maxErrorDistance'] if duel_map else None,
+			d['initialHealth'],
+			options['isRated'],
+			[LiteDuelRound.from_dict(duel_round) for duel_round in d['rounds']],
+			[LiteDuelTeam.from_dict(team) for team in d['teams']],
+			result['winningTeamId'] if result else None,
+			result['isDraw'] if result else False,
+		)
+
+	@classmethod
+	def from_json(cls, data: bytes | str) -> 'LiteDuel':
+		"""From the response of get_duel_details"""
+		return cls.from_dict(pydantic_core.from_json(data))
+
+
+@dataclass(slots=True)
+class LiteActivity:
+	type: ActivityType
+	time: float
+	"""Unix timestamp"""
+	userId: str
+	payload: dict[str, Any]
+	"""As it is in the JSON, i.e. what would be validated into PlayedGameActivity etc"""
+
+
+def lite_activities_from_feed_page(data: bytes | str) -> tuple[list[LiteActivity], str | None]:
+	"""From a response of the activity feed, with anything in MultipleActivities being separate activities like iter_activity_feed does
+
+	Returns:
+		Activities, and the paginationToken of the next page"""
+	page = pydantic_core.from_json(data)
+	activities = []
+	for entry in page['entries']:
+		user_id = entry['user']['id']
+		activity_type = ActivityType(entry['type'])
+		payload = pydantic_core.from_json(entry['payload'])
+		if activity_type == ActivityType.MultipleActivities:
+			activities.extend(
+				LiteActivity(
+					ActivityType(subentry['type']),
+					_required_timestamp(subentry['time']),
+					user_id,
+					subentry['payload'],
+				)
+				for subentry in payload
+			)
+		else:
+			activities.append(
+				LiteActivity(activity_type, _required_timestamp(entry['time']), user_id, payload)
+			)
+	return activities, page.get('paginationToken')
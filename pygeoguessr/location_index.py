@@ -0,0 +1,141 @@
+"""Index of locations from rounds of games and duels, for finding out if a location has come up before (the same panorama, or somewhere close by) without comparing every round with every other round"""
+
+import math
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from typing import Literal, NamedTuple
+
+from pygeoguessr.apis.games import Game
+from pygeoguessr.apis.multiplayer.duels import Duel
+from pygeoguessr.scoring import earth_radius, haversine
+
+_metres_per_degree = earth_radius * math.pi / 180
+
+
+class IndexedLocation(NamedTuple):
+	source: Literal['game', 'duel']
+	token: str
+	"""Game token or duel ID"""
+	round_number: int
+	"""Starts at 1"""
+	lat: float
+	lng: float
+	pano_id: str | None
+
+
+class LocationIndex:
+	"""Locations by panorama ID, and in a grid of cell_size degree cells for finding the ones near somewhere. Locations can be added at any time"""
+
+	def __init__(self, cell_size: float = 0.05):
+		"""Arguments:
+		cell_size: Size of each grid cell in degrees, which should be around the size of the radius usually used for looking up (0.05 is around 5 km)"""
+		self.cell_size = cell_size
+		self._columns = math.ceil(360 / cell_size)
+		self._by_pano: dict[str, list[IndexedLocation]] = defaultdict(list)
+		self._cells: dict[tuple[int, int], list[IndexedLocation]] = defaultdict(list)
+		self._count = 0
+
+	def __len__(self) -> int:
+		return self._count
+
+	def _cell(self, lat: float, lng: float) -> tuple[int, int]:
+		return (
+			math.floor((lat + 90) / self.cell_size),
+			math.floor((lng + 180) / self.cell_size) % self._columns,
+		)
+
+	def add(self, location: IndexedLocation):
+		if location.pano_id:
+			self._by_pano[location.pano_id].append(location)
+		self._cells[self._cell(location.lat, location.lng)].append(location)
+		self._count += 1
+
+	def add_game(self, game: Game):
+		for round_number, game_round in enumerate(game.rounds, 1):
+			self.add(
+				IndexedLocation(
+					'game', game.token, round_number, game_round.lat, game_round.lng, game_round.panoId
+				)
+			)
+
+	def add_duel(self, duel: Duel):
+		for duel_round in duel.rounds:
+			panorama = duel_round.panorama
+			self.add(
+				IndexedLocation(
+					'duel',
+					duel.gameId,
+					duel_round.roundNumber,
+					panorama.lat,
+					panorama.lng,
+					panorama.panoId,
+				)
+			)
+
+	def update(self, games_or_duels: Iterable[Game | Duel]):
+		for game_or_duel in games_or_duels:
+			if isinstance(game_or_duel, Duel):
+				self.add_duel(game_or_duel)
+			else:
+				self.add_game(game_or_duel)
+
+	def with_pano(self, pano_id: str) -> list[IndexedLocation]:
+		return list(self._by_pano.get(pano_id, ()))
+
+	def _candidates(self, lat: float, lng: float, radius: float) -> Iterator[IndexedLocation]:
+		lat_span = radius / _metres_per_degree
+		min_row, _ = self._cell(max(lat - lat_span, -90), lng)
+		max_row, _ = self._cell(min(lat + lat_span, 90), lng)
+		# Widest at whichever edge of the area is closest to a pole
+		widest_lat = min(abs(lat) + lat_span, 90)
+		cos_lat = math.cos(math.radians(widest_lat))
+		if cos_lat * 180 <= radius / _metres_per_degree:
+			columns: Iterable[int] = range(self._columns)
+		else:
+			lng_span = lat_span / cos_lat
+			_, first_column = self._cell(lat, lng - lng_span)
+			column_count = min(math.ceil(2 * lng_span / self.cell_size) + 2, self._columns)
+			columns = [(first_column + i) % self._columns for i in range(column_count)]
+			columns = list(dict.fromkeys(columns))
+		cell_count = (max_row - min_row + 1) * len(columns)
+		if cell_count > len(self._cells):
+			# Fewer cells with something in them than cells in the area, so just go through those
+			rows = range(min_row, max_row + 1)
+			column_set = set(columns)
+			for (row, column), locations in self._cells.items():
+				if row in rows and column in column_set:
+					yield from locations
+			return
+		for row in range(min_row, max_row + 1):
+			for column in columns:
+				yield from self._cells.get((row, column), ())
+
+	def within(self, lat: float, lng: float, radius: float) -> list[tuple[float, IndexedLocation]]:
+		"""Locations within radius metres of (lat, lng)
+
+		Returns:
+			(distance in metres, location), closest first"""
+		found = []
+		for location in self._candidates(lat, lng, radius):
+			d = haversine(lat, lng, location.lat, location.lng)
+			if d <= radius:
+				found.append((d, location))
+		found.sort(key=lambda pair: pair[0])
+		return found
+
+	def seen(
+		self, lat: float, lng: float, pano_id: str | None = None, radius: float = 0
+	) -> list[IndexedLocation]:
+		"""Locations that have the same panorama ID, or are within radius metres, i.e. whether a location has come up before"""
+		found = dict.fromkeys(self._by_pano.get(pano_id, ())) if pano_id else {}
+		for _, location in self.within(lat, lng, radius):
+			found[location] = None
+		return list(found)
+
+	def reused_panos(self) -> dict[str, list[IndexedLocation]]:
+		"""Panorama IDs that have come up in more than one round, and each round they came up in"""
+		return {
+			pano_id: list(locations)
+			for pano_id, locations in self._by_pano.items()
+			if len(locations) > 1
+		}
@@ -6,6 +6,8 @@ from typing import Annotated, Any, Literal
 
 import pydantic
 
+from pygeoguessr.entity_store import remember
+from pygeoguessr.identity_map import canonical, canonical_strings
 from pygeoguessr.settings import BaseModel
 
 # ruff: noqa: TC001
@@ -289,6 +291,14 @@ class Map(BaseModel):
 	"""How the map was made, and therefore how locations are chosen. I don't know how official maps (0) work exactly in that sense, maybe it's a secret"""
 	tags: list[str]
 
+	@pydantic.model_validator(mode='after')
+	def _share_and_remember_creator(self) -> 'Map':
+		canonical_strings(self)
+		if self.creator:
+			self.creator = canonical(self.creator, self.creator.id)
+			remember(self.creator, self.creator.id)
+		return self
+
 
 class LevelInfo(BaseModel):
 	level: int
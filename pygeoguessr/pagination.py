@@ -0,0 +1,137 @@
+"""Going through token-paginated endpoints, getting the next pages in the background while the current one is being used"""
+
+import asyncio
+import contextlib
+import queue
+import threading
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator
+from typing import Generic, TypeVar
+
+PageT = TypeVar('PageT')
+
+
+class _Done(Generic[PageT]):
+	def __init__(self, error: BaseException | None = None):
+		self.error = error
+
+
+async def _fetch_pages(
+	queue: 'asyncio.Queue[PageT | _Done[PageT]]',
+	slots: asyncio.Semaphore,
+	get_page: Callable[[str | None], Awaitable[PageT]],
+	next_token: Callable[[PageT], str | None],
+):
+	try:
+		pagination_token = None
+		while True:
+			# Released once the consumer takes a page out of the queue
+			await slots.acquire()
+			page = await get_page(pagination_token)
+			await queue.put(page)
+			pagination_token = next_token(page)
+			if not pagination_token:
+				break
+	except Exception as e:  # noqa: BLE001 #It gets raised on the other side of the queue
+		await queue.put(_Done(e))
+	else:
+		await queue.put(_Done())
+
+
+async def iter_pages(
+	get_page: Callable[[str | None], Awaitable[PageT]],
+	next_token: Callable[[PageT], str | None],
+	lookahead: int = 1,
+) -> AsyncIterator[PageT]:
+	"""Yields each page, starting with a pagination token of None and then getting next_token from each page until it is None or empty.
+
+	Arguments:
+		get_page: Gets a page from a pagination token
+		next_token: Gets the token for the next page out of a page
+		lookahead: How many pages to get ahead of the one currently being used, in a background task, so the next one is (hopefully) already there by the time it is needed. If 0, each page is only requested once the previous one is done with
+	"""
+	if lookahead <= 0:
+		pagination_token = None
+		while True:
+			page = await get_page(pagination_token)
+			yield page
+			pagination_token = next_token(page)
+			if not pagination_token:
+				return
+
+	queue: asyncio.Queue[PageT | _Done[PageT]] = asyncio.Queue()
+	# Pages that have been or are being fetched, but haven't been taken by the consumer yet (the page the consumer is using doesn't count)
+	slots = asyncio.Semaphore(lookahead)
+	task = asyncio.create_task(_fetch_pages(queue, slots, get_page, next_token))
+	try:
+		while True:
+			item = await queue.get()
+			slots.release()
+			if isinstance(item, _Done):
+				if item.error:
+					raise item.error
+				return
+			yield item
+	finally:
+		# If whatever is using this stopped early, we don't want to keep getting pages for nothing
+		task.cancel()
+		with contextlib.suppress(asyncio.CancelledError):
+			await task
+
+
+def iter_pages_in_thread(
+	get_page: Callable[[str | None], PageT],
+	next_token: Callable[[PageT], str | None],
+	lookahead: int = 1,
+) -> Iterator[PageT]:
+	"""Like iter_pages, but for sync code, where the pages are fetched in a background thread.
+
+	Arguments:
+		get_page: Gets a page from a pagination token, which will be called from the background thread
+		next_token: Gets the token for the next page out of a page
+		lookahead: How many pages to get ahead of the one currently being used. If 0, there is no background thread, and each page is only requested once the previous one is done with
+	"""
+	if lookahead <= 0:
+		pagination_token = None
+		while True:
+			page = get_page(pagination_token)
+			yield page
+			pagination_token = next_token(page)
+			if not pagination_token:
+				return
+
+	pages: queue.Queue[PageT | _Done[PageT]] = queue.Queue()
+	slots = threading.Semaphore(lookahead)
+	stopped = threading.Event()
+
+	def fetch_pages():
+		try:
+			pagination_token = None
+			while True:
+				slots.acquire()
+				if stopped.is_set():
+					return
+				page = get_page(pagination_token)
+				pages.put(page)
+				pagination_token = next_token(page)
+				if not pagination_token:
+					break
+		except Exception as e:  # noqa: BLE001 #It gets raised on the other side of the queue
+			pages.put(_Done(e))
+		else:
+			pages.put(_Done())
+
+	thread = threading.Thread(target=fetch_pages, name='pygeoguessr-prefetch', daemon=True)
+	thread.start()
+	try:
+		while True:
+			item = pages.get()
+			slots.release()
+			if isinstance(item, _Done):
+				if item.error:
+					raise item.error
+				return
+			yield item
+	finally:
+		# Not joined, as it might be in the middle of a request, but it will stop once that's done
+		stopped.set()
+		slots.release()
@@ -0,0 +1,255 @@
+"""Checking whether everything in the cache still validates against the models, e.g. after the models have changed, using a process pool as there is potentially a lot of it"""
+
+import asyncio
+import os
+from collections.abc import AsyncIterator, Callable, Collection, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from functools import cache
+from typing import TYPE_CHECKING, Any, Literal
+
+import pydantic
+from requests_cache.serializers import json_serializer
+
+from .api import _get_async_cache, _get_cache
+from .apis.activities import _ParsedActivityFeedPage
+from .apis.avatars import UserAvatarInfo
+from .apis.challenges import ChallengeDetailsResponse, ChallengeHighscoresPage, DailyChallengeInfo
+from .apis.explorer import ExplorerModeMapStat
+from .apis.games import Game
+from .apis.geocoding import CountryCodeResponse, TerrainResponse
+from .apis.maps import ExplorerMap
+from .apis.multiplayer.duels import Duel
+from .apis.multiplayer.lobby import Lobby
+from .apis.parties import PartyResponse
+from .apis.quizzes import QuizDetails, QuizLeaderboard
+from .apis.search import MapSearchResult, UserSearchResult
+from .apis.user_maps import MapDraft, UserMap
+from .apis.webshop import CoinClaimInfo, ShopCreatorBundle, ShopFeaturedDeal, ShopRandomItems
+from .cache import _iter_file_cache_keys, _response_body
+from .endpoints import endpoint_template
+from .lazy import eager_context
+from .models import Map, User, UserDetails, Wallet
+from .types import MapSlug
+
+if TYPE_CHECKING:
+	from .filesystem_cache_with_dirs import FileCacheWithDirectories
+	from .sqlite_cache_with_index import SQLiteBackendWithIndex
+
+
+endpoint_types: dict[str, Any] = {
+	'api/maps/explorer': list[ExplorerMap],
+	'api/maps/{map_slug}': Map,
+	'api/v3/challenges/daily-challenges/today': DailyChallengeInfo,
+	'api/v3/challenges/daily-challenges/previous': list[DailyChallengeInfo],
+	'api/v3/challenges/{challenge}/game': Game,
+	'api/v3/challenges/{challenge}': ChallengeDetailsResponse,
+	'api/v3/explorer/user/{user}': dict[MapSlug, ExplorerModeMapStat],
+	'api/v3/games/{game}': Game,
+	'api/v3/likes/{map_slug}': bool,
+	'api/v3/profiles/me': UserDetails,
+	'api/v3/profiles/wallet': Wallet,
+	'api/v3/quizzes/{quiz}/leaderboards/game': QuizLeaderboard,
+	'api/v3/quizzes/{quiz}': QuizDetails,
+	'api/v3/results/highscores/{challenge}': ChallengeHighscoresPage,
+	'api/v3/search/map': list[MapSearchResult],
+	'api/v3/search/user': list[UserSearchResult],
+	'api/v3/social/maps/browse/personalized': Map,
+	'api/v3/social/maps/browse/popular/official': list[Map],
+	'api/v3/social/maps/browse/random': Map,
+	'api/v3/social/maps/browse/streaks': list[Map],
+	'api/v3/users/{user}': User,
+	'api/v4/feed/private': _ParsedActivityFeedPage,
+	'api/v4/feed/friends': _ParsedActivityFeedPage,
+	'api/v4/avatar/user/{user}': UserAvatarInfo,
+	'api/v4/avatar': UserAvatarInfo,
+	'api/v4/geo-coding/country': CountryCodeResponse,
+	'api/v4/geo-coding/terrain': TerrainResponse,
+	'api/v4/parties/{party}': PartyResponse,
+	'api/v4/user-maps/dangling-drafts': list[UserMap],
+	'api/v4/user-maps/drafts': list[MapDraft],
+	'api/v4/user-maps/drafts/{map_slug}': MapDraft,
+	'api/v4/user-maps/maps/{map_slug}': UserMap,
+	'api/v4/webshop/conveyor-belt': list[ShopRandomItems],
+	'api/v4/webshop/creator-shop/products': list[ShopCreatorBundle],
+	'api/v4/webshop/daily-shop-claim': CoinClaimInfo,
+	'api/v4/webshop/featured-deals': list[ShopFeaturedDeal],
+	'api/duels/{lobby}': Duel,
+	'api/lobby/{lobby}': Lobby,
+}
+"""What each endpoint template returns"""
+
+
+@cache
+def _get_validator(template: str) -> Callable[[bytes], Any] | None:
+	response_type = endpoint_types.get(template)
+	if response_type is None:
+		return None
+	adapter = pydantic.TypeAdapter(response_type)
+	# Lazy fields need to be validated too, or errors in them wouldn't be found
+	return lambda data: adapter.validate_json(data, context=eager_context)
+
+
+@dataclass
+class RevalidationResult:
+	"""A cached response that doesn't validate anymore, or has fields the models don't know about"""
+
+	key: str
+	template: str
+	errors: list[str] = field(default_factory=list)
+	"""Each validation error, as location: message"""
+	unknown_fields: list[str] = field(default_factory=list)
+	"""Dotted paths (from the top level model) of fields that ended up in model_extra"""
+
+
+def _find_unknown_fields(value: Any, path: str, found: list[str]):
+	if isinstance(value, pydantic.BaseModel):
+		if value.model_extra:
+			found.extend(f'{path}.{name}' if path else name for name in value.model_extra)
+		for name in type(value).model_fields:
+			_find_unknown_fields(getattr(value, name), f'{path}.{name}' if path else name, found)
+	elif isinstance(value, (list, tuple)):
+		for item in value:
+			# Index doesn't matter, and leaving it out means the same field in each item gets reported the same way
+			_find_unknown_fields(item, f'{path}[]', found)
+	elif isinstance(value, dict):
+		for item in value.values():
+			_find_unknown_fields(item, f'{path}{{}}', found)
+
+
+def _validate_batch(
+	kind: Literal['file', 'sqlite'], batch: list[tuple[str, str, bytes]]
+) -> list[RevalidationResult]:
+	problems = []
+	for key, template, raw in batch:
+		validator = _get_validator(template)
+		if validator is None:
+			continue
+		result = RevalidationResult(key, template)
+		found: list[str] = []
+		try:
+			value = validator(_response_body(kind, raw))
+			# Inside the try in case anything it reads still validates something lazily
+			_find_unknown_fields(value, '', found)
+		except pydantic.ValidationError as e:
+			result.errors = [
+				f'{".".join(str(loc) for loc in error["loc"])}: {error["msg"]}'
+				for error in e.errors(include_url=False)
+			]
+		except Exception as e:  # noqa: BLE001 #Anything else wrong with it should be reported instead of stopping everything
+			result.errors = [f'{type(e).__name__}: {e}']
+		else:
+			# dict.fromkeys to remove duplicates but keep the order
+			result.unknown_fields = list(dict.fromkeys(found))
+		if result.errors or result.unknown_fields:
+			problems.append(result)
+	return problems
+
+
+def _batches(
+	entries: Iterable[tuple[str, str, bytes]], batch_size: int
+) -> Iterator[list[tuple[str, str, bytes]]]:
+	batch = []
+	for entry in entries:
+		batch.append(entry)
+		if len(batch) >= batch_size:
+			yield batch
+			batch = []
+	if batch:
+		yield batch
+
+
+def _iter_file_cache_entries(
+	cache: 'FileCacheWithDirectories', templates: Collection[str] | None
+) -> Iterator[tuple[str, str, bytes]]:
+	for key, path in _iter_file_cache_keys(cache):
+		template = endpoint_template(key)
+		if (templates is None or template in templates) and _get_validator(template):
+			try:
+				yield key, template, path.read_bytes()
+			except OSError:
+				# Deleted in the meantime
+				continue
+
+
+def revalidate_cache(
+	cache: 'FileCacheWithDirectories | None' = None,
+	templates: Collection[str] | None = None,
+	processes: int | None = None,
+	batch_size: int = 200,
+) -> Iterator[RevalidationResult]:
+	"""Validates every response in the sync cache against the model for its endpoint, across a process pool. Responses from endpoints without a model in endpoint_types are skipped.
+	Only works with the default JSON serializer, which is what the default cache uses.
+
+	Arguments:
+		cache: Defaults to the cache used by call_api
+		templates: Only check responses from these endpoint templates
+		processes: Size of the process pool, defaults to the number of CPUs
+
+	Yields:
+		RevalidationResult for each response that failed validation or has unknown fields, as soon as they are found (not in any particular order)
+	"""
+	if cache is None:
+		cache = _get_cache()
+	if getattr(cache.responses.serializer, 'name', None) != json_serializer.name:
+		raise ValueError('Only the default JSON serializer is supported')
+	processes = processes or os.cpu_count() or 1
+	with ProcessPoolExecutor(processes) as executor:
+		pending: set[Future[list[RevalidationResult]]] = set()
+		for batch in _batches(_iter_file_cache_entries(cache, templates), batch_size):
+			pending.add(executor.submit(_validate_batch, 'file', batch))
+			# Don't read the whole cache into memory while waiting for the pool to catch up
+			if len(pending) >= processes * 2:
+				done, pending = wait(pending, return_when=FIRST_COMPLETED)
+				for future in done:
+					yield from future.result()
+		for future in pending:
+			yield from future.result()
+
+
+async def revalidate_async_cache(
+	cache: 'SQLiteBackendWithIndex | None' = None,
+	templates: Collection[str] | None = None,
+	processes: int | None = None,
+	batch_size: int = 200,
+) -> AsyncIterator[RevalidationResult]:
+	"""Validates every response in the async cache against the model for its endpoint, across a process pool. Responses from endpoints without a model in endpoint_types are skipped.
+
+	Arguments:
+		cache: Defaults to the cache used by get_default_async_session
+		templates: Only check responses from these endpoint templates
+		processes: Size of the process pool, defaults to the number of CPUs
+
+	Yields:
+		RevalidationResult for each response that failed validation or has unknown fields, as soon as they are found (not in any particular order)
+	"""
+	if cache is None:
+		cache = _get_async_cache()
+	if await cache.index.size() < await cache.responses.size():
+		await cache.rebuild_index()
+	processes = processes or os.cpu_count() or 1
+	loop = asyncio.get_running_loop()
+	with ProcessPoolExecutor(processes) as executor:
+		pending: set[asyncio.Future[list[RevalidationResult]]] = set()
+		batch = []
+		async for key, row, raw in cache.raw_responses():
+			template = row.template
+			if (templates is not None and template not in templates) or not _get_validator(
+				template
+			):
+				continue
+			batch.append((key, template, raw))
+			if len(batch) < batch_size:
+				continue
+			pending.add(loop.run_in_executor(executor, _validate_batch, 'sqlite', batch))
+			batch = []
+			if len(pending) >= processes * 2:
+				done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+				for future in done:
+					for result in future.result():
+						yield result
+		if batch:
+			pending.add(loop.run_in_executor(executor, _validate_batch, 'sqlite', batch))
+		for future in asyncio.as_completed(pending):
+			for result in await future:
+				yield result
@@ -0,0 +1,124 @@
+"""Distances and scores for lots of guesses at once with NumPy, e.g. for what a guess would have scored on a different map"""
+
+import math
+from dataclasses import dataclass
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+from pygeoguessr.game_batch import GameBatch
+from pygeoguessr.models import MapBounds
+
+earth_radius = 6_371_000
+"""Mean radius in metres, which is close enough to what distanceInMeters uses"""
+max_round_score = 5000
+
+
+def great_circle_distance(
+	lat1: ArrayLike,
+	lng1: ArrayLike,
+	lat2: ArrayLike,
+	lng2: ArrayLike,
+	radius: float = earth_radius,
+) -> np.ndarray:
+	"""Haversine distance in metres between (lat1, lng1) and (lat2, lng2), in degrees. Arguments can be arrays (of the same shape or broadcastable) or single numbers"""
+	lat1, lng1, lat2, lng2 = (np.radians(a) for a in (lat1, lng1, lat2, lng2))
+	a = (
+		np.sin((lat2 - lat1) / 2) ** 2
+		+ np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+	)
+	# clip as rounding can put it slightly over 1 for antipodal points
+	return 2 * radius * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def haversine(
+	lat1: float, lng1: float, lat2: float, lng2: float, radius: float = earth_radius
+) -> float:
+	"""great_circle_distance for just one pair of points, which is quicker without NumPy"""
+	lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+	a = (
+		math.sin((lat2 - lat1) / 2) ** 2
+		+ math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+	)
+	return 2 * radius * math.asin(math.sqrt(min(a, 1)))
+
+
+def max_error_distance(bounds: MapBounds | ArrayLike) -> np.ndarray:
+	"""maxErrorDistance of a map from its bounds, which is the distance between the corners.
+
+	Arguments:
+		bounds: MapBounds, or array of (min lat, min lng, max lat, max lng) with shape (4,) or (n, 4) like GameBatch.bounds"""
+	if isinstance(bounds, MapBounds):
+		bounds = (bounds.min.lat, bounds.min.lng, bounds.max.lat, bounds.max.lng)
+	bounds = np.asarray(bounds, dtype=np.float64)
+	return great_circle_distance(bounds[..., 0], bounds[..., 1], bounds[..., 2], bounds[..., 3])
+
+
+def round_score(distance: ArrayLike, max_error_distance: ArrayLike) -> np.ndarray:
+	"""Score out of 5000 for a guess distance away from the location, on a map with this maxErrorDistance (from the map, DuelMap, or max_error_distance). Both are in metres
+
+	A maxErrorDistance of 0 (a map where the bounds are all the same point) gives 5000 for a distance of exactly 0 and 0 for anything else, instead of dividing by 0
+
+	Returns:
+		int32 array"""
+	distance = np.asarray(distance, dtype=np.float64)
+	max_error_distance = np.asarray(max_error_distance, dtype=np.float64)
+	has_area = max_error_distance > 0
+	with np.errstate(divide='ignore', invalid='ignore'):
+		points = max_round_score * np.exp(-10 * distance / max_error_distance)
+	points = np.where(has_area, points, np.where(distance == 0, max_round_score, 0))
+	return np.rint(points).astype(np.int32)
+
+
+def score_guesses(
+	guess_lat: ArrayLike,
+	guess_lng: ArrayLike,
+	actual_lat: ArrayLike,
+	actual_lng: ArrayLike,
+	max_error_distance: ArrayLike,
+) -> np.ndarray:
+	"""round_score for guesses at (guess_lat, guess_lng) where the location was (actual_lat, actual_lng), e.g. duel guesses against DuelLocation"""
+	return round_score(
+		great_circle_distance(guess_lat, guess_lng, actual_lat, actual_lng), max_error_distance
+	)
+
+
+@dataclass(frozen=True)
+class ScoreCheck:
+	"""Differences between what great_circle_distance and round_score give for the rounds in a GameBatch and what the API said, for checking that they are accurate. Only for rounds that are not in streak games and where the player didn't time out (or skip) without guessing"""
+
+	mask: np.ndarray
+	"""Rounds of the batch that were checked"""
+	distance_error: np.ndarray
+	"""Metres, computed minus distanceInMeters"""
+	score_error: np.ndarray
+	"""Computed minus roundScoreInPoints"""
+
+	@property
+	def matching(self) -> float:
+		"""Fraction of the checked rounds where the score is exactly the same"""
+		if not len(self.score_error):
+			return 1.0
+		return float(np.mean(self.score_error == 0))
+
+
+def check_scores(batch: GameBatch, max_error_distances: ArrayLike | None = None) -> ScoreCheck:
+	"""Recomputes distances and scores for every round of batch and compares them to distanceInMeters and roundScoreInPoints
+
+	Arguments:
+		max_error_distances: For each game, defaults to max_error_distance of each game's bounds (which should be the map's maxErrorDistance)"""
+	if max_error_distances is None:
+		max_error_distances = max_error_distance(batch.bounds)
+	max_error_distances = np.broadcast_to(
+		np.asarray(max_error_distances, dtype=np.float64), (batch.game_count,)
+	)
+	mask = ~batch.streak[batch.game_index] & ~batch.timed_out
+	distance = great_circle_distance(
+		batch.guess_lat[mask], batch.guess_lng[mask], batch.actual_lat[mask], batch.actual_lng[mask]
+	)
+	score = round_score(distance, max_error_distances[batch.game_index[mask]])
+	return ScoreCheck(
+		mask,
+		distance - batch.distance[mask],
+		score.astype(np.int64) - batch.score[mask],
+	)
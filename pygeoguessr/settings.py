@@ -8,7 +8,20 @@ default_timeout = 30
 max_connections: int | None = 1
 """Max simultaneous non-cached requests for async"""
 forbid_extra_fields = sys.flags.dev_mode or 'debugpy' in sys.modules
+use_entity_store = False
+"""Keep maps, users and games that come embedded in other responses (e.g. the map and creator in challenge details) in entity_store, so getting them on their own afterwards doesn't need another request"""
+use_identity_map = False
+"""Share one object between identical users and maps that come up in different responses (e.g. the user of every activity in the feed), and intern short strings like IDs and country codes, to save memory when keeping lots of responses around"""
+lazy_nested_fields = False
+"""Only validate the big nested fields marked as Lazy (e.g. the game in each challenge highscore) when they are first accessed, instead of when the response is. This means an invalid response only raises ValidationError once the field is accessed"""
 
 
 class BaseModel(pydantic.BaseModel):
 	model_config = pydantic.ConfigDict(extra='forbid' if forbid_extra_fields else 'allow')
+
+	@classmethod
+	def __pydantic_init_subclass__(cls, **kwargs):
+		super().__pydantic_init_subclass__(**kwargs)
+		from pygeoguessr.lazy import install_lazy_fields  # noqa: PLC0415 #lazy imports settings
+
+		install_lazy_fields(cls)
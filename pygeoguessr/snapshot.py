@@ -0,0 +1,341 @@
+"""Exporting the cache (or part of it) to one compressed file, and importing it somewhere else, so a new machine can start off with everything already cached instead of requesting it all again
+
+A snapshot is a zip file with two things in it: one long stream of records (each one a cache key, index info for the async cache, and the response exactly as it is stored in the cache), and a manifest with the SHA-256 of that stream, so a corrupted or truncated snapshot is noticed before anything gets imported from it. Snapshots from the sync cache can only be imported into the sync cache, and the same for the async cache, as the responses are not converted between the two"""
+
+import contextlib
+import hashlib
+import itertools
+import json
+import struct
+import zipfile
+import zlib
+from collections import Counter
+from collections.abc import AsyncIterator, Callable, Collection, Iterator
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Literal
+
+from pydantic_core import from_json
+
+from .api import _get_async_cache, _get_cache
+from .cache import _iter_file_cache_keys, _response_body
+from .endpoints import endpoint_template
+from .sqlite_cache_with_index import IndexRow
+
+if TYPE_CHECKING:
+	from .filesystem_cache_with_dirs import FileCacheWithDirectories
+	from .sqlite_cache_with_index import SQLiteBackendWithIndex
+
+snapshot_format_version = 1
+
+_manifest_name = 'manifest.json'
+_records_name = 'records'
+_record_header = struct.Struct('>III')
+"""Length of key, index info, and response"""
+
+SnapshotFilter = Callable[[str, bytes], bool]
+"""Called with (endpoint template, response body), and returns whether that response should be included in the snapshot"""
+
+
+@dataclass
+class SnapshotInfo:
+	"""What is in a snapshot, from its manifest"""
+
+	kind: Literal['file', 'sqlite']
+	"""Which cache it was exported from, file for the sync cache or sqlite for the async cache"""
+	serializer: str | None
+	"""Name of the requests_cache serializer, for the sync cache"""
+	count: int = 0
+	size: int = 0
+	"""Total size of the records in bytes, before compression"""
+	sha256: str = ''
+	"""Of all the records, before compression"""
+	created: str = field(default_factory=lambda: datetime.now(UTC).isoformat())
+	templates: dict[str, int] = field(default_factory=dict)
+	"""{endpoint template: number of responses}"""
+	version: int = snapshot_format_version
+
+
+class SnapshotError(Exception):
+	"""Snapshot is corrupted, or can't be imported into this cache"""
+
+
+def finished_games_and_duels(template: str, body: bytes) -> bool:
+	"""SnapshotFilter for games, challenge games and duels that are finished, which are the responses that won't ever change"""
+	if template in {'api/v3/games/{game}', 'api/v3/challenges/{challenge}/game'}:
+		return from_json(body).get('state') == 'finished'
+	if template == 'api/duels/{lobby}':
+		return from_json(body).get('status') == 'Finished'
+	return False
+
+
+class _SnapshotWriter:
+	def __init__(self, path: Path, info: SnapshotInfo, compresslevel: int | None):
+		self.path = path
+		self.info = info
+		self.zip = zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED, compresslevel=compresslevel)
+		# force_zip64 as we don't know how big it's going to be yet
+		self.records = self.zip.open(_records_name, 'w', force_zip64=True)
+		self.sha256 = hashlib.sha256()
+		self.templates: Counter[str] = Counter()
+
+	def write(self, key: str, template: str, meta: bytes, value: bytes):
+		encoded_key = key.encode()
+		header = _record_header.pack(len(encoded_key), len(meta), len(value))
+		for part in (header, encoded_key, meta, value):
+			self.sha256.update(part)
+			self.records.write(part)
+		self.info.count += 1
+		self.info.size += len(header) + len(encoded_key) + len(meta) + len(value)
+		self.templates[template] += 1
+
+	def close(self) -> SnapshotInfo:
+		self.records.close()
+		self.info.sha256 = self.sha256.hexdigest()
+		self.info.templates = dict(self.templates.most_common())
+		self.zip.writestr(_manifest_name, json.dumps(asdict(self.info), indent='\t'))
+		self.zip.close()
+		return self.info
+
+	def abort(self):
+		with contextlib.suppress(Exception):
+			self.records.close()
+			self.zip.close()
+		self.path.unlink(missing_ok=True)
+
+
+def _read_exactly(f: IO[bytes], size: int) -> bytes:
+	data = f.read(size)
+	if len(data) != size:
+		raise SnapshotError('Snapshot is truncated')
+	return data
+
+
+def read_snapshot_info(path: Path | str) -> SnapshotInfo:
+	"""Reads the manifest of a snapshot, without reading any of the responses"""
+	try:
+		with zipfile.ZipFile(path) as zf:
+			manifest = json.loads(zf.read(_manifest_name))
+	except (KeyError, zipfile.BadZipFile, json.JSONDecodeError) as e:
+		raise SnapshotError(f'{path} is not a snapshot: {e}') from e
+	if manifest.get('version') != snapshot_format_version:
+		raise SnapshotError(f'Unsupported snapshot version: {manifest.get("version")}')
+	return SnapshotInfo(**manifest)
+
+
+def _iter_records(path: Path | str, info: SnapshotInfo) -> Iterator[tuple[str, bytes, bytes]]:
+	"""Yields (key, index info, response) from a snapshot, and raises SnapshotError at the end if the checksum doesn't match"""
+	sha256 = hashlib.sha256()
+	count = 0
+	try:
+		with zipfile.ZipFile(path) as zf, zf.open(_records_name) as f:
+			while header := f.read(_record_header.size):
+				if len(header) != _record_header.size:
+					raise SnapshotError('Snapshot is truncated')
+				key_size, meta_size, value_size = _record_header.unpack(header)
+				key = _read_exactly(f, key_size)
+				meta = _read_exactly(f, meta_size)
+				value = _read_exactly(f, value_size)
+				for part in (header, key, meta, value):
+					sha256.update(part)
+				count += 1
+				yield key.decode(), meta, value
+	except (zipfile.BadZipFile, zlib.error) as e:
+		# BadZipFile is also what it raises if the CRC is wrong
+		raise SnapshotError(f'Snapshot is corrupted: {e}') from e
+	if sha256.hexdigest() != info.sha256 or count != info.count:
+		raise SnapshotError('Snapshot checksum does not match its manifest')
+
+
+def verify_snapshot(path: Path | str) -> SnapshotInfo:
+	"""Reads through a whole snapshot and checks it against its checksum, raising SnapshotError if it doesn't match"""
+	info = read_snapshot_info(path)
+	for _ in _iter_records(path, info):
+		pass
+	return info
+
+
+def _serializer_name(cache: 'FileCacheWithDirectories') -> str | None:
+	return getattr(cache.responses.serializer, 'name', None)
+
+
+def export_cache(
+	path: Path | str,
+	cache: 'FileCacheWithDirectories | None' = None,
+	templates: Collection[str] | None = None,
+	predicate: SnapshotFilter | None = None,
+	compresslevel: int | None = None,
+) -> SnapshotInfo:
+	"""Exports responses from the sync cache into a snapshot file, which is written as it goes instead of all at once.
+
+	Arguments:
+		path: Where to write the snapshot, overwriting anything already there
+		cache: Defaults to the cache used by call_api
+		templates: Only export responses from these endpoint templates
+		predicate: Only export responses where this returns True, e.g. finished_games_and_duels. This has to decode each response, so use templates as well where possible
+		compresslevel: zlib compression level, from 0 to 9
+
+	Returns:
+		SnapshotInfo that was written to the manifest
+	"""
+	if cache is None:
+		cache = _get_cache()
+	path = Path(path)
+	writer = _SnapshotWriter(path, SnapshotInfo('file', _serializer_name(cache)), compresslevel)
+	try:
+		for key, file_path in _iter_file_cache_keys(cache):
+			template = endpoint_template(key)
+			if templates is not None and template not in templates:
+				continue
+			try:
+				value = file_path.read_bytes()
+			except OSError:
+				# Deleted in the meantime
+				continue
+			if predicate and not predicate(template, _response_body('file', value)):
+				continue
+			writer.write(key, template, b'', value)
+		return writer.close()
+	except BaseException:
+		writer.abort()
+		raise
+
+
+def import_cache(
+	path: Path | str,
+	cache: 'FileCacheWithDirectories | None' = None,
+	*,
+	verify: bool = True,
+	overwrite: bool = True,
+) -> int:
+	"""Imports a snapshot made by export_cache into the sync cache.
+
+	Arguments:
+		cache: Defaults to the cache used by call_api
+		verify: Check the whole snapshot against its checksum before importing anything from it. Otherwise, a corrupted snapshot is still noticed, but only after everything before the corrupted part has already been imported
+		overwrite: Replace responses that are already in the cache, otherwise leave them alone
+
+	Returns:
+		Number of responses imported
+	"""
+	if cache is None:
+		cache = _get_cache()
+	info = verify_snapshot(path) if verify else read_snapshot_info(path)
+	if info.kind != 'file':
+		raise SnapshotError(f'Snapshot is from the {info.kind} cache, not the file cache')
+	if info.serializer != _serializer_name(cache):
+		raise SnapshotError(
+			f'Snapshot uses the {info.serializer} serializer, but the cache uses {_serializer_name(cache)}'
+		)
+	count = 0
+	for key, _, value in _iter_records(path, info):
+		if not overwrite and key in cache.responses:
+			continue
+		# Goes through the cache instead of writing the file directly, so it ends up wherever and however the cache would have written it, at the cost of deserializing it again
+		response = cache.responses.deserialize(key, value)
+		if response is None:
+			raise SnapshotError(f'Response for {key} in the snapshot could not be read')
+		cache.responses[key] = response
+		count += 1
+	return count
+
+
+async def export_async_cache(
+	path: Path | str,
+	cache: 'SQLiteBackendWithIndex | None' = None,
+	templates: Collection[str] | None = None,
+	predicate: SnapshotFilter | None = None,
+	compresslevel: int | None = None,
+	batch_size: int = 200,
+) -> SnapshotInfo:
+	"""Exports responses from the async cache into a snapshot file, along with their index info so it doesn't need to be rebuilt after importing. Redirects are not exported.
+	Compressing and writing happens in the cache's executor, batch_size responses at a time.
+
+	Arguments:
+		path: Where to write the snapshot, overwriting anything already there
+		cache: Defaults to the cache used by get_default_async_session
+		templates: Only export responses from these endpoint templates
+		predicate: Only export responses where this returns True, e.g. finished_games_and_duels. This has to unpickle each response, so use templates as well where possible
+		compresslevel: zlib compression level, from 0 to 9
+
+	Returns:
+		SnapshotInfo that was written to the manifest
+	"""
+	if cache is None:
+		cache = _get_async_cache()
+	if await cache.index.size() < await cache.responses.size():
+		await cache.rebuild_index()
+	path = Path(path)
+	writer = await cache.io.run(_SnapshotWriter, path, SnapshotInfo('sqlite', None), compresslevel)
+
+	def write_batch(batch: list[tuple[str, IndexRow, bytes]]):
+		for key, row, value in batch:
+			if predicate and not predicate(row.template, _response_body('sqlite', value)):
+				continue
+			writer.write(key, row.template, json.dumps(row).encode(), value)
+
+	try:
+		batch = []
+		async for key, row, value in cache.raw_responses():
+			if templates is not None and row.template not in templates:
+				continue
+			batch.append((key, row, value))
+			if len(batch) >= batch_size:
+				await cache.io.run(write_batch, batch)
+				batch = []
+		if batch:
+			await cache.io.run(write_batch, batch)
+		return await cache.io.run(writer.close)
+	except BaseException:
+		writer.abort()
+		raise
+
+
+async def _iter_records_async(
+	cache: 'SQLiteBackendWithIndex', path: Path | str, info: SnapshotInfo, batch_size: int
+) -> AsyncIterator[list[tuple[str, bytes, bytes]]]:
+	records = _iter_records(path, info)
+
+	def read_batch() -> list[tuple[str, bytes, bytes]]:
+		# Not zip with a range, as that takes one more record out of records before it notices the range is finished, and loses it
+		return list(itertools.islice(records, batch_size))
+
+	while batch := await cache.io.run(read_batch):
+		yield batch
+
+
+async def import_async_cache(
+	path: Path | str,
+	cache: 'SQLiteBackendWithIndex | None' = None,
+	*,
+	verify: bool = True,
+	overwrite: bool = True,
+	batch_size: int = 200,
+) -> int:
+	"""Imports a snapshot made by export_async_cache into the async cache, batch_size responses per transaction. Reading and decompressing the snapshot happens in the cache's executor.
+
+	Arguments:
+		cache: Defaults to the cache used by get_default_async_session
+		verify: Check the whole snapshot against its checksum before importing anything from it. Otherwise, a corrupted snapshot is still noticed, but only after everything before the corrupted part has already been imported
+		overwrite: Replace responses that are already in the cache, otherwise leave them alone
+
+	Returns:
+		Number of responses imported
+	"""
+	if cache is None:
+		cache = _get_async_cache()
+	info = await cache.io.run(verify_snapshot if verify else read_snapshot_info, path)
+	if info.kind != 'sqlite':
+		raise SnapshotError(f'Snapshot is from the {info.kind} cache, not the sqlite cache')
+	existing = set() if overwrite else {key async for key in cache.responses.keys()}
+	count = 0
+	async for batch in _iter_records_async(cache, path, info, batch_size):
+		for key, meta, value in batch:
+			if key in existing:
+				continue
+			cache.responses.pending[key] = (value,)
+			cache.index.pending[key] = IndexRow(*json.loads(meta))
+			count += 1
+		await cache.flush()
+	return count
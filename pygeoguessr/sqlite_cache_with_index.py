@@ -0,0 +1,335 @@
+import asyncio
+import contextlib
+import logging
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime
+from typing import Any, NamedTuple
+
+from aiohttp import ClientResponse
+from aiohttp_client_cache import SQLiteBackend
+from aiohttp_client_cache.backends.base import ResponseOrKey
+from aiohttp_client_cache.backends.sqlite import SQLiteCache, SQLitePickleCache
+from aiohttp_client_cache.response import CachedResponse
+
+from .async_cache_io import CacheIOExecutor
+from .endpoints import endpoint_template, url_path
+
+logger = logging.getLogger(__name__)
+
+
+def _timestamp(d: datetime | None) -> float | None:
+	if d is None:
+		return None
+	# aiohttp_client_cache uses naive datetimes that are actually UTC
+	return (d if d.tzinfo else d.replace(tzinfo=UTC)).timestamp()
+
+
+class IndexRow(NamedTuple):
+	method: str
+	url: str
+	path: str
+	"""See endpoints.url_path"""
+	template: str
+	"""See endpoints.endpoint_template"""
+	size: int
+	created: float | None
+	"""Unix timestamp"""
+	expires: float | None
+	"""Unix timestamp"""
+
+
+class SQLiteBackendWithIndex(SQLiteBackend):
+	"""Like aiohttp_client_cache SQLite backend, but also keeps a table of the URL, endpoint, size and expiry of each response, so the cache can be looked at (or have things deleted from it) without unpickling every response.
+
+	Responses are also pickled and unpickled in an executor instead of on the event loop, and new responses are written in batches (of up to batch_size, or whatever has been saved in the last batch_interval seconds) instead of one transaction each"""
+
+	def __init__(
+		self,
+		cache_name: str = 'aiohttp-cache',
+		use_temp: bool = False,  # noqa: FBT001, FBT002 #It's how aiohttp_client_cache works
+		fast_save: bool = False,  # noqa: FBT001, FBT002
+		autoclose: bool = True,  # noqa: FBT001, FBT002
+		io: CacheIOExecutor | None = None,
+		batch_size: int = 100,
+		batch_interval: float = 0.05,
+		**kwargs: Any,
+	):
+		super().__init__(cache_name, use_temp, fast_save, autoclose, **kwargs)
+		self.io = io or CacheIOExecutor()
+		self.batch_size = batch_size
+		self.batch_interval = batch_interval
+		connection = self.responses._connection
+		lock = self.responses._lock
+		# Otherwise the one we are replacing would stop the connection once it gets garbage collected
+		self.responses._connection = None
+		self.responses = _OffloadedPickleCache(
+			cache_name,
+			'responses',
+			use_temp=use_temp,
+			fast_save=fast_save,
+			connection=connection,
+			lock=lock,
+			io=self.io,
+			**kwargs,
+		)
+		self.index = ResponseIndex(
+			cache_name, 'response_index', use_temp=use_temp, connection=connection, lock=lock, **kwargs
+		)
+		self._flush_task: asyncio.Task | None = None
+
+	async def save_response(
+		self,
+		response: ClientResponse,
+		cache_key: str | None = None,
+		expires: datetime | None = None,
+	):
+		cache_key = cache_key or self.create_key(response.method, response.url)
+		cached_response = await CachedResponse.from_client_response(response, expires)
+		# Serialize it here so we know how big it is
+		data = await self.io.run(self.responses.serialize, cached_response) or b''
+		self.responses.pending[cache_key] = (data,)
+		self.index.pending[cache_key] = self.index.row(cached_response, len(data))
+
+		for r in response.history:
+			await self.redirects.write(self.create_key(r.method, r.url), cache_key)
+
+		if len(self.responses.pending) >= self.batch_size:
+			await self.flush()
+		elif self._flush_task is None:
+			self._flush_task = asyncio.create_task(self._flush_later())
+
+	async def _flush_later(self):
+		await asyncio.sleep(self.batch_interval)
+		self._flush_task = None
+		try:
+			await self.flush()
+		except Exception:
+			# Nothing is awaiting this task, so the error would otherwise go nowhere. Rows only get taken out of pending once they are written, so they will be tried again by the next flush (at the latest when closing)
+			logger.exception(
+				'Writing %d cached responses failed, will try again', len(self.responses.pending)
+			)
+
+	async def flush(self):
+		"""Writes any responses that are still waiting to be written, in one transaction"""
+		if not self.responses.pending and not self.index.pending:
+			return
+		responses = dict(self.responses.pending)
+		index_rows = dict(self.index.pending)
+		try:
+			async with self.responses.bulk_commit():
+				await self.responses.flush_pending()
+				await self.index.flush_pending()
+		except BaseException:
+			# Each table takes rows out of pending once it has written them, but nothing is committed if anything after that fails, so put them back for the next flush (unless something newer was saved in the meantime)
+			for key, row in responses.items():
+				self.responses.pending.setdefault(key, row)
+			for key, row in index_rows.items():
+				self.index.pending.setdefault(key, row)
+			raise
+
+	async def delete(self, key: str):
+		await super().delete(key)
+		await self.index.delete(key)
+
+	async def bulk_delete(self, keys: set):
+		await self.responses.bulk_delete(keys)
+		await self.index.bulk_delete(keys)
+
+	async def clear(self):
+		await super().clear()
+		await self.index.clear()
+
+	async def close(self):
+		if self._flush_task is not None:
+			self._flush_task.cancel()
+			with contextlib.suppress(asyncio.CancelledError):
+				await self._flush_task
+			self._flush_task = None
+		await self.flush()
+		await super().close()
+		self.io.shutdown()
+
+	async def delete_expired_responses(self):
+		"""Deletes all expired responses from the cache, using the index instead of reading every response"""
+		await self.bulk_delete(
+			{key async for key in self.index.keys_expired_before(datetime.now(UTC))}
+		)
+
+	async def raw_responses(self) -> AsyncIterator[tuple[str, IndexRow, bytes]]:
+		"""Every response that is in the index, still pickled, which is quicker than reading them one at a time when you want to do something with all of them
+
+		Yields:
+			(key, index row, pickled CachedResponse)"""
+		await self.flush()
+		# Also makes sure the index table exists
+		await self.index.size()
+		columns = ', '.join(f'i.{column}' for column in IndexRow._fields)
+		async with (
+			self.responses.get_connection() as db,
+			db.execute(
+				f'SELECT r.key, r.value, {columns} FROM `{self.responses.table_name}` r JOIN `{self.index.table_name}` i ON r.key = i.key'
+			) as cursor,
+		):
+			async for key, value, *row in cursor:
+				yield key, IndexRow(*row), value
+
+	async def rebuild_index(self):
+		"""Adds everything in the cache to the index, for caches that existed before the index did. This does have to unpickle every response"""
+		async for key in self.responses.keys():
+			data = await SQLiteCache.read(self.responses, key)
+			if not isinstance(data, bytes):
+				continue
+			response = await self.io.run(self.responses.deserialize, data)
+			if isinstance(response, CachedResponse):
+				self.index.pending[key] = self.index.row(response, len(data))
+		await self.flush()
+
+
+class _PendingWritesMixin(SQLiteCache):
+	"""Rows that have been saved but not written to the table yet, keyed by the key column, and written all at once by flush_pending"""
+
+	columns: tuple[str, ...] = ('key', 'value')
+
+	def __init__(self, *args, **kwargs):
+		super().__init__(*args, **kwargs)
+		self.pending: dict[str, tuple[Any, ...]] = {}
+
+	async def flush_pending(self):
+		if not self.pending:
+			return
+		rows = dict(self.pending)
+		placeholders = ','.join('?' for _ in self.columns)
+		async with self.get_connection(commit=True) as db:
+			await db.executemany(
+				f'INSERT OR REPLACE INTO `{self.table_name}` ({", ".join(self.columns)}) VALUES ({placeholders})',
+				[(key, *row) for key, row in rows.items()],
+			)
+		# Only take them out of pending now, so they can still be read in the meantime, unless they got replaced with something newer in the meantime
+		for key, row in rows.items():
+			if self.pending.get(key) is row:
+				del self.pending[key]
+
+	async def contains(self, key: str) -> bool:
+		return key in self.pending or await super().contains(key)
+
+	async def delete(self, key: str):
+		self.pending.pop(key, None)
+		await super().delete(key)
+
+	async def bulk_delete(self, keys: set):
+		for key in keys:
+			self.pending.pop(key, None)
+		await super().bulk_delete(keys)
+
+	async def clear(self):
+		self.pending.clear()
+		await super().clear()
+
+	async def keys(self) -> AsyncIterator[str]:
+		await self.flush_pending()
+		async for key in super().keys():
+			yield key
+
+	async def size(self) -> int:
+		await self.flush_pending()
+		return await super().size()
+
+
+class _OffloadedPickleCache(_PendingWritesMixin, SQLitePickleCache):
+	"""SQLitePickleCache that unpickles in an executor"""
+
+	def __init__(self, *args, io: CacheIOExecutor, **kwargs):
+		super().__init__(*args, **kwargs)
+		self.io = io
+
+	async def read(self, key: str) -> ResponseOrKey:
+		pending = self.pending.get(key)
+		data = pending[0] if pending else await SQLiteCache.read(self, key)
+		return await self.io.run(self.deserialize, data)
+
+	async def values(self) -> AsyncIterator[ResponseOrKey]:
+		await self.flush_pending()
+		async with (
+			self.get_connection() as db,
+			db.execute(f'SELECT value FROM `{self.table_name}`') as cursor,
+		):
+			async for row in cursor:
+				yield await self.io.run(self.deserialize, row[0])
+
+	async def write(self, key: str, item: ResponseOrKey):
+		data = await self.io.run(self.serialize, item)
+		self.pending.pop(key, None)
+		await SQLiteCache.write(self, key, data)
+
+
+class ResponseIndex(_PendingWritesMixin):
+	"""Table of info about each cached response, kept alongside the responses table"""
+
+	columns = ('key', *IndexRow._fields)
+
+	async def _init_db(self):
+		if self.fast_save:
+			await self._connection.execute('PRAGMA synchronous = 0;')
+		await self._connection.execute(
+			f'CREATE TABLE IF NOT EXISTS `{self.table_name}` '
+			'(key PRIMARY KEY, method TEXT, url TEXT, path TEXT, template TEXT, size INTEGER, created REAL, expires REAL)'
+		)
+		await self._connection.execute(
+			f'CREATE INDEX IF NOT EXISTS `{self.table_name}_template` ON `{self.table_name}` (template)'
+		)
+		await self._connection.execute(
+			f'CREATE INDEX IF NOT EXISTS `{self.table_name}_expires` ON `{self.table_name}` (expires)'
+		)
+		self._initialized = True
+
+	@staticmethod
+	def row(response: CachedResponse, size: int) -> IndexRow:
+		url = str(response.url)
+		return IndexRow(
+			response.method,
+			url,
+			url_path(url),
+			endpoint_template(url),
+			size,
+			_timestamp(response.created_at),
+			_timestamp(response.expires),
+		)
+
+	async def add(self, key: str, response: CachedResponse, size: int):
+		self.pending[key] = self.row(response, size)
+		await self.flush_pending()
+
+	async def rows(
+		self, columns: str = 'key, template, size, created, expires'
+	) -> AsyncIterator[tuple[Any, ...]]:
+		await self.flush_pending()
+		async with (
+			self.get_connection() as db,
+			db.execute(f'SELECT {columns} FROM `{self.table_name}`') as cursor,
+		):
+			async for row in cursor:
+				yield tuple(row)
+
+	async def keys_matching(self, pattern: str) -> AsyncIterator[str]:
+		"""Keys of responses where the URL path matches a glob pattern, e.g. api/v3/games/*"""
+		await self.flush_pending()
+		async with (
+			self.get_connection() as db,
+			db.execute(
+				f'SELECT key FROM `{self.table_name}` WHERE path GLOB ?', (pattern.strip('/'),)
+			) as cursor,
+		):
+			async for row in cursor:
+				yield row[0]
+
+	async def keys_expired_before(self, time: datetime) -> AsyncIterator[str]:
+		await self.flush_pending()
+		async with (
+			self.get_connection() as db,
+			db.execute(
+				f'SELECT key FROM `{self.table_name}` WHERE expires IS NOT NULL AND expires < ?',
+				(time.timestamp(),),
+			) as cursor,
+		):
+			async for row in cursor:
+				yield row[0]
@@ -0,0 +1,174 @@
+"""Aggregate statistics (per country, map, mode, month etc) over GameBatch, and anything else in the same kind of columns, without going through each game in Python"""
+
+from dataclasses import dataclass
+from typing import Literal
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+from pygeoguessr.game_batch import GameBatch
+from pygeoguessr.types import Medal
+
+medal_order = (Medal.NoMedal, Medal.Bronze, Medal.Silver, Medal.Gold, Medal.Platinum)
+"""What each index from medal_indices means"""
+_medal_thresholds = np.array([5_000, 15_000, 22_500])
+
+
+def medal_indices(scores: ArrayLike) -> np.ndarray:
+	"""Index into medal_order for each game score, the same as other.get_medal but for a whole array at once (with 0 instead of None)"""
+	scores = np.asarray(scores)
+	indices = np.searchsorted(_medal_thresholds, scores, side='right')
+	indices[scores == 25_000] = 4
+	return indices
+
+
+def get_medals(scores: ArrayLike) -> list[Medal | None]:
+	"""other.get_medal for each score"""
+	return [medal_order[i] if i else None for i in medal_indices(scores)]
+
+
+def group(keys: ArrayLike) -> tuple[np.ndarray, np.ndarray]:
+	"""Returns:
+	Each distinct key (sorted), and the index into that of the group for each element of keys"""
+	unique, inverse = np.unique(np.asarray(keys), return_inverse=True)
+	return unique, inverse.reshape(-1)
+
+
+def group_count(inverse: np.ndarray, group_count: int) -> np.ndarray:
+	return np.bincount(inverse, minlength=group_count)
+
+
+def group_sum(inverse: np.ndarray, values: ArrayLike, group_count: int) -> np.ndarray:
+	return np.bincount(inverse, weights=np.asarray(values, dtype=np.float64), minlength=group_count)
+
+
+def group_mean(inverse: np.ndarray, values: ArrayLike, group_count: int) -> np.ndarray:
+	"""nan for groups with nothing in them"""
+	counts = np.bincount(inverse, minlength=group_count)
+	with np.errstate(invalid='ignore', divide='ignore'):
+		return group_sum(inverse, values, group_count) / counts
+
+
+def group_percentiles(
+	inverse: np.ndarray, values: ArrayLike, group_count: int, percentiles: ArrayLike
+) -> np.ndarray:
+	"""Percentiles (0 to 100, linearly interpolated like np.percentile) of values in each group
+
+	Returns:
+		float64 array of (group_count, len(percentiles)), nan for groups with nothing in them"""
+	values = np.asarray(values, dtype=np.float64)
+	percentiles = np.asarray(percentiles, dtype=np.float64)
+	order = np.lexsort((values, inverse))
+	sorted_values = values[order]
+	counts = np.bincount(inverse, minlength=group_count)
+	starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+	# Fractional position of each percentile within each group
+	positions = (counts[:, None] - 1) * (percentiles[None, :] / 100)
+	lower = np.floor(positions).astype(np.int64)
+	upper = np.minimum(lower + 1, np.maximum(counts[:, None] - 1, 0))
+	fraction = positions - lower
+	result = np.full(positions.shape, np.nan)
+	has_values = counts > 0
+	lower_values = sorted_values[(starts[:, None] + lower)[has_values]]
+	upper_values = sorted_values[(starts[:, None] + upper)[has_values]]
+	result[has_values] = lower_values + (upper_values - lower_values) * fraction[has_values]
+	return result
+
+
+GameGrouping = Literal['country', 'map', 'type', 'mode', 'month']
+
+
+@dataclass(frozen=True)
+class GameStats:
+	"""Statistics for each group, where each array has one element (or row) per key"""
+
+	by: GameGrouping
+	keys: np.ndarray
+	"""Country code, map slug, GameType value, standard/streak, or datetime64[M]"""
+	games: np.ndarray
+	"""Number of games with at least one round in the group"""
+	rounds: np.ndarray
+	mean_round_score: np.ndarray
+	distance_percentiles: np.ndarray
+	"""Metres, (number of keys, len(percentiles))"""
+	percentiles: tuple[float, ...]
+	time: np.ndarray
+	"""Total seconds spent guessing"""
+	mean_game_score: np.ndarray | None
+	"""None when grouped by country, as that is not something games are grouped by"""
+	medals: np.ndarray | None
+	"""Number of each medal (in the same order as medal_order), (number of keys, 5), or None when grouped by country"""
+
+
+def _game_keys(batch: GameBatch, by: GameGrouping) -> np.ndarray:
+	if by == 'map':
+		return batch.map_slug
+	if by == 'type':
+		return batch.game_type
+	if by == 'mode':
+		return np.where(batch.streak, 'streak', 'standard')
+	if by == 'month':
+		return batch.start_time.astype('datetime64[M]')
+	raise ValueError(f'Unknown grouping: {by}')
+
+
+def game_stats(
+	batch: GameBatch,
+	by: GameGrouping,
+	*,
+	percentiles: tuple[float, ...] = (50, 90),
+	include_streaks: bool = False,
+) -> GameStats:
+	"""Aggregates the rounds and games in batch by something
+
+	Arguments:
+		by: country of each round's location (rounds without one are left out), or the map, GameType, mode (standard/streak) or month (UTC) of each game
+		include_streaks: Include streak games, but their scores will be mixed in with the points from non-streak games, so probably don't unless by is mode"""
+	round_mask = (
+		np.ones(len(batch), dtype=np.bool_)
+		if include_streaks
+		else ~batch.streak[batch.game_index]
+	)
+	if by == 'country':
+		round_mask &= batch.country != ''
+		keys, round_groups = group(batch.country[round_mask])
+	else:
+		all_keys = _game_keys(batch, by)
+		game_mask = np.ones(batch.game_count, dtype=np.bool_) if include_streaks else ~batch.streak
+		if by == 'month':
+			game_mask &= ~np.isnat(all_keys)
+		keys, game_groups = group(all_keys[game_mask])
+		# Group for every game, including ones that were left out (which are never looked up)
+		groups_of_games = np.full(batch.game_count, -1, dtype=np.int64)
+		groups_of_games[game_mask] = game_groups
+		round_mask &= game_mask[batch.game_index]
+		round_groups = groups_of_games[batch.game_index[round_mask]]
+	key_count = len(keys)
+
+	game_index = batch.game_index[round_mask]
+	# Each (group, game) pair once
+	game_pairs = np.unique(round_groups.astype(np.int64) * max(batch.game_count, 1) + game_index)
+	games = group_count(game_pairs // max(batch.game_count, 1), key_count)
+
+	mean_game_score = None
+	medals = None
+	if by != 'country':
+		totals = batch.per_game_sum(batch.score)[game_mask]
+		mean_game_score = group_mean(game_groups, totals, key_count)
+		medals = np.zeros((key_count, len(medal_order)), dtype=np.int64)
+		np.add.at(medals, (game_groups, medal_indices(totals)), 1)
+
+	return GameStats(
+		by=by,
+		keys=keys,
+		games=games,
+		rounds=group_count(round_groups, key_count),
+		mean_round_score=group_mean(round_groups, batch.score[round_mask], key_count),
+		distance_percentiles=group_percentiles(
+			round_groups, batch.distance[round_mask], key_count, percentiles
+		),
+		percentiles=percentiles,
+		time=group_sum(round_groups, batch.time[round_mask], key_count),
+		mean_game_score=mean_game_score,
+		medals=medals,
+	)
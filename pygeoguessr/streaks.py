@@ -0,0 +1,160 @@
+"""Which countries (or US states) get mistaken for which in streak games, as a confusion matrix that games can be added to as they come in"""
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import NamedTuple
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+from pygeoguessr.apis.games import Game
+from pygeoguessr.game_batch import GameBatch
+from pygeoguessr.types import StreakType
+
+
+class ConfusedPair(NamedTuple):
+	actual: str
+	guessed: str
+	"""If from confused_pairs with either_way, the two codes are just in alphabetical order"""
+	count: int
+
+
+@dataclass(frozen=True)
+class StreakRegionStats:
+	"""Statistics for each region, where each array has one element per code"""
+
+	codes: np.ndarray
+	"""str, country or US state code, sorted"""
+	rounds: np.ndarray
+	"""Number of rounds where this was the location"""
+	correct: np.ndarray
+	accuracy: np.ndarray
+	"""correct / rounds, nan if there were no rounds (for codes that were only ever guessed)"""
+	most_guessed_instead: np.ndarray
+	"""str, the code most often guessed wrongly for this region, or an empty string if it was never guessed wrong"""
+
+
+class StreakConfusion:
+	"""Confusion matrix for one type of streak, with the code of each round's location as the rows and the code that was guessed as the columns. Codes are given integer IDs in the order they are first seen"""
+
+	def __init__(self, streak_type: StreakType = StreakType.CountryStreak):
+		self.streak_type = streak_type
+		self.codes: list[str] = []
+		"""Code for each ID"""
+		self._ids: dict[str, int] = {}
+		self._matrix = np.zeros((0, 0), dtype=np.int64)
+		self._unguessed = np.zeros(0, dtype=np.int64)
+
+	def __len__(self) -> int:
+		"""Number of rounds"""
+		return int(self._matrix.sum() + self._unguessed.sum())
+
+	def _encode(self, codes: np.ndarray) -> np.ndarray:
+		"""IDs for each code, adding any new ones"""
+		unique, inverse = np.unique(codes, return_inverse=True)
+		ids = np.empty(len(unique), dtype=np.int64)
+		for i, code in enumerate(unique.tolist()):
+			code_id = self._ids.get(code)
+			if code_id is None:
+				code_id = self._ids[code] = len(self.codes)
+				self.codes.append(code)
+			ids[i] = code_id
+		capacity = len(self._unguessed)
+		if len(self.codes) > capacity:
+			# Bigger than needed so that it doesn't need to be resized every time a new code comes up
+			new_capacity = max(len(self.codes), capacity * 2, 64)
+			matrix = np.zeros((new_capacity, new_capacity), dtype=np.int64)
+			matrix[:capacity, :capacity] = self._matrix
+			self._matrix = matrix
+			self._unguessed = np.concatenate(
+				[self._unguessed, np.zeros(new_capacity - capacity, dtype=np.int64)]
+			)
+		return ids[inverse.reshape(-1)]
+
+	def add(self, actual: ArrayLike, guessed: ArrayLike):
+		"""Adds rounds, with the code of each round's location and of its guess (an empty string if there was no guess, or the guess was somewhere without a code such as a dependent territory)"""
+		actual = np.asarray(actual, dtype=np.str_)
+		guessed = np.asarray(guessed, dtype=np.str_)
+		has_guess = guessed != ''
+		actual_ids = self._encode(actual)
+		guessed_ids = self._encode(guessed[has_guess])
+		capacity = len(self._unguessed)
+		self._matrix += np.bincount(
+			actual_ids[has_guess] * capacity + guessed_ids, minlength=capacity * capacity
+		).reshape(capacity, capacity)
+		self._unguessed += np.bincount(actual_ids[~has_guess], minlength=capacity)
+
+	def add_game_batch(self, batch: GameBatch):
+		"""Adds each round from streak games of this streak type (other games are ignored)"""
+		game_mask = batch.streak & (batch.streak_type == self.streak_type.value)
+		mask = game_mask[batch.game_index] & (batch.country != '')
+		self.add(batch.country[mask], batch.guess_country[mask])
+
+	def update(self, games: Iterable[Game]):
+		self.add_game_batch(GameBatch.from_games(games))
+
+	def merge(self, other: 'StreakConfusion'):
+		if other.streak_type != self.streak_type:
+			raise ValueError('Can only merge confusion matrices for the same streak type')
+		ids = self._encode(np.array(other.codes, dtype=np.str_))
+		# Each ID is only in there once, so this doesn't need np.add.at
+		self._matrix[np.ix_(ids, ids)] += other.matrix
+		self._unguessed[ids] += other.unguessed
+
+	@property
+	def matrix(self) -> np.ndarray:
+		"""int64, (number of codes, number of codes) of how many rounds were at the row's code and guessed as the column's code, in the order of codes"""
+		count = len(self.codes)
+		return self._matrix[:count, :count].copy()
+
+	@property
+	def unguessed(self) -> np.ndarray:
+		"""int64, how many rounds were at each code but had no code for the guess"""
+		return self._unguessed[: len(self.codes)].copy()
+
+	def region_stats(self) -> StreakRegionStats:
+		matrix = self.matrix
+		codes = np.array(self.codes, dtype=np.str_)
+		order = np.argsort(codes)
+		matrix = matrix[np.ix_(order, order)]
+		rounds = matrix.sum(axis=1) + self.unguessed[order]
+		correct = np.diagonal(matrix).copy()
+		wrong = matrix.copy()
+		np.fill_diagonal(wrong, 0)
+		most_wrong = wrong.argmax(axis=1) if len(codes) else np.zeros(0, dtype=np.int64)
+		sorted_codes = codes[order]
+		with np.errstate(invalid='ignore', divide='ignore'):
+			accuracy = correct / rounds
+		return StreakRegionStats(
+			codes=sorted_codes,
+			rounds=rounds,
+			correct=correct,
+			accuracy=accuracy,
+			most_guessed_instead=np.where(
+				wrong.max(axis=1, initial=0) > 0, sorted_codes[most_wrong], ''
+			),
+		)
+
+	def confused_pairs(
+		self, limit: int | None = 10, *, either_way: bool = False
+	) -> list[ConfusedPair]:
+		"""Most common wrong guesses, most common first
+
+		Arguments:
+			either_way: Count e.g. guessing Chile for Argentina and guessing Argentina for Chile as the same pair"""
+		wrong = self.matrix
+		np.fill_diagonal(wrong, 0)
+		if either_way:
+			wrong = np.triu(wrong + wrong.T)
+		rows, columns = np.nonzero(wrong)
+		counts = wrong[rows, columns]
+		order = np.argsort(-counts, kind='stable')[:limit]
+		pairs = []
+		for row, column, count in zip(
+			rows[order].tolist(), columns[order].tolist(), counts[order].tolist(), strict=True
+		):
+			actual, guessed = self.codes[row], self.codes[column]
+			if either_way and guessed < actual:
+				actual, guessed = guessed, actual
+			pairs.append(ConfusedPair(actual, guessed, count))
+		return pairs
@@ -0,0 +1,149 @@
+"""t-digest (https://arxiv.org/abs/1902.04023) for approximate quantiles of a stream of numbers using a bounded amount of memory"""
+
+import math
+from bisect import bisect_right
+from collections.abc import Iterable
+
+
+def _k(q: float, compression: float) -> float:
+	# k1 scale function, which keeps centroids smaller near the tails so extreme quantiles are more accurate
+	return compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+
+def _k_inverse(k: float, compression: float) -> float:
+	return (math.sin(k * 2 * math.pi / compression) + 1) / 2
+
+
+class TDigest:
+	"""Merging t-digest. Memory use is proportional to compression regardless of how many values are added, and digests from separate streams can be merged into one.
+
+	Values are added to a buffer, which is merged into the centroids once it gets big enough, or when anything needs to use the centroids"""
+
+	def __init__(self, compression: float = 100, buffer_size: int | None = None):
+		"""Arguments:
+		compression: Higher is more accurate, but uses more memory (roughly compression centroids)
+		buffer_size: Number of values to add before merging them into the centroids, defaults to 5 * compression"""
+		self.compression = compression
+		self.buffer_size = buffer_size or int(compression * 5)
+		self.count = 0.0
+		"""Total weight of everything added"""
+		self.min = math.inf
+		self.max = -math.inf
+		self._means: list[float] = []
+		self._weights: list[float] = []
+		self._centres: list[float] = []
+		"""Cumulative weight up to the middle of each centroid"""
+		self._buffer: list[tuple[float, float]] = []
+
+	def __len__(self) -> int:
+		"""Number of centroids, for seeing how much memory it's using"""
+		self._flush()
+		return len(self._means)
+
+	def add(self, value: float, weight: float = 1):
+		self._buffer.append((value, weight))
+		self.count += weight
+		self.min = min(self.min, value)
+		self.max = max(self.max, value)
+		if len(self._buffer) >= self.buffer_size:
+			self._flush()
+
+	def update(self, values: Iterable[float]):
+		for value in values:
+			self.add(value)
+
+	def merge(self, other: 'TDigest'):
+		"""Adds everything from another digest (e.g. one for a different partition) into this one"""
+		other._flush()
+		if not other.count:
+			return
+		self._buffer.extend(zip(other._means, other._weights, strict=True))
+		self.count += other.count
+		self.min = min(self.min, other.min)
+		self.max = max(self.max, other.max)
+		self._flush()
+
+	def _flush(self):
+		if not self._buffer:
+			return
+		items = sorted([*zip(self._means, self._weights, strict=True), *self._buffer])
+		self._buffer.clear()
+		total = self.count
+		means = []
+		weights = []
+		mean, weight = items[0]
+		weight_so_far = 0.0
+		weight_limit = total * _k_inverse(_k(0, self.compression) + 1, self.compression)
+		for item_mean, item_weight in items[1:]:
+			if weight_so_far + weight + item_weight <= weight_limit:
+				weight += item_weight
+				mean += (item_mean - mean) * item_weight / weight
+				continue
+			means.append(mean)
+			weights.append(weight)
+			weight_so_far += weight
+			weight_limit = total * _k_inverse(
+				_k(weight_so_far / total, self.compression) + 1, self.compression
+			)
+			mean, weight = item_mean, item_weight
+		means.append(mean)
+		weights.append(weight)
+
+		self._means = means
+		self._weights = weights
+		centres = []
+		cumulative = 0.0
+		for weight in weights:
+			centres.append(cumulative + weight / 2)
+			cumulative += weight
+		self._centres = centres
+
+	def quantile(self, q: float) -> float:
+		"""Approximate value that a fraction q (0 to 1) of the values are below, or nan if nothing has been added"""
+		if not 0 <= q <= 1:
+			raise ValueError(f'q should be between 0 and 1, not {q}')
+		self._flush()
+		if not self._means:
+			return math.nan
+		target = q * self.count
+		means = self._means
+		centres = self._centres
+		if target <= centres[0]:
+			if centres[0] == 0:
+				return means[0]
+			return self.min + (means[0] - self.min) * target / centres[0]
+		if target >= centres[-1]:
+			tail = self.count - centres[-1]
+			if tail == 0:
+				return means[-1]
+			return means[-1] + (self.max - means[-1]) * (target - centres[-1]) / tail
+		i = bisect_right(centres, target) - 1
+		fraction = (target - centres[i]) / (centres[i + 1] - centres[i])
+		return means[i] + (means[i + 1] - means[i]) * fraction
+
+	def cdf(self, value: float) -> float:
+		"""Approximate fraction (0 to 1) of values that are less than or equal to value, or nan if nothing has been added"""
+		self._flush()
+		if not self._means:
+			return math.nan
+		if value < self.min:
+			return 0.0
+		if value >= self.max:
+			return 1.0
+		means = self._means
+		centres = self._centres
+		if value < means[0]:
+			rank = centres[0] * (value - self.min) / (means[0] - self.min)
+		elif value >= means[-1]:
+			rank = centres[-1] + (self.count - centres[-1]) * (value - means[-1]) / (
+				self.max - means[-1]
+			)
+		else:
+			i = bisect_right(means, value) - 1
+			if means[i + 1] == means[i]:
+				rank = centres[i + 1]
+			else:
+				rank = centres[i] + (centres[i + 1] - centres[i]) * (value - means[i]) / (
+					means[i + 1] - means[i]
+				)
+		return rank / self.count
@@ -0,0 +1,113 @@
+from collections.abc import Callable, Sequence
+from typing import Any
+
+import pytest
+
+
+def _score(points: float) -> dict[str, Any]:
+	return {'amount': str(points), 'unit': 'points', 'percentage': points / 250}
+
+
+def _distance(metres: float) -> dict[str, Any]:
+	return {
+		'meters': {'amount': f'{metres / 1000:.1f}', 'unit': 'km'},
+		'miles': {'amount': f'{metres / 1609.344:.1f}', 'unit': 'miles'},
+	}
+
+
+def game_dict(
+	token: str = 'AbCdEfGhIjKlMnOp',
+	locations: Sequence[tuple[float, float, str]] = ((-33.8688, 151.2093, '70616e6f31'),),
+	guesses: Sequence[tuple[float, float, int, float, int]] = ((-33.87, 151.21, 4999, 160.0, 30),),
+	*,
+	bounds: tuple[float, float, float, float] = (-65, -180, 84, 180),
+	map_slug: str = 'world',
+	total_time: int | None = None,
+	country_codes: Sequence[str] | None = None,
+) -> dict[str, Any]:
+	"""A finished game response (what get_game returns) with made up everything apart from what's passed in
+
+	Arguments:
+		locations: (lat, lng, pano ID as the API gives it, i.e. hex) of each round
+		guesses: (lat, lng, roundScoreInPoints, distanceInMeters, time in seconds) of each guess, can be fewer than locations
+		bounds: (min lat, min lng, max lat, max lng)"""
+	country_codes = country_codes or ['au'] * len(locations)
+	rounds = [
+		{
+			'lat': lat,
+			'lng': lng,
+			'panoId': pano_id,
+			'heading': 0.0,
+			'pitch': 0.0,
+			'zoom': 0.0,
+			'streakLocationCode': country_code,
+			'startTime': '2024-03-01T10:00:00.1234567+00:00',
+		}
+		for (lat, lng, pano_id), country_code in zip(locations, country_codes, strict=True)
+	]
+	guess_dicts = [
+		{
+			'lat': lat,
+			'lng': lng,
+			'timedOut': False,
+			'timedOutWithGuess': False,
+			'skippedRound': False,
+			'roundScore': _score(points),
+			'roundScoreInPercentage': points / 50,
+			'roundScoreInPoints': points,
+			'distance': _distance(metres),
+			'distanceInMeters': metres,
+			'streakLocationCode': None,
+			'time': time,
+			'stepsCount': 0,
+		}
+		for lat, lng, points, metres, time in guesses
+	]
+	total_score = sum(guess[2] for guess in guesses)
+	total_distance = sum(guess[3] for guess in guesses)
+	return {
+		'token': token,
+		'type': 'standard',
+		'mode': 'standard',
+		'state': 'finished',
+		'roundCount': len(locations),
+		'timeLimit': 0,
+		'forbidMoving': False,
+		'forbidZooming': False,
+		'forbidRotating': False,
+		'streakType': 'countrystreak',
+		'map': map_slug,
+		'mapName': map_slug.title(),
+		'panoramaProvider': 1,
+		'bounds': {
+			'min': {'lat': bounds[0], 'lng': bounds[1]},
+			'max': {'lat': bounds[2], 'lng': bounds[3]},
+		},
+		'round': len(locations),
+		'rounds': rounds,
+		'player': {
+			'totalScore': _score(total_score),
+			'totalDistance': _distance(total_distance),
+			'totalDistanceInMeters': total_distance,
+			'totalTime': sum(guess[4] for guess in guesses) if total_time is None else total_time,
+			'totalStreak': 0,
+			'guesses': guess_dicts,
+			'isLeader': False,
+			'currentPosition': 0,
+			'pin': {'url': 'pin/abc.png', 'anchor': 'center-center', 'isDefault': False},
+			'newBadges': [],
+			'explorer': None,
+			'id': '5b6ae3177135fa0e48b4df1f',
+			'nick': 'someone',
+			'isVerified': False,
+			'flair': 0,
+			'countryCode': 'au',
+			'totalStepsCount': 0,
+		},
+		'progressChange': None,
+	}
+
+
+@pytest.fixture
+def make_game() -> Callable[..., dict[str, Any]]:
+	return game_dict
@@ -0,0 +1,91 @@
+import json
+import pickle
+from datetime import UTC, datetime
+
+from pygeoguessr.apis.activities import (
+	Activity,
+	ActivityType,
+	PlayedChallengeActivity,
+	PlayedGameActivity,
+	_iter_page_activities,
+	_page_model,
+)
+
+_user = {
+	'id': '5b6ae3177135fa0e48b4df1f',
+	'nick': 'someone',
+	'isVerified': False,
+	'flair': 0,
+	'avatar': {'url': 'pin/abc.png', 'isDefault': False, 'anchor': 'center-center'},
+}
+_game = {
+	'mapSlug': 'world',
+	'mapName': 'World',
+	'points': 21345,
+	'gameToken': 'AbCdEfGhIjKlMnOp',
+	'gameMode': 'Standard',
+}
+_challenge = {
+	'mapSlug': 'world',
+	'mapName': 'World',
+	'points': 18000,
+	'challengeToken': 'AbCdEfGhIjKlMnOp',
+	'gameMode': 'Standard',
+	'isDailyChallenge': True,
+}
+_page = json.dumps(
+	{
+		'entries': [
+			{
+				'type': ActivityType.PlayedGame,
+				'time': '2024-01-02T00:00:00Z',
+				'user': _user,
+				'payload': json.dumps(_game),
+			},
+			{
+				'type': ActivityType.MultipleActivities,
+				'time': '2024-01-01T00:00:00Z',
+				'user': _user,
+				'payload': json.dumps(
+					[
+						{'type': ActivityType.PlayedChallenge, 'time': '2024-01-01T00:00:00Z', 'payload': _challenge},
+						{'type': ActivityType.PlayedGame, 'time': '2023-12-31T00:00:00Z', 'payload': _game},
+					]
+				),
+			},
+		],
+		'paginationToken': None,
+	}
+)
+
+
+def test_parses_plain_activities():
+	activities = list(_iter_page_activities(_page_model(None).model_validate_json(_page)))
+	assert [type(activity) for activity in activities] == [Activity] * 3
+	assert [activity.type for activity in activities] == [
+		ActivityType.PlayedGame,
+		ActivityType.PlayedChallenge,
+		ActivityType.PlayedGame,
+	]
+	assert activities[0].payload == PlayedGameActivity(**_game)
+	assert activities[1].payload == PlayedChallengeActivity(**_challenge)
+	assert all(activity.user.id == _user['id'] for activity in activities)
+	assert pickle.loads(pickle.dumps(activities)) == activities
+	assert [Activity.model_validate_json(activity.model_dump_json()) for activity in activities] == activities
+
+
+def test_only_parses_wanted_types():
+	page = _page_model(frozenset({ActivityType.PlayedChallenge})).model_validate_json(_page)
+	activities = list(_iter_page_activities(page))
+	assert [activity.type for activity in activities] == [ActivityType.PlayedChallenge]
+	assert type(activities[0]) is Activity
+
+
+def test_time_window():
+	page = _page_model(None).model_validate_json(_page)
+	activities = list(
+		_iter_page_activities(
+			page, since=datetime(2024, 1, 1, tzinfo=UTC), until=datetime(2024, 1, 2, tzinfo=UTC)
+		)
+	)
+	assert [activity.type for activity in activities] == [ActivityType.PlayedChallenge]
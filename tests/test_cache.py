@@ -0,0 +1,172 @@
+import asyncio
+import os
+from datetime import UTC, datetime, timedelta
+
+import pytest
+import requests_cache
+from aiohttp_client_cache.response import CachedResponse
+from yarl import URL
+
+from pygeoguessr.api import cache_hits, cache_misses
+from pygeoguessr.cache import (
+	EndpointCacheStats,
+	_iter_file_cache_keys,
+	delete_matching,
+	delete_matching_async,
+	get_async_cache_stats,
+	get_cache_stats,
+	reset_hit_counts,
+)
+from pygeoguessr.filesystem_cache_with_dirs import FileCacheWithDirectories
+from pygeoguessr.sqlite_cache_with_index import SQLiteBackendWithIndex
+
+_now = datetime.now(UTC)
+_keys = {
+	'api/v3/games/AbCdEfGhIjKlMnOp': None,
+	'api/v3/games/QrStUvWxYz012345': _now - timedelta(hours=1),
+	'api/v3/users/5b6ae3177135fa0e48b4df1f': _now + timedelta(hours=1),
+	'api/v3/search/user/q=someone': _now + timedelta(days=7),
+}
+"""Key and when the response expires"""
+
+
+@pytest.fixture(autouse=True)
+def _hit_counts():
+	reset_hit_counts()
+	yield
+	reset_hit_counts()
+
+
+def _file_cache(tmp_path) -> FileCacheWithDirectories:
+	cache = FileCacheWithDirectories(tmp_path / 'cache')
+	for key, expires in _keys.items():
+		cache.responses[key] = requests_cache.CachedResponse(
+			url=f'https://www.geoguessr.com/{key}', status_code=200, content=b'{}', expires=expires
+		)
+	# Make one of the games 2 days old
+	path = cache.responses._path('api/v3/games/QrStUvWxYz012345')
+	two_days_ago = (_now - timedelta(days=2)).timestamp()
+	os.utime(path, (two_days_ago, two_days_ago))
+	return cache
+
+
+async def _sqlite_cache(tmp_path, *, index: bool = True) -> SQLiteBackendWithIndex:
+	cache = SQLiteBackendWithIndex(str(tmp_path / 'cache.sqlite'))
+	for key, expires in _keys.items():
+		url = URL(f'https://www.geoguessr.com/{key.replace("/q=", "?q=")}')
+		response = CachedResponse('GET', 'OK', 200, url, '1.1', body=b'{}', expires=expires)
+		if index:
+			data = cache.responses.serialize(response) or b''
+			cache.responses.pending[key] = (data,)
+			cache.index.pending[key] = cache.index.row(response, len(data))
+		else:
+			# Like a cache from before there was an index
+			await cache.responses.write(key, response)
+	await cache.flush()
+	return cache
+
+
+def test_endpoint_stats():
+	now = datetime(2024, 1, 10, tzinfo=UTC)
+	stats = EndpointCacheStats('api/v3/games/{game}')
+	stats._add(10, now - timedelta(minutes=5), None, now, timedelta(days=1))
+	stats._add(20, now - timedelta(days=3), now - timedelta(seconds=1), now, timedelta(days=1))
+	stats._add(30, now - timedelta(days=400), now + timedelta(hours=2), now, timedelta(days=1))
+	stats._add(40, now - timedelta(days=2), now + timedelta(days=2), now, timedelta(days=1))
+	assert stats.count == 4
+	assert stats.size == 100
+	assert stats.age_histogram == [1, 0, 2, 0, 0, 1]
+	assert stats.oldest == now - timedelta(days=400)
+	assert stats.newest == now - timedelta(minutes=5)
+	assert stats.expired == 1
+	assert stats.expiring_soon == 1
+	assert stats.hit_ratio is None
+	stats.hits, stats.misses = 3, 1
+	assert stats.hit_ratio == 0.75
+
+
+def test_cache_stats(tmp_path):
+	cache = _file_cache(tmp_path)
+	cache_hits['api/v3/games/{game}'] += 3
+	cache_misses['api/v3/games/{game}'] += 1
+	cache_misses['api/v3/profiles/me'] += 1
+	stats = get_cache_stats(cache)
+	assert set(stats) == {
+		'api/v3/games/{game}',
+		'api/v3/users/{user}',
+		'api/v3/search/user',
+		'api/v3/profiles/me',
+	}
+	games = stats['api/v3/games/{game}']
+	assert games.count == 2
+	game_paths = [path for key, path in _iter_file_cache_keys(cache) if key.startswith('api/v3/games/')]
+	assert games.size == sum(path.stat().st_size for path in game_paths)
+	assert games.age_histogram == [1, 0, 1, 0, 0, 0]
+	assert games.hit_ratio == 0.75
+	assert stats['api/v3/users/{user}'].count == 1
+	assert stats['api/v3/profiles/me'].count == 0
+	assert stats['api/v3/profiles/me'].hit_ratio == 0
+	# Not checked unless asked for
+	assert games.expired == 0
+
+	stats = get_cache_stats(cache, check_expiry=True)
+	assert stats['api/v3/games/{game}'].expired == 1
+	assert stats['api/v3/users/{user}'].expiring_soon == 1
+	assert stats['api/v3/search/user'].expiring_soon == 0
+	assert stats['api/v3/search/user'].expired == 0
+
+
+@pytest.mark.parametrize('index', [True, False])
+def test_async_cache_stats(tmp_path, index):
+	async def main():
+		cache = await _sqlite_cache(tmp_path, index=index)
+		stats = await get_async_cache_stats(cache)
+		await cache.close()
+		return stats
+
+	stats = asyncio.run(main())
+	assert set(stats) == {'api/v3/games/{game}', 'api/v3/users/{user}', 'api/v3/search/user'}
+	games = stats['api/v3/games/{game}']
+	assert games.count == 2
+	assert games.expired == 1
+	assert games.age_histogram == [2, 0, 0, 0, 0, 0]
+	assert stats['api/v3/users/{user}'].expiring_soon == 1
+	assert stats['api/v3/search/user'].expiring_soon == 0
+
+
+@pytest.mark.parametrize(
+	('pattern', 'deleted'),
+	[
+		('api/v3/games/*', {'api/v3/games/AbCdEfGhIjKlMnOp', 'api/v3/games/QrStUvWxYz012345'}),
+		('/api/v3/search/user/', {'api/v3/search/user/q=someone'}),
+		('api/v3/*', set(_keys)),
+		('api/v4/*', set()),
+	],
+)
+def test_delete_matching(tmp_path, pattern, deleted):
+	cache = _file_cache(tmp_path)
+	assert delete_matching(pattern, cache) == len(deleted)
+	assert {key for key, _ in _iter_file_cache_keys(cache)} == set(_keys) - deleted
+
+
+@pytest.mark.parametrize(
+	('pattern', 'deleted'),
+	[
+		('api/v3/games/*', {'api/v3/games/AbCdEfGhIjKlMnOp', 'api/v3/games/QrStUvWxYz012345'}),
+		('/api/v3/search/user/', {'api/v3/search/user/q=someone'}),
+		('api/v4/*', set()),
+	],
+)
+@pytest.mark.parametrize('index', [True, False])
+def test_delete_matching_async(tmp_path, pattern, deleted, index):
+	async def main():
+		cache = await _sqlite_cache(tmp_path, index=index)
+		count = await delete_matching_async(pattern, cache)
+		keys = {key async for key in cache.responses.keys()}
+		index_keys = {row[0] async for row in cache.index.rows('key')}
+		await cache.close()
+		return count, keys, index_keys
+
+	count, keys, index_keys = asyncio.run(main())
+	assert count == len(deleted)
+	assert keys == index_keys == set(_keys) - deleted
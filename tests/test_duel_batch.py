@@ -0,0 +1,219 @@
+from dataclasses import fields
+
+import numpy as np
+import pytest
+
+from pygeoguessr.duel_batch import DuelBatch
+from pygeoguessr.duel_stats import (
+	comebacks,
+	damage_dealt,
+	damage_taken,
+	duel_country_stats,
+	health_curves,
+	largest_deficit,
+	player_teams,
+	time_to_guess,
+)
+from pygeoguessr.lite import (
+	LiteDuel,
+	LiteDuelGuess,
+	LiteDuelPlayer,
+	LiteDuelRound,
+	LiteDuelRoundResult,
+	LiteDuelTeam,
+)
+
+_t = 1_700_000_000.0
+
+
+def _round(
+	number: int, country: str, start: float | None, timer: float | None = None
+) -> LiteDuelRound:
+	return LiteDuelRound(number, 0.0, 0.0, country, 1.0, 1.0, False, start, None, timer)  # noqa: FBT003
+
+
+def _guess(number: int, created: float | None) -> LiteDuelGuess:
+	return LiteDuelGuess(number, 1.0, 1.0, 1000.0, 4000, created, True)  # noqa: FBT003
+
+
+def _results(*results: tuple[int, int, int]) -> list[LiteDuelRoundResult]:
+	return [LiteDuelRoundResult(i, *result) for i, result in enumerate(results, 1)]
+
+
+@pytest.fixture
+def finished() -> LiteDuel:
+	"""Team a gets behind by 2000 after round 2 and then wins"""
+	my_guesses = [_guess(1, _t + 12), _guess(2, _t + 120), _guess(3, _t + 205), _guess(4, _t + 305)]
+	me = LiteDuelPlayer('me', 1000, 'CA', my_guesses)
+	them = LiteDuelPlayer('them', 1100, 'US', [_guess(1, _t + 10), _guess(2, _t + 115)])
+	return LiteDuel(
+		'duel-a',
+		'Finished',
+		'StandardDuels',
+		'world',
+		16_000_000.0,
+		6000,
+		True,  # noqa: FBT003
+		[
+			_round(1, 'FR', _t, _t + 10),
+			_round(2, 'DE', _t + 100, _t + 115),
+			_round(3, 'FR', _t + 200),
+			# Only one team has a result, so it isn't in the batch
+			_round(4, 'FR', _t + 300),
+		],
+		[
+			LiteDuelTeam(
+				'a',
+				'red',
+				3000,
+				[me],
+				_results((4000, 6000, 6000), (2000, 6000, 3000), (5000, 3000, 3000), (1, 3000, 3000)),
+			),
+			LiteDuelTeam(
+				'b', 'blue', 0, [them], _results((3000, 6000, 5000), (5000, 5000, 5000), (0, 5000, 0))
+			),
+		],
+		'a',
+		False,  # noqa: FBT003
+	)
+
+
+@pytest.fixture
+def unfinished() -> LiteDuel:
+	"""Longer strings than the other one, and me on the second team"""
+	me = LiteDuelPlayer('me', 1000, 'CA', [_guess(1, _t + 1030)])
+	other = LiteDuelPlayer('someone-else', 900, 'BR', [_guess(1, None)])
+	return LiteDuel(
+		'duel-b-with-a-longer-id',
+		'Ongoing',
+		'NoMoveDuels',
+		'a-much-longer-map-slug',
+		None,
+		5000,
+		False,  # noqa: FBT003
+		[_round(1, 'JP', _t + 1000), _round(2, 'KR', _t + 1100)],
+		[
+			LiteDuelTeam(
+				'team-x', 'red', 4000, [other], _results((3000, 5000, 4000), (3000, 4000, 4000))
+			),
+			LiteDuelTeam('team-y', 'blue', 5000, [me], _results((4000, 5000, 5000))),
+		],
+		None,
+		False,  # noqa: FBT003
+	)
+
+
+@pytest.fixture
+def batch(finished, unfinished) -> DuelBatch:
+	return DuelBatch.from_duels([finished, unfinished])
+
+
+def assert_batches_equal(a: DuelBatch, b: DuelBatch):
+	for field in fields(DuelBatch):
+		a_value, b_value = getattr(a, field.name), getattr(b, field.name)
+		if isinstance(a_value, np.ndarray):
+			assert a_value.dtype == b_value.dtype, field.name
+		np.testing.assert_array_equal(a_value, b_value, err_msg=field.name)
+
+
+def test_from_duels(batch):
+	assert batch.game_ids == ['duel-a', 'duel-b-with-a-longer-id']
+	assert batch.duel_count == 2
+	assert len(batch) == 4
+	np.testing.assert_array_equal(batch.round_offsets, [0, 3, 4])
+	np.testing.assert_array_equal(batch.rounds_per_duel, [3, 1])
+	np.testing.assert_array_equal(batch.winner, [0, -1])
+	np.testing.assert_array_equal(batch.max_error_distance, [16_000_000, np.nan])
+	np.testing.assert_array_equal(batch.team_ids, [['a', 'b'], ['team-x', 'team-y']])
+	np.testing.assert_array_equal(batch.duel_index, [0, 0, 0, 1])
+	np.testing.assert_array_equal(batch.round_number, [1, 2, 3, 1])
+	np.testing.assert_array_equal(batch.country, ['FR', 'DE', 'FR', 'JP'])
+	np.testing.assert_array_equal(
+		batch.team_score, [[4000, 3000], [2000, 5000], [5000, 0], [3000, 4000]]
+	)
+	np.testing.assert_array_equal(batch.player_id, ['me', 'them', 'someone-else', 'me'])
+	np.testing.assert_array_equal(batch.player_team, [0, 1, 0, 1])
+	# The guess in round 4 of the first duel is left out
+	np.testing.assert_array_equal(batch.guess_round, [0, 1, 2, 0, 1, 3, 3])
+	np.testing.assert_array_equal(batch.guess_player, [0, 0, 0, 1, 1, 2, 3])
+	np.testing.assert_array_equal(batch.guess_duel_index, [0, 0, 0, 0, 0, 1, 1])
+	np.testing.assert_array_equal(batch.guess_team, [0, 0, 0, 1, 1, 0, 1])
+	assert np.isnat(batch.guess_created[5])
+	np.testing.assert_array_equal(
+		batch.per_duel_sum(batch.team_score), [[11_000, 8000], [3000, 4000]]
+	)
+
+
+def test_concat_is_the_same_as_one_batch(finished, unfinished, batch):
+	assert_batches_equal(
+		DuelBatch.concat(
+			[
+				DuelBatch.from_duels([finished]),
+				DuelBatch.from_duels([]),
+				DuelBatch.from_duels([unfinished]),
+			]
+		),
+		batch,
+	)
+	assert_batches_equal(DuelBatch.concat([batch]), batch)
+
+
+def test_needs_two_teams(finished):
+	finished.teams.append(finished.teams[0])
+	with pytest.raises(ValueError, match='3 teams'):
+		DuelBatch.from_duels([finished])
+
+
+def test_time_to_guess(batch):
+	np.testing.assert_array_equal(time_to_guess(batch), [12, 20, 5, 10, 15, np.nan, 30])
+	np.testing.assert_array_equal(
+		time_to_guess(batch, since_timer=True), [2, 5, np.nan, 0, 0, np.nan, np.nan]
+	)
+
+
+def test_damage(batch):
+	np.testing.assert_array_equal(
+		damage_taken(batch), [[0, 1000], [3000, 0], [0, 5000], [1000, 0]]
+	)
+	np.testing.assert_array_equal(
+		damage_dealt(batch), [[1000, 0], [0, 3000], [5000, 0], [0, 1000]]
+	)
+
+
+def test_health_curves(batch):
+	np.testing.assert_array_equal(
+		health_curves(batch),
+		[
+			[[6000, 6000], [6000, 5000], [3000, 5000], [3000, 0]],
+			[[5000, 5000], [4000, 5000], [np.nan, np.nan], [np.nan, np.nan]],
+		],
+	)
+
+
+def test_comebacks(batch):
+	np.testing.assert_array_equal(largest_deficit(batch), [2000, -1])
+	np.testing.assert_array_equal(comebacks(batch), [True, False])
+	np.testing.assert_array_equal(comebacks(batch, 2001), [False, False])
+
+
+def test_player_teams(batch):
+	np.testing.assert_array_equal(player_teams(batch, 'me'), [0, 1])
+	np.testing.assert_array_equal(player_teams(batch, 'them'), [1, -1])
+	np.testing.assert_array_equal(player_teams(batch, 'nobody'), [-1, -1])
+
+
+def test_duel_country_stats(batch):
+	stats = duel_country_stats(batch, 'me')
+	np.testing.assert_array_equal(stats.keys, ['DE', 'FR', 'JP'])
+	np.testing.assert_array_equal(stats.rounds, [1, 2, 1])
+	np.testing.assert_array_equal(stats.rounds_won, [0, 2, 1])
+	np.testing.assert_array_equal(stats.mean_score, [2000, 4500, 4000])
+	np.testing.assert_array_equal(stats.mean_score_difference, [-3000, 3000, 1000])
+	np.testing.assert_array_equal(stats.damage_dealt, [0, 6000, 1000])
+	np.testing.assert_array_equal(stats.damage_taken, [3000, 0, 0])
+	np.testing.assert_array_equal(stats.mean_time_to_guess, [20, 8.5, 30])
+
+	stats = duel_country_stats(batch, 'someone-else')
+	np.testing.assert_array_equal(stats.keys, ['JP'])
+	np.testing.assert_array_equal(stats.mean_score_difference, [-1000])
+	np.testing.assert_array_equal(stats.mean_time_to_guess, [np.nan])
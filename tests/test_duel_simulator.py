@@ -0,0 +1,77 @@
+import numpy as np
+
+from pygeoguessr.duel_batch import DuelBatch
+from pygeoguessr.duel_simulator import DuelRules, replay, resample_rounds, sample_rounds, simulate
+from pygeoguessr.lite import LiteDuel, LiteDuelRound, LiteDuelTeam
+
+
+def _unstarted_duel() -> LiteDuel:
+	"""Duel where the first round is still being played, so no round has a result yet"""
+	return LiteDuel(
+		gameId='00000000-0000-0000-0000-000000000000',
+		status='Created',
+		competitiveGameMode='StandardDuels',
+		mapSlug='world',
+		maxErrorDistance=18_000_000,
+		initialHealth=6000,
+		isRated=True,
+		rounds=[LiteDuelRound(1, 0.0, 0.0, 'AU', 1, 1, False, 1_700_000_000, None, None)],
+		teams=[LiteDuelTeam(team_id, team_id, 6000, [], []) for team_id in ('red', 'blue')],
+		winningTeamId=None,
+		isDraw=False,
+	)
+
+
+def test_replay_empty_batch():
+	result = replay(DuelBatch.from_duels([]), DuelRules(), keep_history=True)
+	assert result.winner.shape == (0,)
+	assert result.health.shape == (0, 2)
+	assert result.health_after.shape == (0, 0, 2)
+
+
+def test_replay_without_finished_rounds():
+	batch = DuelBatch.from_duels([_unstarted_duel()])
+	assert len(batch) == 0
+	result = replay(batch, DuelRules())
+	assert result.winner.tolist() == [-2]
+	assert result.rounds.tolist() == [0]
+	assert result.health.tolist() == [[6000, 6000]]
+
+
+def test_resample_without_finished_rounds():
+	batch = DuelBatch.from_duels([_unstarted_duel()])
+	result = resample_rounds(batch, DuelRules(), 10, rng=np.random.default_rng(0))
+	assert result.winner.shape == (10, 1)
+	assert (result.winner == -2).all()
+
+
+def test_simulate_zero_rounds():
+	result = simulate(np.zeros((3, 0, 2), dtype=np.int32), DuelRules())
+	assert result.winner.tolist() == [-2, -2, -2]
+	assert result.health.shape == (3, 2)
+
+
+def test_simulate_damage():
+	# Round 5 has a multiplier of 1.5 with the default rules
+	scores = np.array([[[5000, 4000]] * 4 + [[0, 4000]]])
+	result = simulate(scores, DuelRules(initial_health=6000), keep_history=True)
+	assert result.health_after[0, :, 1].tolist() == [5000, 4000, 3000, 2000, 2000]
+	assert result.health_after[0, 4, 0] == 0
+	assert result.winner.tolist() == [1]
+	assert result.rounds.tolist() == [5]
+
+
+def test_simulate_without_history():
+	result = simulate(np.full((2, 3, 2), 5000, dtype=np.int32), DuelRules())
+	assert result.health_after is None
+	assert result.rounds.tolist() == [3, 3]
+
+
+def test_sample_rounds_in_chunks(monkeypatch):
+	monkeypatch.setattr('pygeoguessr.duel_simulator._rounds_per_chunk', 30)
+	scores = [[5000, 0], [0, 5000]]
+	result = sample_rounds(scores, DuelRules(), 25, keep_history=True, rng=np.random.default_rng(0))
+	assert result.winner.shape == (25,)
+	assert result.health_after.shape == (25, 30, 2)
+	assert (result.winner >= 0).all()
+	assert sample_rounds(scores, DuelRules(), 0).winner.shape == (0,)
@@ -0,0 +1,98 @@
+import json
+
+import pydantic
+import pytest
+
+from pygeoguessr import settings
+from pygeoguessr.apis import games
+from pygeoguessr.apis.challenges import ChallengeHighscoresPage
+from pygeoguessr.apis.games import Game, get_game_details
+from pygeoguessr.entity_store import EntityStore, entity_store, lookup, remember
+from pygeoguessr.lazy import validate_lazy_json
+
+
+class Thing(pydantic.BaseModel):
+	id: str
+
+
+class OtherThing(pydantic.BaseModel):
+	id: str
+
+
+def _highscores_page(make_game) -> str:
+	high_score = {
+		'gameToken': 'AbCdEfGhIjKlMnOp',
+		'playerName': 'someone',
+		'userId': '5b6ae3177135fa0e48b4df1f',
+		'totalScore': 4999,
+		'isLeader': False,
+		'pinUrl': 'pin/abc.png',
+		'game': make_game(token='AbCdEfGhIjKlMnOp'),
+	}
+	return json.dumps({'items': [high_score], 'paginationToken': None})
+
+
+@pytest.fixture
+def store(monkeypatch):
+	monkeypatch.setattr(settings, 'use_entity_store', True)
+	entity_store.clear()
+	yield entity_store
+	entity_store.clear()
+
+
+def test_least_recently_used_is_forgotten():
+	store = EntityStore(max_size=2)
+	a, b, c = Thing(id='a'), Thing(id='b'), Thing(id='c')
+	store.add(a, 'a')
+	store.add(b, 'b')
+	assert store.get(Thing, 'a') is a
+	store.add(c, 'c')
+	assert len(store) == 2
+	assert store.get(Thing, 'a') is a
+	assert store.get(Thing, 'b') is None
+	assert store.get(Thing, 'c') is c
+
+
+def test_types_and_ids():
+	store = EntityStore()
+	thing = Thing(id='a')
+	store.add(thing, 'a', 'also-a')
+	assert store.get(Thing, 'a') is store.get(Thing, 'also-a') is thing
+	assert store.get(OtherThing, 'a') is None
+	store.clear()
+	assert len(store) == 0
+	assert store.get(Thing, 'a') is None
+
+
+def test_off_by_default():
+	assert not settings.use_entity_store
+	remember(Thing(id='a'), 'a')
+	assert len(entity_store) == 0
+	assert lookup(Thing, 'a') is None
+
+
+def test_remember_and_lookup(store):
+	thing = Thing(id='a')
+	remember(thing, 'a')
+	remember(None, 'b')
+	assert len(store) == 1
+	assert lookup(Thing, 'a') is thing
+
+
+@pytest.mark.parametrize('lazy_nested_fields', [False, True])
+def test_highscore_games_are_remembered(monkeypatch, store, make_game, lazy_nested_fields):
+	monkeypatch.setattr(settings, 'lazy_nested_fields', lazy_nested_fields)
+	highscores = validate_lazy_json(ChallengeHighscoresPage, _highscores_page(make_game))
+
+	def call_api(*_args, **_kwargs):
+		raise AssertionError('Should have come from the entity store')
+
+	monkeypatch.setattr(games, 'call_api', call_api)
+	game = get_game_details('AbCdEfGhIjKlMnOp')
+	assert isinstance(game, Game)
+	assert game is highscores.items[0].game
+
+
+def test_skipped_games_are_not_remembered(store, make_game):
+	validate_lazy_json(ChallengeHighscoresPage, _highscores_page(make_game), skip_lazy=True)
+	assert len(store) == 0
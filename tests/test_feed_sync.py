@@ -0,0 +1,178 @@
+import asyncio
+import json
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from pygeoguessr import feed_sync
+from pygeoguessr.apis.activities import (
+	ActivityType,
+	_iter_page_activities,
+	_ParsedActivityFeedPage,
+)
+from pygeoguessr.feed_sync import (
+	FeedCheckpoint,
+	activity_key,
+	sync_activity_feed,
+	sync_activity_feed_async,
+)
+
+_user = {
+	'id': '5b6ae3177135fa0e48b4df1f',
+	'nick': 'someone',
+	'isVerified': False,
+	'flair': 0,
+	'avatar': {'url': 'pin/abc.png', 'isDefault': False, 'anchor': 'center-center'},
+}
+_start = datetime(2024, 1, 1, tzinfo=UTC)
+
+
+def _entry(i: int, time: datetime | None = None) -> dict:
+	game = {
+		'mapSlug': 'world',
+		'mapName': 'World',
+		'points': i,
+		'gameToken': f'AbCdEfGhIj{i:06}',
+		'gameMode': 'Standard',
+	}
+	return {
+		'type': ActivityType.PlayedGame,
+		'time': (time or _start + timedelta(hours=i)).isoformat(),
+		'user': _user,
+		'payload': json.dumps(game),
+	}
+
+
+class FakeFeed:
+	"""Serves pages of entries (newest first), with the pagination token being the offset of the next page"""
+
+	def __init__(self, entries: list[dict]):
+		self.entries = entries
+		self.pages_requested = 0
+
+	def prepend(self, *entries: dict):
+		self.entries[:0] = entries
+
+	def page(self, pagination_token: str | None, per_page: int, *, friends: bool):
+		assert not friends
+		self.pages_requested += 1
+		start = int(pagination_token or 0)
+		end = start + per_page
+		page = {
+			'entries': self.entries[start:end],
+			'paginationToken': str(end) if end < len(self.entries) else None,
+		}
+		return _ParsedActivityFeedPage.model_validate_json(json.dumps(page))
+
+	async def page_async(self, _session, pagination_token: str | None, per_page: int, *, friends: bool):
+		return self.page(pagination_token, per_page, friends=friends)
+
+
+@pytest.fixture
+def feed(monkeypatch) -> FakeFeed:
+	fake = FakeFeed([_entry(i) for i in reversed(range(10))])
+	monkeypatch.setattr(feed_sync, '_get_activity_feed_page', fake.page)
+	monkeypatch.setattr(feed_sync, '_get_activity_feed_page_async', fake.page_async)
+	return fake
+
+
+def _points(activities) -> list[int]:
+	return [activity.payload.points for activity in activities]
+
+
+def test_only_new_activities(tmp_path, feed):
+	path = tmp_path / 'checkpoint.json'
+	assert _points(sync_activity_feed(path, 3)) == list(reversed(range(10)))
+	checkpoint = FeedCheckpoint.load(path)
+	assert checkpoint.newest_time == _start + timedelta(hours=9)
+	assert checkpoint.resume_token is None
+
+	feed.pages_requested = 0
+	assert _points(sync_activity_feed(path, 3)) == []
+	assert feed.pages_requested == 1
+
+	feed.prepend(_entry(12), _entry(11), _entry(10))
+	assert _points(sync_activity_feed(path, 2)) == [12, 11, 10]
+	# Stops at the page with the first already synced activity
+	assert feed.pages_requested == 3
+
+
+def test_resumes_after_interruption(tmp_path, feed):
+	path = tmp_path / 'checkpoint.json'
+	list(sync_activity_feed(path, 3))
+	feed.prepend(*(_entry(i) for i in reversed(range(10, 17))))
+
+	synced = []
+	for activity in sync_activity_feed(path, 2):
+		synced.append(activity)
+		if len(synced) == 3:
+			# Interrupted in the middle of the second page
+			break
+	assert _points(synced) == [16, 15, 14]
+	checkpoint = FeedCheckpoint.load(path)
+	assert checkpoint.resume_token == '2'
+	assert checkpoint.pending_newest_time == _start + timedelta(hours=16)
+	assert checkpoint.newest_time == _start + timedelta(hours=9)
+
+	feed.prepend(_entry(17))
+	resumed = list(sync_activity_feed(path, 2))
+	# Carries on from the start of the page it was interrupted on (shifted by one as something new was added since), and then gets what's newer than where it started
+	assert _points(resumed) == [15, 14, 13, 12, 11, 10, 17]
+	checkpoint = FeedCheckpoint.load(path)
+	assert checkpoint.resume_token is None
+	assert checkpoint.pending_newest_time is None
+	assert checkpoint.newest_time == _start + timedelta(hours=17)
+	assert _points(sync_activity_feed(path, 2)) == []
+
+
+def test_activities_at_the_same_time(tmp_path, feed):
+	path = tmp_path / 'checkpoint.json'
+	same_time = _start + timedelta(days=1)
+	feed.prepend(_entry(100, same_time), _entry(101, same_time))
+	assert _points(sync_activity_feed(path, 5))[:2] == [100, 101]
+	assert len(FeedCheckpoint.load(path).newest_keys) == 2
+
+	feed.prepend(_entry(102, same_time))
+	assert _points(sync_activity_feed(path, 5)) == [102]
+	assert len(FeedCheckpoint.load(path).newest_keys) == 3
+
+
+def test_async(tmp_path, feed):
+	path = tmp_path / 'checkpoint.json'
+
+	async def sync(per_page: int, stop_after: int | None = None) -> list[int]:
+		synced = []
+		async for activity in sync_activity_feed_async(path, per_page, session=object()):  # type: ignore[arg-type]
+			synced.append(activity.payload.points)
+			if len(synced) == stop_after:
+				break
+		return synced
+
+	assert asyncio.run(sync(4)) == list(reversed(range(10)))
+	feed.prepend(_entry(12), _entry(11), _entry(10))
+	assert asyncio.run(sync(2, stop_after=1)) == [12]
+	assert asyncio.run(sync(2)) == [12, 11, 10]
+	assert asyncio.run(sync(2)) == []
+
+
+def test_checkpoint_round_trip(tmp_path, feed):
+	path = tmp_path / 'checkpoint.json'
+	assert FeedCheckpoint.load(path) == FeedCheckpoint()
+	list(sync_activity_feed(path))
+	checkpoint = FeedCheckpoint.load(path)
+	assert len(checkpoint.newest_keys) == 1
+	checkpoint.save(path)
+	assert FeedCheckpoint.load(path) == checkpoint
+	assert not path.with_name('checkpoint.json.tmp').exists()
+	with pytest.raises(ValueError, match='private'):
+		FeedCheckpoint.load(path, friends=True)
+
+
+def test_activity_key():
+	entries = [_entry(1), _entry(1), _entry(2, _start + timedelta(hours=1))]
+	page = _ParsedActivityFeedPage.model_validate_json(
+		json.dumps({'entries': entries, 'paginationToken': None})
+	)
+	first, same, different_payload = _iter_page_activities(page)
+	assert activity_key(first) == activity_key(same)
+	assert activity_key(first) != activity_key(different_payload)
@@ -0,0 +1,106 @@
+import json
+from dataclasses import fields
+
+import numpy as np
+import pytest
+
+from pygeoguessr.apis.games import Game
+from pygeoguessr.game_batch import GameBatch
+from pygeoguessr.lite import LiteGame
+
+
+def assert_batches_equal(a: GameBatch, b: GameBatch):
+	for field in fields(GameBatch):
+		a_value, b_value = getattr(a, field.name), getattr(b, field.name)
+		if isinstance(a_value, np.ndarray):
+			assert a_value.dtype == b_value.dtype, field.name
+		np.testing.assert_array_equal(a_value, b_value, err_msg=field.name)
+
+
+@pytest.fixture
+def game_dicts(make_game) -> list[dict]:
+	unfinished = make_game(
+		token='Unfinished000001',
+		locations=[(1, 2, '61'), (3, 4, '62')],
+		guesses=[(1.5, 2.5, 3000, 70_000, 12)],
+		map_slug='a-map',
+		bounds=(0, 0, 10, 10),
+		country_codes=['fr', 'de'],
+	)
+	unfinished['state'] = 'started'
+	streak = make_game(
+		token='StreakGame000001',
+		locations=[(5, 6, '63')],
+		guesses=[(5, 6, 1, 0, 5)],
+		country_codes=['br'],
+	)
+	streak['mode'] = 'streak'
+	streak['player']['guesses'][0]['streakLocationCode'] = 'br'
+	# stepsCount isn't always there
+	no_steps = make_game(
+		token='NoStepsGame00001',
+		locations=[(-1, -2, '64'), (-3, -4, '65'), (-5, -6, '66')],
+		guesses=[(-1, -2, 5000, 0, 10), (-3, -4.1, 4900, 11_000, 20), (0, 0, 0, 0, 60)],
+	)
+	no_steps['player']['guesses'][1]['stepsCount'] = None
+	no_steps['player']['guesses'][2]['timedOut'] = True
+	no_steps['rounds'][1]['startTime'] = '2024-03-01T10:01:00+00:00'
+	return [make_game(), unfinished, streak, no_steps]
+
+
+def test_from_games(game_dicts):
+	batch = GameBatch.from_games(Game.model_validate(game) for game in game_dicts)
+	assert batch.tokens == [
+		'AbCdEfGhIjKlMnOp',
+		'Unfinished000001',
+		'StreakGame000001',
+		'NoStepsGame00001',
+	]
+	assert batch.game_count == 4
+	assert len(batch) == 6
+	np.testing.assert_array_equal(batch.offsets, [0, 1, 2, 3, 6])
+	np.testing.assert_array_equal(batch.rounds_per_game, [1, 1, 1, 3])
+	np.testing.assert_array_equal(batch.game_index, [0, 1, 2, 3, 3, 3])
+	np.testing.assert_array_equal(batch.round_index, [0, 0, 0, 0, 1, 2])
+	np.testing.assert_array_equal(batch.bounds[1], [0, 0, 10, 10])
+	np.testing.assert_array_equal(batch.streak, [False, False, True, False])
+	np.testing.assert_array_equal(batch.map_slug, ['world', 'a-map', 'world', 'world'])
+	assert batch.start_time[0] == np.datetime64('2024-03-01T10:00:00.123')
+	np.testing.assert_array_equal(batch.actual_lat, [-33.8688, 1, 5, -1, -3, -5])
+	np.testing.assert_array_equal(batch.guess_lng, [151.21, 2.5, 6, -2, -4.1, 0])
+	np.testing.assert_array_equal(batch.score, [4999, 3000, 1, 5000, 4900, 0])
+	np.testing.assert_array_equal(batch.distance, [160, 70_000, 0, 0, 11_000, 0])
+	np.testing.assert_array_equal(batch.time, [30, 12, 5, 10, 20, 60])
+	np.testing.assert_array_equal(batch.steps, [0, 0, 0, 0, -1, 0])
+	np.testing.assert_array_equal(batch.timed_out, [False] * 5 + [True])
+	np.testing.assert_array_equal(batch.country, ['AU', 'FR', 'BR', 'AU', 'AU', 'AU'])
+	np.testing.assert_array_equal(batch.guess_country, ['', '', 'BR', '', '', ''])
+	np.testing.assert_array_equal(batch.per_game_sum(batch.score), [4999, 3000, 1, 9900])
+
+
+def test_lite_games_are_the_same(game_dicts):
+	assert_batches_equal(
+		GameBatch.from_lite_games([LiteGame.from_json(json.dumps(game)) for game in game_dicts]),
+		GameBatch.from_games(Game.model_validate(game) for game in game_dicts),
+	)
+
+
+def test_concat_is_the_same_as_one_batch(game_dicts):
+	games = [Game.model_validate(game) for game in game_dicts]
+	whole = GameBatch.from_games(games)
+	assert_batches_equal(
+		GameBatch.concat(
+			[GameBatch.from_games(games[:1]), GameBatch.from_games([]), GameBatch.from_games(games[1:])]
+		),
+		whole,
+	)
+	assert_batches_equal(GameBatch.concat([whole]), whole)
+
+
+def test_empty():
+	batch = GameBatch.from_games([])
+	assert batch.game_count == 0
+	assert len(batch) == 0
+	assert batch.bounds.shape == (0, 4)
+	assert batch.per_game_sum(batch.score).shape == (0,)
+	assert_batches_equal(GameBatch.from_lite_games([]), batch)
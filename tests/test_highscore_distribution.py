@@ -0,0 +1,109 @@
+import json
+from datetime import timedelta
+
+import pydantic
+import pytest
+
+from pygeoguessr import settings
+from pygeoguessr.apis.challenges import ChallengeHighscoresPage
+from pygeoguessr.highscore_distribution import HighscoreDistribution
+from pygeoguessr.lazy import peek_raw, validate_lazy_json
+
+
+def _page(make_game, times: list[int], *, game: dict | None = None) -> str:
+	items = [
+		{
+			'gameToken': f'AbCdEfGhIjKl{i:04}',
+			'playerName': f'player {i}',
+			'userId': '5b6ae3177135fa0e48b4df1f',
+			'totalScore': 1000 * i,
+			'isLeader': False,
+			'pinUrl': 'pin/abc.png',
+			'game': game or make_game(token=f'AbCdEfGhIjKl{i:04}', total_time=time),
+		}
+		for i, time in enumerate(times)
+	]
+	return json.dumps({'items': items, 'paginationToken': None})
+
+
+@pytest.fixture(autouse=True)
+def _no_entity_store(monkeypatch):
+	monkeypatch.setattr(settings, 'use_entity_store', False)
+
+
+@pytest.mark.parametrize('lazy_nested_fields', [False, True])
+def test_distribution(monkeypatch, make_game, lazy_nested_fields):
+	monkeypatch.setattr(settings, 'lazy_nested_fields', lazy_nested_fields)
+	page = validate_lazy_json(ChallengeHighscoresPage, _page(make_game, list(range(60, 161))))
+	distribution = HighscoreDistribution()
+	distribution.update(page.items)
+	if lazy_nested_fields:
+		# Times were read without validating any of the games
+		assert all(peek_raw(high_score, 'game') is not None for high_score in page.items)
+	assert distribution.count == 101
+	assert distribution.score_at_percentile(0) == 0
+	assert distribution.score_at_percentile(100) == 100_000
+	assert distribution.score_at_percentile(50) == pytest.approx(50_000, rel=0.02)
+	assert distribution.score_percentile(50_000) == pytest.approx(50, abs=2)
+	assert distribution.time_at_percentile(50) == pytest.approx(timedelta(seconds=110), abs=timedelta(seconds=2))
+	assert distribution.time_percentile(timedelta(seconds=135)) == pytest.approx(75, abs=2)
+
+
+def test_peek_raw_is_none_once_validated(monkeypatch, make_game):
+	monkeypatch.setattr(settings, 'lazy_nested_fields', True)
+	page = validate_lazy_json(ChallengeHighscoresPage, _page(make_game, [60]))
+	high_score = page.items[0]
+	assert peek_raw(high_score, 'game')['player']['totalTime'] == 60
+	assert high_score.game is not None
+	assert peek_raw(high_score, 'game') is None
+	assert peek_raw(high_score, 'nonexistent') is None
+
+
+def test_skipped_games_are_not_counted_in_times(make_game):
+	page = validate_lazy_json(ChallengeHighscoresPage, _page(make_game, [60, 70]), skip_lazy=True)
+	distribution = HighscoreDistribution()
+	distribution.update(page.items)
+	assert distribution.count == 2
+	assert distribution.score_at_percentile(100) == 1000
+	assert distribution.time_at_percentile(50) is None
+	assert distribution.time_percentile(60) is None
+
+
+def test_malformed_game_raises_validation_error(monkeypatch, make_game):
+	monkeypatch.setattr(settings, 'lazy_nested_fields', True)
+	game = make_game()
+	del game['player']
+	page = validate_lazy_json(ChallengeHighscoresPage, _page(make_game, [60], game=game))
+	with pytest.raises(pydantic.ValidationError):
+		HighscoreDistribution().add(page.items[0])
+
+
+def test_empty():
+	distribution = HighscoreDistribution()
+	assert distribution.count == 0
+	assert distribution.score_at_percentile(50) is None
+	assert distribution.time_at_percentile(50) is None
+	assert distribution.score_percentile(1000) is None
+	assert distribution.time_percentile(timedelta(minutes=1)) is None
+
+
+@pytest.mark.parametrize('percentile', [-1, 100.5])
+def test_percentile_out_of_range(percentile):
+	distribution = HighscoreDistribution()
+	with pytest.raises(ValueError, match='between 0 and 100'):
+		distribution.score_at_percentile(percentile)
+	with pytest.raises(ValueError, match='between 0 and 100'):
+		distribution.time_at_percentile(percentile)
+
+
+def test_merge(make_game):
+	page = validate_lazy_json(ChallengeHighscoresPage, _page(make_game, list(range(60, 161))))
+	combined = HighscoreDistribution()
+	combined.update(page.items)
+	first, second = HighscoreDistribution(), HighscoreDistribution()
+	first.update(page.items[::2])
+	second.update(page.items[1::2])
+	first.merge(second)
+	assert first.count == combined.count
+	assert first.score_at_percentile(50) == pytest.approx(combined.score_at_percentile(50), rel=0.02)
+	assert first.time_at_percentile(90) == pytest.approx(combined.time_at_percentile(90), abs=timedelta(seconds=2))
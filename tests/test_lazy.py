@@ -0,0 +1,112 @@
+import pickle
+from typing import Annotated
+
+import pydantic
+import pytest
+
+from pygeoguessr import settings
+from pygeoguessr.lazy import Lazy, LazyValue, eager_context, validate_lazy_json
+from pygeoguessr.settings import BaseModel
+
+
+class Inner(BaseModel):
+	a: int
+	b: str
+
+
+class Outer(BaseModel):
+	x: int
+	inner: Annotated[Inner | None, Lazy()]
+	inners: Annotated[list[Inner] | None, Lazy()] = None
+
+
+_json = '{"x": 1, "inner": {"a": "2", "b": "c"}, "inners": [{"a": 3, "b": "d"}]}'
+_invalid_json = '{"x": 1, "inner": {"a": "nope", "b": "c"}}'
+
+
+@pytest.fixture
+def lazy(monkeypatch):
+	monkeypatch.setattr(settings, 'lazy_nested_fields', True)
+
+
+def test_eager_by_default():
+	outer = validate_lazy_json(Outer, _json)
+	assert isinstance(outer.__dict__['inner'], Inner)
+	assert outer.inner == Inner(a=2, b='c')
+	with pytest.raises(pydantic.ValidationError):
+		validate_lazy_json(Outer, _invalid_json)
+
+
+@pytest.mark.usefixtures('lazy')
+def test_validated_when_accessed():
+	outer = validate_lazy_json(Outer, _json)
+	assert isinstance(outer.__dict__['inner'], LazyValue)
+	assert outer.inner == Inner(a=2, b='c')
+	assert isinstance(outer.__dict__['inner'], Inner)
+	assert outer.inners == [Inner(a=3, b='d')]
+
+
+@pytest.mark.usefixtures('lazy')
+def test_error_raised_when_accessed():
+	outer = validate_lazy_json(Outer, _invalid_json)
+	assert outer.x == 1
+	with pytest.raises(pydantic.ValidationError):
+		_ = outer.inner
+
+
+@pytest.mark.usefixtures('lazy')
+def test_validating_json_directly_is_not_lazy():
+	outer = Outer.model_validate_json(_json)
+	assert isinstance(outer.__dict__['inner'], Inner)
+	with pytest.raises(pydantic.ValidationError):
+		Outer.model_validate_json(_invalid_json)
+	with pytest.raises(pydantic.ValidationError):
+		Outer.model_validate(pydantic.TypeAdapter(dict).validate_json(_invalid_json), context=eager_context)
+
+
+@pytest.mark.parametrize('lazy_nested_fields', [False, True])
+def test_skip_lazy(monkeypatch, lazy_nested_fields):
+	monkeypatch.setattr(settings, 'lazy_nested_fields', lazy_nested_fields)
+	outer = validate_lazy_json(Outer, _invalid_json, skip_lazy=True)
+	assert outer.x == 1
+	assert outer.inner is None
+	assert outer.inners is None
+
+
+@pytest.mark.usefixtures('lazy')
+def test_dump_is_the_same_whether_accessed_or_not():
+	accessed = validate_lazy_json(Outer, _json)
+	_ = accessed.inner
+	_ = accessed.inners
+	not_accessed = validate_lazy_json(Outer, _json)
+	assert not_accessed.model_dump() == accessed.model_dump()
+	assert not_accessed.model_dump_json() == accessed.model_dump_json()
+	assert not_accessed.model_dump(include={'inner': {'a'}}) == {'inner': {'a': 2}}
+	assert not_accessed.model_dump(exclude={'inners': {0: {'b'}}}, mode='json') == {
+		'x': 1,
+		'inner': {'a': 2, 'b': 'c'},
+		'inners': [{'a': 3}],
+	}
+	assert not_accessed == accessed
+
+
+@pytest.mark.usefixtures('lazy')
+def test_dump_only_validates_once(monkeypatch):
+	outer = validate_lazy_json(Outer, _json)
+	outer.model_dump()
+	validated = outer.__dict__['inner'].validate()
+
+	def fail(*_args, **_kwargs):
+		raise AssertionError('Validated again')
+
+	monkeypatch.setattr('pygeoguessr.lazy._adapter', fail)
+	outer.model_dump()
+	assert outer.inner is validated
+
+
+@pytest.mark.usefixtures('lazy')
+def test_pickle_round_trip():
+	outer = validate_lazy_json(Outer, _json)
+	_ = outer.inner
+	_ = outer.inners
+	assert pickle.loads(pickle.dumps(outer)) == outer
@@ -0,0 +1,72 @@
+import random
+
+import pytest
+
+from pygeoguessr.apis.games import Game
+from pygeoguessr.location_index import IndexedLocation, LocationIndex
+from pygeoguessr.scoring import great_circle_distance, haversine
+
+
+def _random_locations(count: int, seed: int = 0) -> list[IndexedLocation]:
+	rng = random.Random(seed)
+	return [
+		IndexedLocation('game', f'game{i}', 1, rng.uniform(-90, 90), rng.uniform(-180, 180), None)
+		for i in range(count)
+	]
+
+
+def test_haversine_is_the_same_as_great_circle_distance():
+	for location in _random_locations(100):
+		assert haversine(0.5, 1.5, location.lat, location.lng) == pytest.approx(
+			float(great_circle_distance(0.5, 1.5, location.lat, location.lng))
+		)
+
+
+@pytest.mark.parametrize(
+	('lat', 'lng', 'radius'),
+	[
+		(0, 0, 50_000),
+		(-33.87, 151.21, 500_000),
+		(10, 179.99, 100_000),
+		(10, -179.99, 100_000),
+		(89.9, 0, 200_000),
+		(-89.9, 45, 200_000),
+		(45, 90, 20_000_000),
+	],
+)
+def test_within_is_the_same_as_checking_everything(lat, lng, radius):
+	locations = _random_locations(5000)
+	index = LocationIndex(cell_size=1)
+	for location in locations:
+		index.add(location)
+	expected = sorted(
+		(haversine(lat, lng, location.lat, location.lng), location)
+		for location in locations
+		if haversine(lat, lng, location.lat, location.lng) <= radius
+	)
+	assert index.within(lat, lng, radius) == expected
+
+
+def test_add_game_and_seen(make_game):
+	game = Game.model_validate(
+		make_game(
+			locations=[(48.8584, 2.2945, '61'), (-33.8568, 151.2153, '62')],
+			guesses=[(48.8, 2.3, 4900, 6500, 10)],
+		)
+	)
+	index = LocationIndex()
+	index.add_game(game)
+	assert len(index) == 2
+	first = IndexedLocation('game', game.token, 1, 48.8584, 2.2945, game.rounds[0].panoId)
+	second = IndexedLocation('game', game.token, 2, -33.8568, 151.2153, game.rounds[1].panoId)
+	assert index.with_pano(game.rounds[1].panoId) == [second]
+	# About 500 m away
+	assert index.seen(48.8584, 2.3013) == []
+	assert index.seen(48.8584, 2.3013, radius=1000) == [first]
+	assert index.seen(0, 0, game.rounds[1].panoId) == [second]
+	assert index.reused_panos() == {}
+	index.update([game])
+	assert index.reused_panos() == {
+		game.rounds[0].panoId: [first, first],
+		game.rounds[1].panoId: [second, second],
+	}
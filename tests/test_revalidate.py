@@ -0,0 +1,104 @@
+import asyncio
+import json
+
+import pytest
+import requests_cache
+from aiohttp_client_cache.response import CachedResponse
+from yarl import URL
+
+from pygeoguessr.filesystem_cache_with_dirs import FileCacheWithDirectories
+from pygeoguessr.revalidate import revalidate_async_cache, revalidate_cache
+from pygeoguessr.sqlite_cache_with_index import SQLiteBackendWithIndex
+
+
+def _bodies(make_game) -> dict[str, bytes]:
+	with_new_fields = make_game(token='NewFieldsGame001')
+	with_new_fields['someNewField'] = 1
+	with_new_fields['player']['someNewField'] = 2
+	with_new_fields['player']['guesses'][0]['anotherNewField'] = 3
+	invalid = make_game(token='InvalidGame00001')
+	invalid['rounds'][0]['lat'] = 'nope'
+	bodies = {
+		f'api/v3/games/ValidGame{i:07}': json.dumps(make_game(token=f'ValidGame{i:07}')).encode()
+		for i in range(20)
+	}
+	bodies |= {
+		'api/v3/games/NewFieldsGame001': json.dumps(with_new_fields).encode(),
+		'api/v3/games/InvalidGame00001': json.dumps(invalid).encode(),
+		'api/v3/games/NotJsonGame00001': b'<html>Not found</html>',
+		'api/v3/profiles/me': b'{"definitely": "not a user"}',
+		# No model for this, so it isn't checked
+		'api/v3/something/new': b'nope',
+	}
+	return bodies
+
+
+def _check(results):
+	results = {result.key: result for result in results}
+	assert set(results) == {
+		'api/v3/games/NewFieldsGame001',
+		'api/v3/games/InvalidGame00001',
+		'api/v3/games/NotJsonGame00001',
+		'api/v3/profiles/me',
+	}
+	new_fields = results['api/v3/games/NewFieldsGame001']
+	assert new_fields.template == 'api/v3/games/{game}'
+	assert new_fields.errors == []
+	assert new_fields.unknown_fields == [
+		'someNewField',
+		'player.someNewField',
+		'player.guesses[].anotherNewField',
+	]
+	invalid = results['api/v3/games/InvalidGame00001']
+	assert len(invalid.errors) == 1
+	assert invalid.errors[0].startswith('rounds.0.lat: ')
+	assert invalid.unknown_fields == []
+	assert results['api/v3/games/NotJsonGame00001'].errors
+	assert results['api/v3/profiles/me'].template == 'api/v3/profiles/me'
+	assert results['api/v3/profiles/me'].errors
+
+
+def test_revalidate_cache(tmp_path, make_game):
+	cache = FileCacheWithDirectories(tmp_path / 'cache')
+	for key, body in _bodies(make_game).items():
+		cache.responses[key] = requests_cache.CachedResponse(
+			url=f'https://www.geoguessr.com/{key}', status_code=200, content=body
+		)
+	_check(revalidate_cache(cache, processes=2, batch_size=3))
+	assert [
+		result.key for result in revalidate_cache(cache, {'api/v3/profiles/me'}, processes=1)
+	] == ['api/v3/profiles/me']
+
+
+def test_revalidate_cache_needs_json_serializer(tmp_path):
+	cache = FileCacheWithDirectories(tmp_path / 'cache', serializer='pickle')
+	with pytest.raises(ValueError, match='JSON'):
+		next(revalidate_cache(cache))
+
+
+@pytest.mark.parametrize('index', [True, False])
+def test_revalidate_async_cache(tmp_path, make_game, index):
+	async def main():
+		cache = SQLiteBackendWithIndex(str(tmp_path / 'cache.sqlite'))
+		for key, body in _bodies(make_game).items():
+			response = CachedResponse(
+				'GET', 'OK', 200, URL(f'https://www.geoguessr.com/{key}'), '1.1', body=body
+			)
+			if index:
+				data = cache.responses.serialize(response) or b''
+				cache.responses.pending[key] = (data,)
+				cache.index.pending[key] = cache.index.row(response, len(data))
+			else:
+				await cache.responses.write(key, response)
+		await cache.flush()
+		results = [result async for result in revalidate_async_cache(cache, processes=2, batch_size=3)]
+		filtered = [
+			result.key
+			async for result in revalidate_async_cache(cache, {'api/v3/profiles/me'}, processes=1)
+		]
+		await cache.close()
+		return results, filtered
+
+	results, filtered = asyncio.run(main())
+	_check(results)
+	assert filtered == ['api/v3/profiles/me']
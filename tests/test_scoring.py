@@ -0,0 +1,137 @@
+import json
+import math
+from pathlib import Path
+
+import numpy as np
+import platformdirs
+import pytest
+
+from pygeoguessr.apis.games import Game
+from pygeoguessr.cache import _iter_file_cache_keys, _response_body
+from pygeoguessr.endpoints import endpoint_template
+from pygeoguessr.filesystem_cache_with_dirs import FileCacheWithDirectories
+from pygeoguessr.game_batch import GameBatch
+from pygeoguessr.models import MapBounds
+from pygeoguessr.scoring import (
+	check_scores,
+	great_circle_distance,
+	max_error_distance,
+	round_score,
+	score_guesses,
+)
+
+_world_bounds = (-65, -180, 84, 180)
+_world_max_error_distance = 16_568_044.07
+"""149° of longitude (the corners are on the same meridian) at a radius of 6371 km"""
+_one_degree = 111_194.93
+"""1° of a great circle at a radius of 6371 km"""
+
+
+def test_great_circle_distance():
+	assert great_circle_distance(0, 0, 0, 0) == 0
+	assert great_circle_distance(0, 0, 0, 1) == pytest.approx(_one_degree, abs=0.01)
+	assert great_circle_distance(0, 0, 1, 0) == pytest.approx(_one_degree, abs=0.01)
+	assert great_circle_distance(0, 0, 0, 180) == pytest.approx(math.pi * 6_371_000)
+	assert great_circle_distance(90, 0, -90, 0) == pytest.approx(math.pi * 6_371_000)
+	assert great_circle_distance(10, 179.5, 10, -179.5) == pytest.approx(
+		great_circle_distance(10, -0.5, 10, 0.5)
+	)
+	distances = great_circle_distance([0, 0], [0, 0], [0, 1], [1, 0])
+	assert distances.shape == (2,)
+	np.testing.assert_allclose(distances, [_one_degree, _one_degree])
+
+
+def test_max_error_distance():
+	assert max_error_distance(_world_bounds) == pytest.approx(_world_max_error_distance)
+	assert max_error_distance(
+		MapBounds.model_validate({'min': {'lat': -65, 'lng': -180}, 'max': {'lat': 84, 'lng': 180}})
+	) == pytest.approx(_world_max_error_distance)
+	np.testing.assert_allclose(
+		max_error_distance([_world_bounds, (0, 0, 0, 1)]), [_world_max_error_distance, _one_degree]
+	)
+
+
+@pytest.mark.parametrize(
+	('distance', 'expected'),
+	[
+		(0, 5000),
+		# 5000 * exp(-10 * 111194.93 / 16568044.07) = 4675.44
+		(_one_degree, 4675),
+		# 5000 * exp(-1) = 1839.40
+		(_world_max_error_distance / 10, 1839),
+		(_world_max_error_distance * math.log(2) / 10, 2500),
+		(_world_max_error_distance, 0),
+	],
+)
+def test_round_score(distance, expected):
+	score = round_score(distance, _world_max_error_distance)
+	assert score == expected
+	assert score.dtype == np.int32
+
+
+def test_round_score_with_no_max_error_distance():
+	with np.errstate(all='raise'):
+		np.testing.assert_array_equal(round_score([0, 0.1, 1000], 0), [5000, 0, 0])
+		np.testing.assert_array_equal(round_score([0, 0], [0, 1000]), [5000, 5000])
+
+
+def test_score_guesses():
+	np.testing.assert_array_equal(
+		score_guesses([0, 0, 0], [0, 1, 0], [0, 0, 0], [0, 0, 0], _world_max_error_distance),
+		[5000, 4675, 5000],
+	)
+
+
+def test_check_scores(make_game):
+	games = [
+		Game.model_validate(
+			make_game(
+				locations=[(0, 0, '61'), (0, 0, '62'), (10, 20, '63')],
+				guesses=[(0, 0, 5000, 0, 10), (0, 1, 4675, _one_degree, 20), (10, 20, 4999, 0, 30)],
+				bounds=_world_bounds,
+			)
+		),
+	]
+	timed_out = make_game(
+		token='QrStUvWxYz012345',
+		locations=[(0, 0, '61'), (0, 0, '62')],
+		guesses=[(0, 1, 4675, _one_degree, 20), (0, 0, 0, 0, 120)],
+		bounds=_world_bounds,
+	)
+	# The player timed out on the last round without guessing, which is not checked
+	timed_out['player']['guesses'][1]['timedOut'] = True
+	games.append(Game.model_validate(timed_out))
+	check = check_scores(GameBatch.from_games(games))
+	np.testing.assert_array_equal(check.mask, [True, True, True, True, False])
+	np.testing.assert_array_equal(check.score_error, [0, 0, 1, 0])
+	np.testing.assert_allclose(check.distance_error, 0, atol=0.01)
+	assert check.matching == 0.75
+
+
+def _cached_games(limit: int = 500) -> list[Game]:
+	# Not using _get_cache as that would create the directory if it isn't there
+	cache_dir = Path(platformdirs.user_cache_dir()) / 'geoguessr_api'
+	if not cache_dir.is_dir():
+		return []
+	games = []
+	for key, path in _iter_file_cache_keys(FileCacheWithDirectories(cache_dir)):
+		if endpoint_template(key) != 'api/v3/games/{game}':
+			continue
+		game = json.loads(_response_body('file', path.read_bytes()))
+		if game.get('state') == 'finished':
+			games.append(Game.model_validate(game))
+			if len(games) == limit:
+				break
+	return games
+
+
+def test_check_scores_against_cached_games():
+	"""Scores and distances that the API actually gave for finished games in the default sync cache, if there are any"""
+	games = _cached_games()
+	if not games:
+		pytest.skip('No finished games in the sync cache')
+	batch = GameBatch.from_games(games)
+	check = check_scores(batch)
+	assert check.matching >= 0.99
+	assert np.all(np.abs(check.score_error) <= 1)
+	assert np.all(np.abs(check.distance_error) <= np.maximum(1, 0.005 * batch.distance[check.mask]))
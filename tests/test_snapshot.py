@@ -0,0 +1,120 @@
+import asyncio
+import json
+
+import pytest
+import requests_cache
+from aiohttp_client_cache.response import CachedResponse
+from yarl import URL
+
+from pygeoguessr.cache import _iter_file_cache_keys
+from pygeoguessr.filesystem_cache_with_dirs import FileCacheWithDirectories
+from pygeoguessr.snapshot import (
+	SnapshotError,
+	export_async_cache,
+	export_cache,
+	finished_games_and_duels,
+	import_async_cache,
+	import_cache,
+	read_snapshot_info,
+)
+from pygeoguessr.sqlite_cache_with_index import SQLiteBackendWithIndex
+
+
+def _game_body(i: int) -> bytes:
+	return json.dumps({'token': f'game{i:04}', 'state': 'finished' if i % 2 else 'started'}).encode()
+
+
+def _file_cache(tmp_path, name: str, count: int = 0) -> FileCacheWithDirectories:
+	cache = FileCacheWithDirectories(tmp_path / name)
+	for i in range(count):
+		cache.responses[f'api/v3/games/game{i:04}'] = requests_cache.CachedResponse(
+			url=f'https://www.geoguessr.com/api/v3/games/game{i:04}',
+			status_code=200,
+			content=_game_body(i),
+		)
+	return cache
+
+
+async def _sqlite_cache(tmp_path, name: str, count: int = 0) -> SQLiteBackendWithIndex:
+	cache = SQLiteBackendWithIndex(str(tmp_path / name))
+	for i in range(count):
+		response = CachedResponse(
+			'GET',
+			'OK',
+			200,
+			URL(f'https://www.geoguessr.com/api/v3/games/game{i:04}'),
+			'1.1',
+			body=_game_body(i),
+		)
+		data = cache.responses.serialize(response) or b''
+		cache.responses.pending[f'key{i:04}'] = (data,)
+		cache.index.pending[f'key{i:04}'] = cache.index.row(response, len(data))
+	await cache.flush()
+	return cache
+
+
+def test_file_cache_round_trip(tmp_path):
+	source = _file_cache(tmp_path, 'source', 30)
+	info = export_cache(tmp_path / 'snapshot.zip', source)
+	assert info.count == 30
+	assert info.templates == {'api/v3/games/{game}': 30}
+
+	destination = _file_cache(tmp_path, 'destination')
+	assert import_cache(tmp_path / 'snapshot.zip', destination) == info.count
+	assert sorted(key for key, _ in _iter_file_cache_keys(destination)) == sorted(
+		key for key, _ in _iter_file_cache_keys(source)
+	)
+	assert destination.responses['api/v3/games/game0007'].content == _game_body(7)
+	assert import_cache(tmp_path / 'snapshot.zip', destination, overwrite=False) == 0
+
+
+def test_file_cache_export_with_predicate(tmp_path):
+	source = _file_cache(tmp_path, 'source', 10)
+	info = export_cache(tmp_path / 'snapshot.zip', source, predicate=finished_games_and_duels)
+	assert info.count == 5
+
+
+@pytest.mark.parametrize('count', [0, 1, 199, 200, 1000])
+def test_async_cache_round_trip(tmp_path, count):
+	async def round_trip():
+		source = await _sqlite_cache(tmp_path, 'source.sqlite', count)
+		info = await export_async_cache(tmp_path / 'snapshot.zip', source)
+		await source.close()
+		destination = await _sqlite_cache(tmp_path, 'destination.sqlite')
+		imported = await import_async_cache(tmp_path / 'snapshot.zip', destination, batch_size=200)
+		keys = {key async for key in destination.responses.keys()}
+		index_size = await destination.index.size()
+		response = await destination.responses.read('key0000') if count else None
+		await destination.close()
+		return info, imported, keys, index_size, response
+
+	info, imported, keys, index_size, response = asyncio.run(round_trip())
+	assert info.count == count
+	assert imported == count
+	assert keys == {f'key{i:04}' for i in range(count)}
+	assert index_size == count
+	if count:
+		assert response._body == _game_body(0)
+
+
+def test_corrupted_snapshot(tmp_path):
+	export_cache(tmp_path / 'snapshot.zip', _file_cache(tmp_path, 'source', 10))
+	data = bytearray((tmp_path / 'snapshot.zip').read_bytes())
+	data[60] ^= 0xFF
+	(tmp_path / 'corrupted.zip').write_bytes(data)
+	destination = _file_cache(tmp_path, 'destination')
+	with pytest.raises(SnapshotError):
+		import_cache(tmp_path / 'corrupted.zip', destination)
+	assert not list(_iter_file_cache_keys(destination))
+
+
+def test_wrong_kind_of_cache(tmp_path):
+	async def export():
+		source = await _sqlite_cache(tmp_path, 'source.sqlite', 3)
+		await export_async_cache(tmp_path / 'snapshot.zip', source)
+		await source.close()
+
+	asyncio.run(export())
+	assert read_snapshot_info(tmp_path / 'snapshot.zip').kind == 'sqlite'
+	with pytest.raises(SnapshotError):
+		import_cache(tmp_path / 'snapshot.zip', _file_cache(tmp_path, 'destination'))
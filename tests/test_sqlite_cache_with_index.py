@@ -0,0 +1,147 @@
+import asyncio
+import threading
+
+from aiohttp_client_cache.response import CachedResponse
+from yarl import URL
+
+from pygeoguessr.async_cache_io import CacheIOExecutor, OffloadedFileBackend
+from pygeoguessr.sqlite_cache_with_index import SQLiteBackendWithIndex
+
+
+def _response(i: int) -> CachedResponse:
+	return CachedResponse(
+		'GET', 'OK', 200, URL(f'https://www.geoguessr.com/api/v3/games/game{i}'), '1.1', body=b'{}'
+	)
+
+
+def _add_pending(cache: SQLiteBackendWithIndex, i: int):
+	response = _response(i)
+	data = cache.responses.serialize(response) or b''
+	cache.responses.pending[f'key{i}'] = (data,)
+	cache.index.pending[f'key{i}'] = cache.index.row(response, len(data))
+
+
+def _cache_threads() -> int:
+	return sum(thread.name.startswith('pygeoguessr-cache') for thread in threading.enumerate())
+
+
+def test_pending_responses_are_readable_before_flush(tmp_path):
+	async def main():
+		cache = SQLiteBackendWithIndex(str(tmp_path / 'cache.sqlite'))
+		_add_pending(cache, 1)
+		assert await cache.responses.contains('key1')
+		response = await cache.responses.read('key1')
+		assert str(response.url).endswith('/game1')
+		await cache.close()
+
+		reopened = SQLiteBackendWithIndex(str(tmp_path / 'cache.sqlite'))
+		keys = [key async for key in reopened.responses.keys()]
+		rows = [row async for row in reopened.index.rows('key, template')]
+		await reopened.close()
+		return keys, rows
+
+	keys, rows = asyncio.run(main())
+	assert keys == ['key1']
+	assert rows == [('key1', 'api/v3/games/{game}')]
+
+
+def test_failed_background_flush_keeps_rows(tmp_path, caplog):
+	async def main():
+		cache = SQLiteBackendWithIndex(str(tmp_path / 'cache.sqlite'), batch_interval=0.01)
+		await cache.index.size()
+		_add_pending(cache, 1)
+		flush_pending = cache.index.flush_pending
+
+		async def fail():
+			raise OSError('disk full')
+
+		cache.index.flush_pending = fail
+		cache._flush_task = asyncio.create_task(cache._flush_later())
+		await asyncio.sleep(0.1)
+		pending = list(cache.responses.pending), list(cache.index.pending)
+		cache.index.flush_pending = flush_pending
+		await cache.close()
+
+		reopened = SQLiteBackendWithIndex(str(tmp_path / 'cache.sqlite'))
+		keys = [key async for key in reopened.responses.keys()]
+		index_size = await reopened.index.size()
+		await reopened.close()
+		return pending, keys, index_size
+
+	pending, keys, index_size = asyncio.run(main())
+	assert pending == (['key1'], ['key1'])
+	assert 'will try again' in caplog.text
+	assert keys == ['key1']
+	assert index_size == 1
+
+
+def test_delete_removes_pending_and_index(tmp_path):
+	async def main():
+		cache = SQLiteBackendWithIndex(str(tmp_path / 'cache.sqlite'))
+		for i in range(3):
+			_add_pending(cache, i)
+		await cache.flush()
+		_add_pending(cache, 3)
+		await cache.bulk_delete({'key0', 'key3'})
+		keys = sorted([key async for key in cache.responses.keys()])
+		index_keys = sorted([row[0] async for row in cache.index.rows('key')])
+		await cache.close()
+		return keys, index_keys
+
+	keys, index_keys = asyncio.run(main())
+	assert keys == ['key1', 'key2']
+	assert index_keys == ['key1', 'key2']
+
+
+def test_close_shuts_down_executor(tmp_path):
+	async def main():
+		before = _cache_threads()
+		cache = SQLiteBackendWithIndex(str(tmp_path / 'cache.sqlite'))
+		await cache.io.run(sum, [1, 2])
+		await cache.close()
+		await asyncio.sleep(0.1)
+		after_close = _cache_threads()
+		# Can still be used after being closed
+		assert await cache.io.run(sum, [1, 2]) == 3
+		await cache.close()
+		return before, after_close
+
+	before, after_close = asyncio.run(main())
+	assert after_close == before
+
+
+def test_close_leaves_shared_executor_alone(tmp_path):
+	async def main():
+		io = CacheIOExecutor()
+		cache = SQLiteBackendWithIndex(str(tmp_path / 'cache.sqlite'), io=io)
+		other = OffloadedFileBackend(str(tmp_path / 'files'), io=io)
+		await cache.close()
+		await other.close()
+		result = await io.run(sum, [1, 2])
+		io.executor.shutdown()
+		return result
+
+	assert asyncio.run(main()) == 3
+
+
+def test_io_executor_limits_pending():
+	async def main():
+		io = CacheIOExecutor(max_workers=8, max_pending=2)
+		running = 0
+		most_running = 0
+		lock = threading.Lock()
+
+		def work():
+			nonlocal running, most_running
+			with lock:
+				running += 1
+				most_running = max(most_running, running)
+			threading.Event().wait(0.02)
+			with lock:
+				running -= 1
+
+		await asyncio.gather(*(io.run(work) for _ in range(10)))
+		io.shutdown()
+		return most_running
+
+	assert asyncio.run(main()) == 2
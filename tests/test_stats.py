@@ -0,0 +1,145 @@
+import numpy as np
+import pytest
+
+from pygeoguessr.apis.games import Game
+from pygeoguessr.game_batch import GameBatch
+from pygeoguessr.other import get_medal
+from pygeoguessr.stats import (
+	game_stats,
+	get_medals,
+	group,
+	group_count,
+	group_mean,
+	group_percentiles,
+	group_sum,
+	medal_indices,
+	medal_order,
+)
+from pygeoguessr.types import Medal
+
+
+def test_medals_are_the_same_as_get_medal():
+	scores = np.array([0, 4999, 5000, 14_999, 15_000, 22_499, 22_500, 24_999, 25_000])
+	assert get_medals(scores) == [get_medal(int(score)) for score in scores]
+	assert [medal_order[i] for i in medal_indices(scores)] == [
+		Medal.NoMedal,
+		Medal.NoMedal,
+		Medal.Bronze,
+		Medal.Bronze,
+		Medal.Silver,
+		Medal.Silver,
+		Medal.Gold,
+		Medal.Gold,
+		Medal.Platinum,
+	]
+
+
+def test_group_functions():
+	keys, inverse = group(['b', 'a', 'b', 'c', 'b'])
+	np.testing.assert_array_equal(keys, ['a', 'b', 'c'])
+	np.testing.assert_array_equal(inverse, [1, 0, 1, 2, 1])
+	values = [1, 2, 3, 4, 5]
+	np.testing.assert_array_equal(group_count(inverse, 4), [1, 3, 1, 0])
+	np.testing.assert_array_equal(group_sum(inverse, values, 4), [2, 9, 4, 0])
+	np.testing.assert_array_equal(group_mean(inverse, values, 4), [2, 3, 4, np.nan])
+
+
+def test_group_percentiles_are_the_same_as_np_percentile():
+	rng = np.random.default_rng(0)
+	inverse = rng.integers(0, 5, 1000)
+	# Nothing in group 3
+	inverse[inverse == 3] = 4
+	values = rng.normal(size=1000)
+	percentiles = [0, 10, 50, 99.5, 100]
+	result = group_percentiles(inverse, values, 6, percentiles)
+	assert result.shape == (6, 5)
+	for i in range(6):
+		if i in {3, 5}:
+			assert np.isnan(result[i]).all()
+		else:
+			np.testing.assert_allclose(result[i], np.percentile(values[inverse == i], percentiles))
+	np.testing.assert_array_equal(group_percentiles(np.array([0]), [7], 1, [0, 50, 100]), [[7, 7, 7]])
+
+
+@pytest.fixture
+def batch(make_game) -> GameBatch:
+	game_dicts = [
+		make_game(
+			token='Game000000000001',
+			locations=[(0, 0, '61'), (1, 1, '62')],
+			guesses=[(0, 0, 5000, 0, 10), (1, 1.1, 3000, 100, 20)],
+			country_codes=['au', 'fr'],
+		),
+		make_game(
+			token='Game000000000002',
+			locations=[(2, 2, '63')],
+			guesses=[(2, 2.1, 4000, 300, 30)],
+			map_slug='a-map',
+			country_codes=['fr'],
+		),
+		make_game(
+			token='Streak0000000001',
+			locations=[(3, 3, '64')],
+			guesses=[(3, 3, 1, 0, 5)],
+			country_codes=['br'],
+		),
+		make_game(
+			token='Game000000000003',
+			locations=[(4, 4, '65')] * 5,
+			guesses=[(4, 4, 5000, 0, 1)] * 5,
+			country_codes=['us'] * 5,
+		),
+	]
+	game_dicts[2]['mode'] = 'streak'
+	for game_round in game_dicts[3]['rounds']:
+		game_round['startTime'] = '2024-04-02T00:00:00+00:00'
+	return GameBatch.from_games(Game.model_validate(game) for game in game_dicts)
+
+
+def test_by_map(batch):
+	stats = game_stats(batch, 'map')
+	np.testing.assert_array_equal(stats.keys, ['a-map', 'world'])
+	np.testing.assert_array_equal(stats.games, [1, 2])
+	np.testing.assert_array_equal(stats.rounds, [1, 7])
+	np.testing.assert_allclose(stats.mean_round_score, [4000, 33_000 / 7])
+	np.testing.assert_allclose(stats.mean_game_score, [4000, (8000 + 25_000) / 2])
+	np.testing.assert_array_equal(stats.medals, [[1, 0, 0, 0, 0], [0, 1, 0, 0, 1]])
+	np.testing.assert_array_equal(stats.time, [30, 35])
+	np.testing.assert_allclose(stats.distance_percentiles, [[300, 300], [0, 40]])
+	assert stats.percentiles == (50, 90)
+
+
+def test_by_country(batch):
+	stats = game_stats(batch, 'country', percentiles=(0, 50, 100))
+	np.testing.assert_array_equal(stats.keys, ['AU', 'FR', 'US'])
+	np.testing.assert_array_equal(stats.games, [1, 2, 1])
+	np.testing.assert_array_equal(stats.rounds, [1, 2, 5])
+	np.testing.assert_allclose(stats.mean_round_score, [5000, 3500, 5000])
+	np.testing.assert_allclose(stats.distance_percentiles, [[0, 0, 0], [100, 200, 300], [0, 0, 0]])
+	np.testing.assert_array_equal(stats.time, [10, 50, 5])
+	assert stats.mean_game_score is None
+	assert stats.medals is None
+
+
+def test_by_mode_with_streaks(batch):
+	stats = game_stats(batch, 'mode', include_streaks=True)
+	np.testing.assert_array_equal(stats.keys, ['standard', 'streak'])
+	np.testing.assert_array_equal(stats.games, [3, 1])
+	np.testing.assert_array_equal(stats.rounds, [8, 1])
+	np.testing.assert_allclose(stats.mean_game_score, [37_000 / 3, 1])
+	np.testing.assert_array_equal(stats.medals[1], [1, 0, 0, 0, 0])
+	assert game_stats(batch, 'mode').keys.tolist() == ['standard']
+
+
+def test_by_month(batch):
+	stats = game_stats(batch, 'month')
+	np.testing.assert_array_equal(
+		stats.keys, np.array(['2024-03', '2024-04'], dtype='datetime64[M]')
+	)
+	np.testing.assert_array_equal(stats.games, [2, 1])
+	np.testing.assert_array_equal(stats.rounds, [3, 5])
+
+
+def test_unknown_grouping(batch):
+	with pytest.raises(ValueError, match='Unknown grouping'):
+		game_stats(batch, 'colour')  # type: ignore[arg-type]
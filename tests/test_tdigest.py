@@ -0,0 +1,100 @@
+import math
+import pickle
+import random
+
+import pytest
+
+from pygeoguessr.tdigest import TDigest
+
+
+def _uniform(count: int, seed: int = 0) -> list[float]:
+	rng = random.Random(seed)
+	return [rng.uniform(0, 1000) for _ in range(count)]
+
+
+def test_empty():
+	digest = TDigest()
+	assert digest.count == 0
+	assert math.isnan(digest.quantile(0.5))
+	assert math.isnan(digest.cdf(1))
+	assert len(digest) == 0
+
+
+def test_single_value():
+	digest = TDigest()
+	digest.add(42)
+	assert digest.quantile(0) == 42
+	assert digest.quantile(0.5) == 42
+	assert digest.quantile(1) == 42
+	assert digest.cdf(41) == 0
+	assert digest.cdf(42) == 1
+
+
+@pytest.mark.parametrize('q', [-0.1, 1.1])
+def test_quantile_out_of_range(q):
+	digest = TDigest()
+	digest.add(1)
+	with pytest.raises(ValueError):
+		digest.quantile(q)
+
+
+@pytest.mark.parametrize('q', [0.001, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 0.999])
+def test_quantiles_of_uniform_values(q):
+	values = _uniform(100_000)
+	digest = TDigest()
+	digest.update(values)
+	exact = sorted(values)[int(q * len(values))]
+	# Within 0.5% of the range in the middle, and 0.05% at the tails
+	tolerance = 0.5 + 4.5 * 4 * q * (1 - q)
+	assert digest.quantile(q) == pytest.approx(exact, abs=tolerance)
+	assert digest.cdf(exact) == pytest.approx(q, abs=tolerance / 1000)
+
+
+def test_min_and_max_are_exact():
+	values = _uniform(10_000)
+	digest = TDigest()
+	digest.update(values)
+	assert digest.quantile(0) == min(values)
+	assert digest.quantile(1) == max(values)
+	assert digest.cdf(min(values) - 1) == 0
+	assert digest.cdf(max(values)) == 1
+
+
+def test_memory_is_bounded():
+	digest = TDigest(compression=50)
+	digest.update(_uniform(100_000))
+	assert digest.count == 100_000
+	assert len(digest) <= 50
+
+
+def test_merge_is_close_to_adding_everything():
+	values = _uniform(20_000)
+	combined = TDigest()
+	combined.update(values)
+	merged = TDigest()
+	for i in range(4):
+		part = TDigest()
+		part.update(values[i::4])
+		merged.merge(part)
+	merged.merge(TDigest())
+	assert merged.count == combined.count
+	assert merged.min == combined.min
+	assert merged.max == combined.max
+	for q in (0.01, 0.5, 0.99):
+		assert merged.quantile(q) == pytest.approx(combined.quantile(q), abs=5)
+
+
+def test_weights():
+	digest = TDigest()
+	digest.add(1, weight=3)
+	digest.add(2, weight=1)
+	assert digest.count == 4
+	assert digest.cdf(1.5) == pytest.approx(0.75, abs=0.25)
+
+
+def test_pickle_round_trip():
+	digest = TDigest()
+	digest.update(_uniform(1000))
+	unpickled = pickle.loads(pickle.dumps(digest))
+	assert unpickled.count == digest.count
+	assert unpickled.quantile(0.5) == digest.quantile(0.5)